@@ -1,12 +1,104 @@
 from django.contrib import admin
-
-# Register your models here.
-from django.contrib import admin
+from django.contrib.admin.views.main import (
+    ALL_VAR, ERROR_FLAG, IS_FACETS_VAR, IS_POPUP_VAR, ORDER_VAR, PAGE_VAR, TO_FIELD_VAR,
+)
 from django.contrib.auth.admin import UserAdmin
-from .models import User,Category,Product
+
+from .models import User, Category, Product
+from .pagination import EstimatedCountPaginator
+
+
+# Query parameters of changelists and autocomplete lookups that leave the
+# rows listed unchanged.
+UNFILTERED_PARAMS = {ALL_VAR, ORDER_VAR, PAGE_VAR, IS_POPUP_VAR, TO_FIELD_VAR, IS_FACETS_VAR, ERROR_FLAG,
+                     'app_label', 'model_name', 'field_name', 'page'}
+SEARCH_PARAMS = {'q', 'term'}
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    """
+    Changelists that stay cheap on large tables: the unfiltered list is
+    counted from the planner's estimate, filtered lists count once (no
+    second ``COUNT(*)`` for the "N total" link) and no facet counts.
+    """
+    paginator = EstimatedCountPaginator
+    list_select_related = ()
+    show_full_result_count = False
+    show_facets = admin.ShowFacets.NEVER
+
+    def get_queryset(self, request):
+        # __str__ follows these relations on change, delete and autocomplete
+        # pages too. The changelist ignores list_select_related once the
+        # queryset has any, so this covers it as well.
+        queryset = super().get_queryset(request)
+        if self.list_select_related:
+            queryset = queryset.select_related(*self.list_select_related)
+        return queryset
+
+    def get_paginator(self, request, queryset, per_page, orphans=0, allow_empty_first_page=True):
+        # Also used by the autocomplete view.
+        estimate = all(
+            name in UNFILTERED_PARAMS or (name in SEARCH_PARAMS and not value)
+            for name, value in request.GET.items()
+        )
+        return self.paginator(queryset, per_page, orphans, allow_empty_first_page, estimate=estimate)
+
 
 admin.site.register(User, UserAdmin)
 
-admin.site.register(Category)
 
-admin.site.register(Product)
\ No newline at end of file
+@admin.register(Category)
+class CategoryAdmin(LargeTableAdmin):
+    list_display = ('name', 'owner', 'created_at')
+    list_select_related = ('owner',)
+    # Matches created_at order without sorting the table.
+    ordering = ('-pk',)
+    # Also what the category autocomplete on products searches.
+    search_fields = ('name',)
+    autocomplete_fields = ('owner',)
+
+    def get_readonly_fields(self, request, obj=None):
+        # Products and summaries carry a copy of the owner (Product.save), so
+        # a category keeps the owner it was created with.
+        if obj is not None:
+            return (*super().get_readonly_fields(request, obj), 'owner')
+        return super().get_readonly_fields(request, obj)
+
+
+class LowStockFilter(admin.SimpleListFilter):
+    title = 'stock'
+    parameter_name = 'low_stock'
+
+    def lookups(self, request, model_admin):
+        return (('yes', 'Low stock'),)
+
+    def queryset(self, request, queryset):
+        if self.value() == 'yes':
+            # Served by the partial low-stock index.
+            return queryset.filter(is_low_stock=True)
+        return queryset
+
+
+@admin.register(Product)
+class ProductAdmin(LargeTableAdmin):
+    list_display = ('name', 'category', 'price', 'quantity', 'min_threshold', 'low_stock', 'expiration_date', 'created_at')
+    list_select_related = ('category__owner',)
+    # Fixed choices: no filter here runs a query to list its options, as one
+    # on category or owner would.
+    list_filter = (LowStockFilter,)
+    search_fields = ('name',)
+    autocomplete_fields = ('category',)
+
+    def get_queryset(self, request):
+        # Products of soft-deleted categories await their purge.
+        return super().get_queryset(request).active()
+
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        if db_field.name == 'category':
+            # The selected category's label shows its owner.
+            kwargs['queryset'] = Category.objects.select_related('owner')
+        return super().formfield_for_foreignkey(db_field, request, **kwargs)
+
+    @admin.display(boolean=True, ordering='is_low_stock', description='low stock')
+    def low_stock(self, obj):
+        return obj.is_low_stock
@@ -0,0 +1,100 @@
+from django.db.models import Q
+from django.utils import timezone
+
+from .events import publish_alerts
+from .models import AlertEvent, InventorySummary, Product
+
+
+def _event(state, kind, transition):
+    return AlertEvent(
+        owner_id=state['owner_id'],
+        product_id=state['id'],
+        product_name=state['name'],
+        kind=kind,
+        state=transition,
+        quantity=state['quantity'],
+        min_threshold=state['min_threshold'],
+        expiration_date=state['expiration_date'],
+    )
+
+
+def _save(events):
+    """Write ``events`` and push them to the owners' live streams on commit."""
+    publish_alerts(AlertEvent.objects.bulk_create(events, batch_size=1000))
+
+
+def _is_low(state):
+    return state is not None and state['quantity'] <= state['min_threshold']
+
+
+def _is_expired(state, as_of):
+    return state is not None and state['expiration_date'] is not None and state['expiration_date'] <= as_of
+
+
+def record_changes(changes):
+    """
+    Log the alert transitions in ``changes`` (``(before, after)`` tracked
+    states, as sent by ``inventory_changed``). ``before`` must be the stored
+    row, read under its lock (see ``accounts.signals``): a transition judged
+    from a stale copy is never undone.
+
+    Expiry is judged as of each category summary's ``expired_as_of`` so
+    that products expiring since the last rollover are raised exactly once,
+    by the rollover (see ``record_newly_expired``).
+    """
+    today = timezone.now().date()
+    as_of = {}
+    recent = {
+        state['category_id'] for change in changes for state in change
+        if state is not None and state['expiration_date'] is not None and state['expiration_date'] <= today
+    }
+    if recent:
+        as_of = dict(InventorySummary.objects.filter(category_id__in=recent).values_list('category_id', 'expired_as_of'))
+
+    events = []
+    for before, after in changes:
+        if _is_low(before) != _is_low(after):
+            events.append(_event(after or before, AlertEvent.LOW_STOCK,
+                                 AlertEvent.RAISED if _is_low(after) else AlertEvent.CLEARED))
+        was_expired = before is not None and _is_expired(before, as_of.get(before['category_id'], today))
+        is_expired = after is not None and _is_expired(after, as_of.get(after['category_id'], today))
+        if was_expired != is_expired:
+            events.append(_event(after or before, AlertEvent.EXPIRED,
+                                 AlertEvent.RAISED if is_expired else AlertEvent.CLEARED))
+    if events:
+        _save(events)
+
+
+def record_newly_expired(products):
+    """Raise expiry alerts for ``products`` (a queryset) that just crossed their date."""
+    events = [
+        _event(state, AlertEvent.EXPIRED, AlertEvent.RAISED)
+        for state in products.values('id', *Product.TRACKED_FIELDS).iterator()
+    ]
+    _save(events)
+
+
+def record_cleared(products, as_of):
+    """Clear the active alerts of ``products`` (a queryset), judging expiry as of ``as_of``."""
+    active = products.filter(
+        Q(is_low_stock=True) | Q(expiration_date__lte=as_of)
+    ).values('id', *Product.TRACKED_FIELDS)
+    events = []
+    for state in active.iterator():
+        if _is_low(state):
+            events.append(_event(state, AlertEvent.LOW_STOCK, AlertEvent.CLEARED))
+        if _is_expired(state, as_of):
+            events.append(_event(state, AlertEvent.EXPIRED, AlertEvent.CLEARED))
+    _save(events)
+
+
+def record_cleared_for_category(category):
+    """Clear the active alerts of a category's products before it is deleted."""
+    as_of = InventorySummary.objects.filter(category=category).values_list(
+        'expired_as_of', flat=True
+    ).first() or timezone.now().date()
+    record_cleared(Product.objects.filter(category=category), as_of)
+
+
+def latest_cursor(owner):
+    return AlertEvent.objects.filter(owner=owner).order_by('-id').values_list('id', flat=True).first() or 0
@@ -0,0 +1,149 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from rest_framework.authentication import TokenAuthentication
+
+from .cache import shares_between_workers
+
+
+DEFAULT_CACHE_SIZE = 10000
+DEFAULT_CACHE_TTL = 300
+
+
+def _shared_cache():
+    return caches[getattr(settings, 'TOKEN_AUTH_SHARED_CACHE_ALIAS', 'default')]
+
+
+def _generation_key(user_id):
+    return f'auth:user-generation:{user_id}'
+
+
+def get_user_generation(user_id):
+    return _shared_cache().get(_generation_key(user_id), 0)
+
+
+def bump_user_generation(user_id):
+    cache = _shared_cache()
+    key = _generation_key(user_id)
+    if not cache.add(key, 1, None):
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 1, None)
+
+
+class TokenCache:
+    """
+    Bounded LRU of token key -> (user, token) snapshots with a TTL.
+
+    Entries also record the user's generation from the shared Django cache;
+    a bump there (see ``invalidate_user``) makes every worker drop its copy
+    on the next lookup.
+    """
+
+    def __init__(self, maxsize=DEFAULT_CACHE_SIZE, ttl=DEFAULT_CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > time.monotonic():
+                    self._entries.move_to_end(key)
+                    return entry
+                del self._entries[key]
+        return None
+
+    def set(self, key, user, token, generation):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, generation, user, token)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def discard_user(self, user_id):
+        with self._lock:
+            for key in [key for key, entry in self._entries.items() if entry[2].pk == user_id]:
+                del self._entries[key]
+
+    def record(self, hit):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+
+token_cache = TokenCache(
+    maxsize=getattr(settings, 'TOKEN_AUTH_CACHE_SIZE', DEFAULT_CACHE_SIZE),
+    ttl=getattr(settings, 'TOKEN_AUTH_CACHE_TTL', DEFAULT_CACHE_TTL),
+)
+
+
+def invalidate_user(user_id, using=None):
+    """
+    Runs once the change commits: until then other requests still read the
+    old rows, and could cache them under a generation bumped too early.
+    """
+    def invalidate():
+        token_cache.discard_user(user_id)
+        bump_user_generation(user_id)
+
+    transaction.on_commit(invalidate, using=using)
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    ``TokenAuthentication`` that skips the token/user query for tokens
+    seen recently. Invalidated by accounts.signals when a token is deleted
+    or regenerated and whenever the user is saved (deactivation, password
+    change, ...). A token seen for the first time costs one query more, to
+    read its user's generation before the rows. Only caches when the
+    generation cache is shared between workers: with a per-process one
+    another worker's invalidation would go unseen, so every request queries.
+    """
+
+    def authenticate_credentials(self, key):
+        if not shares_between_workers(_shared_cache()):
+            return super().authenticate_credentials(key)
+        entry = token_cache.get(key)
+        if entry is not None:
+            _, generation, user, token = entry
+            generation_now = get_user_generation(user.pk)
+            if generation == generation_now:
+                token_cache.record(True)
+                # Hand out a copy so per-request attribute changes stay local.
+                return copy.copy(user), token
+        else:
+            # The generation is read before the rows: an invalidation that
+            # commits in between then leaves the new entry already stale.
+            user_id = self.get_model().objects.filter(key=key).values_list('user_id', flat=True).first()
+            generation_now = get_user_generation(user_id) if user_id is not None else None
+
+        token_cache.record(False)
+        user, token = super().authenticate_credentials(key)
+        token_cache.set(key, user, token, generation_now)
+        return copy.copy(user), token
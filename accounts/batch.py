@@ -0,0 +1,112 @@
+import json
+import logging
+from io import BytesIO
+
+from asgiref.sync import iscoroutinefunction
+from django.db import transaction
+from django.http import HttpRequest, QueryDict
+from django.urls import Resolver404, resolve
+
+
+logger = logging.getLogger(__name__)
+
+PATH_PREFIX = '/api/'
+# Streams, nested batches and the async views (which have sync twins).
+EXCLUDED_ROUTES = {'batch', 'event-stream', 'product-export'}
+# Left out of each operation's result: they describe the batch response.
+EXCLUDED_HEADERS = {'Allow', 'Content-Type', 'Vary'}
+# Status of operations not run because an earlier one failed the batch.
+FAILED_DEPENDENCY = 424
+
+
+def _error(status, detail):
+    return {"status": status, "headers": {}, "body": {"detail": detail}}
+
+
+def _sub_request(request, method, path, query, body, headers):
+    payload = b'' if body is None else json.dumps(body).encode()
+    sub = HttpRequest()
+    sub.method = method
+    sub.path = sub.path_info = path
+    sub.META = {
+        **request.META,
+        **{'HTTP_' + name.upper().replace('-', '_'): value for name, value in headers.items()},
+        'REQUEST_METHOD': method,
+        'PATH_INFO': path,
+        'QUERY_STRING': query,
+        'CONTENT_TYPE': 'application/json',
+        'CONTENT_LENGTH': str(len(payload)),
+    }
+    sub.GET = QueryDict(query)
+    sub.COOKIES = request.COOKIES
+    sub._stream = BytesIO(payload)
+    sub._read_started = False
+    # Authenticated once, by the batch request (see rest_framework.request.Request).
+    sub._force_auth_user = request.user
+    sub._force_auth_token = request.auth
+    return sub
+
+
+def _result(response):
+    if hasattr(response, 'data'):
+        # DRF response: its data as is, never rendered on its own.
+        body = response.data
+    elif not response.content:
+        body = None
+    elif response.get('Content-Type', '').startswith('application/json'):
+        body = json.loads(response.content)
+    else:
+        body = response.content.decode(response.charset)
+    headers = {name: value for name, value in response.items() if name not in EXCLUDED_HEADERS}
+    return {"status": response.status_code, "headers": headers, "body": body}
+
+
+def run_operation(request, operation):
+    """
+    Dispatch one ``{method, path, body, headers}`` operation to its view,
+    in-process and as ``request.user``, skipping the middleware. Returns
+    ``{status, headers, body}``.
+    """
+    path, _, query = operation['path'].partition('?')
+    if not path.startswith(PATH_PREFIX):
+        return _error(404, "Not found.")
+    try:
+        match = resolve(path)
+    except Resolver404:
+        return _error(404, "Not found.")
+    if match.url_name in EXCLUDED_ROUTES or iscoroutinefunction(match.func):
+        return _error(400, "This route cannot be part of a batch.")
+
+    sub = _sub_request(
+        request, operation['method'], path, query, operation.get('body'), operation.get('headers', {})
+    )
+    sub.resolver_match = match
+    try:
+        response = match.func(sub, *match.args, **match.kwargs)
+    except Exception:
+        logger.exception("Batch operation %s %s failed", operation['method'], operation['path'])
+        return _error(500, "Server error.")
+    return _result(response)
+
+
+def run_batch(request, operations, atomic=False):
+    """
+    Run ``operations`` in order; returns ``(results, committed)``. With
+    ``atomic`` they share one transaction: the first operation answering
+    4xx/5xx rolls it back and the rest are not run (status 424).
+    Otherwise every operation stands on its own and ``committed`` is True.
+    """
+    if not atomic:
+        return [run_operation(request, operation) for operation in operations], True
+
+    results = []
+    with transaction.atomic():
+        for operation in operations:
+            if results and results[-1]['status'] >= 400:
+                results.append(_error(FAILED_DEPENDENCY, "Not run: an earlier operation failed."))
+            else:
+                results.append(run_operation(request, operation))
+        failed = any(result['status'] >= 400 for result in results)
+        if failed:
+            transaction.set_rollback(True)
+    return results, not failed
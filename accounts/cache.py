@@ -0,0 +1,108 @@
+import threading
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db.models import F
+from django.utils import timezone
+
+from .concurrency import run_query
+from .models import InventoryVersion
+
+
+DEFAULT_TIMEOUT = 60 * 60
+
+
+class CacheStats:
+    """Per-process hit/miss counters."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def record(self, hit):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def as_dict(self):
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+
+stats = CacheStats()
+
+
+def shares_between_workers(cache):
+    """False for backends each worker process keeps to itself."""
+    return not isinstance(cache, (LocMemCache, DummyCache))
+
+
+def get_cache():
+    return caches[getattr(settings, 'INVENTORY_CACHE_ALIAS', 'default')]
+
+
+def get_inventory_version(user_id):
+    return InventoryVersion.objects.filter(owner_id=user_id).values_list('version', flat=True).first() or 0
+
+
+def get_inventory_state(user_id):
+    """``(version, updated_at)`` of the user's inventory; ``updated_at`` is None if unknown."""
+    return InventoryVersion.objects.filter(owner_id=user_id).values_list('version', 'updated_at').first() or (0, None)
+
+
+def bump_inventory_version(owner_id):
+    updated = InventoryVersion.objects.filter(owner_id=owner_id).update(
+        version=F('version') + 1, updated_at=timezone.now()
+    )
+    if not updated:
+        InventoryVersion.objects.get_or_create(owner_id=owner_id, defaults={'version': 1})
+
+
+def bump_inventory_versions(owner_ids):
+    InventoryVersion.objects.filter(owner_id__in=owner_ids).update(
+        version=F('version') + 1, updated_at=timezone.now()
+    )
+
+
+def _payload_key(user, name, version):
+    return f"inventory:{name}:{user.pk}:{version}:{timezone.now().date().isoformat()}"
+
+
+def cached_inventory_payload(user, name, build):
+    """
+    Return ``(payload, hit)`` for ``build()``, cached under the user's
+    current inventory version and today's date. Any write bumps the
+    version, and date-dependent flags (``has_expiry``) change at midnight,
+    so a cached payload is never served stale.
+    """
+    key = _payload_key(user, name, get_inventory_version(user.pk))
+    cache = get_cache()
+    payload = cache.get(key)
+    hit = payload is not None
+    stats.record(hit)
+    if not hit:
+        payload = build()
+        cache.set(key, payload, getattr(settings, 'INVENTORY_CACHE_TIMEOUT', DEFAULT_TIMEOUT))
+    return payload, hit
+
+
+async def acached_inventory_payload(user, name, abuild):
+    """Async ``cached_inventory_payload``; ``abuild`` is a coroutine function."""
+    key = _payload_key(user, name, await run_query(lambda: get_inventory_version(user.pk)))
+    cache = get_cache()
+    payload = await cache.aget(key)
+    hit = payload is not None
+    stats.record(hit)
+    if not hit:
+        payload = await abuild()
+        await cache.aset(key, payload, getattr(settings, 'INVENTORY_CACHE_TIMEOUT', DEFAULT_TIMEOUT))
+    return payload, hit
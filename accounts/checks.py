@@ -0,0 +1,25 @@
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS, caches
+from django.core.checks import Error, Tags, register
+
+from config.routers import replica_aliases
+
+from .cache import shares_between_workers
+
+
+@register(Tags.caches, deploy=True)
+def check_replica_pins(app_configs, **kwargs):
+    """
+    ReplicaMiddleware pins a client to the primary after a write through the
+    default cache; a per-process cache only pins it on the worker that took
+    the write, so the others serve it stale replica reads.
+    """
+    if 'accounts.middleware.ReplicaMiddleware' not in settings.MIDDLEWARE or not replica_aliases():
+        return []
+    if shares_between_workers(caches[DEFAULT_CACHE_ALIAS]):
+        return []
+    return [Error(
+        "Read replicas are configured but the default cache is per-process.",
+        hint="Set REDIS_URL so every worker sees the replica pins.",
+        id='accounts.E001',
+    )]
@@ -0,0 +1,47 @@
+import asyncio
+import weakref
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+
+
+DEFAULT_QUERY_CONCURRENCY = 4
+
+# One semaphore per event loop: asyncio primitives cannot be shared across loops.
+_semaphores = weakref.WeakKeyDictionary()
+
+
+def _get_semaphore():
+    loop = asyncio.get_running_loop()
+    semaphore = _semaphores.get(loop)
+    if semaphore is None:
+        limit = getattr(settings, 'ASYNC_QUERY_CONCURRENCY', DEFAULT_QUERY_CONCURRENCY)
+        semaphore = _semaphores[loop] = asyncio.Semaphore(limit)
+    return semaphore
+
+
+def _in_worker(func):
+    def run():
+        # Pool threads keep their own connection between calls; apply the
+        # same CONN_MAX_AGE / health checks a request thread would.
+        close_old_connections()
+        try:
+            return func()
+        finally:
+            close_old_connections()
+    return run
+
+
+async def run_query(func):
+    """
+    Run the sync, DB-touching ``func`` in a pool thread, on that thread's own
+    connection, holding one of the worker-wide concurrency slots.
+    """
+    async with _get_semaphore():
+        return await sync_to_async(_in_worker(func), thread_sensitive=False)()
+
+
+async def gather_queries(*funcs):
+    """Run independent queries concurrently (see ``run_query``); results in order."""
+    return await asyncio.gather(*(run_query(func) for func in funcs))
@@ -0,0 +1,254 @@
+import asyncio
+import json
+import logging
+import threading
+from collections import defaultdict
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, transaction
+from django.utils.module_loading import import_string
+
+from asgiref.sync import sync_to_async
+
+from .models import AlertEvent
+from .serializers import AlertEventSerializer
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BACKEND = 'accounts.events.InProcessBroker'
+SUBSCRIBER_QUEUE_SIZE = 256
+DEFAULT_HEARTBEAT = 15
+REPLAY_PAGE_SIZE = 500
+
+
+class Subscription:
+    """A subscriber's bounded queue. ``overflowed`` is set if events were dropped."""
+
+    def __init__(self, loop, maxsize=SUBSCRIBER_QUEUE_SIZE):
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=maxsize)
+        self.overflowed = False
+
+    def deliver(self, event):
+        # Always runs on the subscriber's event loop.
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.overflowed = True
+
+    async def get(self, timeout):
+        return await asyncio.wait_for(self.queue.get(), timeout)
+
+
+class InProcessBroker:
+    """
+    Fans events out to the subscribers of this process. Enough for a single
+    ASGI worker; use ``PostgresNotifyBroker`` when several workers serve
+    streams.
+    """
+
+    def __init__(self):
+        self._subscribers = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def subscribe(self, user_id):
+        subscription = Subscription(asyncio.get_running_loop())
+        with self._lock:
+            self._subscribers[user_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, user_id, subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(user_id)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[user_id]
+
+    def subscriber_count(self):
+        with self._lock:
+            return sum(len(subscribers) for subscribers in self._subscribers.values())
+
+    def publish(self, user_id, event):
+        self.publish_many([(user_id, event)])
+
+    def publish_many(self, messages):
+        for user_id, event in messages:
+            self.fan_out(user_id, event)
+
+    def fan_out(self, user_id, event):
+        with self._lock:
+            subscribers = list(self._subscribers.get(user_id, ()))
+        for subscription in subscribers:
+            # publish() is called from sync request threads.
+            subscription.loop.call_soon_threadsafe(subscription.deliver, event)
+
+
+class PostgresNotifyBroker(InProcessBroker):
+    """
+    Publishes through ``pg_notify`` so every worker receives every event.
+    Each process runs one ``LISTEN`` connection and fans out locally.
+    """
+    channel = 'stock_events'
+
+    def __init__(self):
+        super().__init__()
+        self._listener = None
+
+    def publish_many(self, messages):
+        # One statement for the batch, however many events it carries.
+        payloads = [json.dumps({'user': user_id, 'event': event}, cls=DjangoJSONEncoder)
+                    for user_id, event in messages]
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT pg_notify(%s, payload) FROM unnest(%s::text[]) AS payload",
+                [self.channel, payloads],
+            )
+
+    def subscribe(self, user_id):
+        subscription = super().subscribe(user_id)
+        if self._listener is None or self._listener.done():
+            self._listener = asyncio.get_running_loop().create_task(self._listen())
+        return subscription
+
+    async def _listen(self):
+        import psycopg
+
+        db = settings.DATABASES['default']
+        conninfo = psycopg.conninfo.make_conninfo(
+            dbname=db.get('NAME'), user=db.get('USER'), password=db.get('PASSWORD'),
+            host=db.get('HOST') or None, port=db.get('PORT') or None,
+        )
+        while True:
+            try:
+                async with await psycopg.AsyncConnection.connect(conninfo, autocommit=True) as conn:
+                    await conn.execute(f"LISTEN {self.channel}")
+                    async for notify in conn.notifies():
+                        message = json.loads(notify.payload)
+                        self.fan_out(message['user'], message['event'])
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Event listener connection lost; reconnecting.")
+                await asyncio.sleep(1)
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                _broker = import_string(getattr(settings, 'STOCK_EVENTS_BACKEND', DEFAULT_BACKEND))()
+    return _broker
+
+
+def publish(user_id, event):
+    """
+    Publish ``event`` to ``user_id``'s streams once the current transaction
+    commits. Events are ``{'event': name, 'data': ...}`` dicts, with an
+    ``'id'`` for alert events so clients can resume from ``Last-Event-ID``.
+    """
+    publish_many([(user_id, event)])
+
+
+def publish_many(messages):
+    """Publish ``(user_id, event)`` pairs together once the transaction commits."""
+    messages = list(messages)
+    if messages:
+        transaction.on_commit(lambda: get_broker().publish_many(messages))
+
+
+def alert_events(alerts):
+    # One serializer for the batch: building its fields costs more than
+    # serializing an alert.
+    return [
+        {'event': 'alert', 'id': alert.id, 'data': data}
+        for alert, data in zip(alerts, AlertEventSerializer(alerts, many=True).data)
+    ]
+
+
+def publish_alerts(alerts):
+    publish_many((alert.owner_id, event) for alert, event in zip(alerts, alert_events(alerts)))
+
+
+def publish_dashboard_deltas(deltas):
+    """
+    ``deltas`` maps owner ids to summary field deltas (see
+    ``summary.SUMMARY_FIELDS``); fields that did not change are left out.
+    """
+    messages = []
+    for owner_id, delta in deltas.items():
+        delta = {field: float(value) if isinstance(value, Decimal) else value
+                 for field, value in delta.items() if value}
+        if delta:
+            messages.append((owner_id, {'event': 'dashboard', 'data': {'delta': delta}}))
+    publish_many(messages)
+
+
+def publish_dashboard_refresh(owner_id):
+    """Tell ``owner_id``'s streams to refetch the dashboard (categories changed)."""
+    publish(owner_id, {'event': 'dashboard', 'data': {'refresh': True}})
+
+
+def format_event(event):
+    lines = []
+    if event.get('id') is not None:
+        lines.append(f"id: {event['id']}")
+    lines.append(f"event: {event['event']}")
+    lines.append('data: ' + json.dumps(event['data'], cls=DjangoJSONEncoder))
+    return '\n'.join(lines) + '\n\n'
+
+
+def _replay_page(user_id, since):
+    return alert_events(
+        AlertEvent.objects.filter(owner_id=user_id, id__gt=since).order_by('id')[:REPLAY_PAGE_SIZE]
+    )
+
+
+async def stream(user_id, since=None, heartbeat=DEFAULT_HEARTBEAT):
+    """
+    Async iterator of SSE frames for ``user_id``.
+
+    Subscribes first, then replays the alert events after ``since`` from the
+    log, so nothing published in between is lost (duplicates are skipped by
+    id). Idle streams get a comment line every ``heartbeat`` seconds. A
+    subscriber that falls too far behind is told to refresh and the stream
+    ends; ``EventSource`` reconnects with ``Last-Event-ID`` and replays.
+    """
+    broker = get_broker()
+    subscription = broker.subscribe(user_id)
+    try:
+        yield f'retry: {heartbeat * 1000}\n\n'
+        last_id = since or 0
+        if since is not None:
+            while True:
+                page = await sync_to_async(_replay_page)(user_id, last_id)
+                for event in page:
+                    yield format_event(event)
+                    last_id = event['id']
+                if len(page) < REPLAY_PAGE_SIZE:
+                    break
+
+        while True:
+            try:
+                event = await subscription.get(heartbeat)
+            except asyncio.TimeoutError:
+                yield ': keep-alive\n\n'
+                continue
+            if event.get('id') is not None:
+                if event['id'] <= last_id:
+                    continue
+                last_id = event['id']
+            yield format_event(event)
+            if subscription.overflowed:
+                yield format_event({'event': 'dashboard', 'data': {'refresh': True}})
+                return
+    finally:
+        broker.unsubscribe(user_id, subscription)
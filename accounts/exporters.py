@@ -0,0 +1,70 @@
+import csv
+import json
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.utils import timezone
+
+from .serializers import ProductReadSerializer
+
+
+DEFAULT_CHUNK_SIZE = 2000
+
+EXPORT_FIELDS = (
+    'id', 'name', 'price', 'quantity', 'min_threshold',
+    'expiration_date', 'category', 'is_low_stock', 'has_expiry', 'created_at',
+)
+
+
+def get_chunk_size():
+    return getattr(settings, 'PRODUCT_EXPORT_CHUNK_SIZE', DEFAULT_CHUNK_SIZE)
+
+
+def export_rows(queryset):
+    """
+    Yield products as plain dicts shaped like ``ProductSerializer`` output,
+    reading through a server-side cursor so memory stays flat.
+    """
+    rows = ProductReadSerializer.rows(queryset).iterator(chunk_size=get_chunk_size())
+    current_tz = timezone.get_current_timezone()
+    for row in rows:
+        yield ProductReadSerializer.to_representation(row, current_tz)
+
+
+class _Echo:
+    """File-like object whose write() returns the value, for csv.writer streaming."""
+
+    def write(self, value):
+        return value
+
+
+def stream_csv(rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(EXPORT_FIELDS)
+    for row in rows:
+        yield writer.writerow([
+            '' if row[field] is None else row[field] for field in EXPORT_FIELDS
+        ])
+
+
+def stream_ndjson(rows):
+    for row in rows:
+        yield json.dumps(row, ensure_ascii=False) + '\n'
+
+
+async def aiter_chunks(stream, size=None):
+    """
+    ``stream`` for an ASGI response, ``size`` lines per chunk. Django would
+    otherwise read a sync iterator into a list before sending any of it.
+    The batches are pulled on one thread, which the server-side cursor
+    needs.
+    """
+    size = size or get_chunk_size()
+    next_chunk = sync_to_async(lambda: ''.join(islice(stream, size)))
+    try:
+        while chunk := await next_chunk():
+            yield chunk
+    finally:
+        # Also when the client goes away: closes the cursor on its thread.
+        await sync_to_async(stream.close)()
@@ -0,0 +1,157 @@
+import math
+from datetime import timedelta
+
+import numpy as np
+from django.conf import settings
+from django.db.models import Sum
+from django.utils import timezone
+
+from .cache import cached_inventory_payload
+from .models import Product, StockMovement
+
+
+DEFAULT_WINDOW_DAYS = 28
+DEFAULT_LEAD_TIME_DAYS = 7
+DEFAULT_COVER_DAYS = 14
+# Projected stockouts further out than this are reported as none.
+HORIZON_DAYS = 3650
+# Ledger entries that take stock out for use; deletes and moves do not.
+CONSUMPTION_REASONS = (StockMovement.ADJUSTED, StockMovement.UPDATED)
+SECONDS_PER_DAY = 86400
+
+
+def project(quantity, min_threshold, consumed, observed_days, lead_time_days, cover_days):
+    """
+    Forecast every product at once from aligned arrays: units on hand, the
+    low-stock threshold, units consumed over ``observed_days``.
+
+    Returns ``(daily_rate, days_to_stockout, suggested_reorder)``;
+    ``days_to_stockout`` is NaN for products not being consumed. A product
+    is due for reordering once its stock would reach the threshold within
+    the lead time; the suggestion then brings it to the threshold plus
+    ``cover_days`` of consumption.
+    """
+    rate = consumed / observed_days
+    consuming = rate > 0
+    days_to_stockout = np.where(consuming, quantity / np.where(consuming, rate, 1), np.nan)
+    reorder_point = min_threshold + rate * lead_time_days
+    suggested = np.where(
+        quantity <= reorder_point,
+        np.ceil(np.maximum(reorder_point + rate * cover_days - quantity, 0)),
+        0,
+    ).astype(np.int64)
+    return rate, days_to_stockout, suggested
+
+
+def _align(ids, keys):
+    """Positions of ``keys`` in the sorted ``ids``, and which of them were found."""
+    positions = np.minimum(np.searchsorted(ids, keys), len(ids) - 1)
+    return positions, ids[positions] == keys
+
+
+def load(owner, now, window_days):
+    """
+    The owner's products as aligned arrays sorted by id: ``(ids, quantity,
+    min_threshold, consumed, observed_days)``. Only integers are fetched
+    per product; timestamps only for products younger than the window.
+    """
+    rows = list(Product.objects.for_owner(owner).order_by('id').values_list('id', 'quantity', 'min_threshold'))
+    ids, quantity, min_threshold = (
+        np.array(column, dtype=np.int64) for column in (zip(*rows) if rows else ((), (), ()))
+    )
+    consumed = np.zeros(len(ids), dtype=np.float64)
+    observed_days = np.full(len(ids), float(window_days))
+    if not rows:
+        return ids, quantity, min_threshold, consumed, observed_days
+
+    since = now - timedelta(days=window_days)
+    # Products younger than the window are judged over their own age.
+    recent = list(Product.objects.for_owner(owner).filter(created_at__gt=since).values_list('id', 'created_at'))
+    if recent:
+        positions, found = _align(ids, np.array([pk for pk, _ in recent], dtype=np.int64))
+        ages = np.array([(now - created_at).total_seconds() for _, created_at in recent]) / SECONDS_PER_DAY
+        observed_days[positions[found]] = np.maximum(ages[found], 1)
+
+    usage = list(StockMovement.objects.filter(
+        owner=owner,
+        created_at__gt=since,
+        reason__in=CONSUMPTION_REASONS,
+        product_id__isnull=False,
+        quantity_delta__lt=0,
+    ).values('product_id').annotate(total=Sum('quantity_delta')).order_by().values_list('product_id', 'total'))
+    if usage:
+        used_ids, totals = (np.array(column, dtype=np.int64) for column in zip(*usage))
+        # Entries of since-deleted products are not found.
+        positions, found = _align(ids, used_ids)
+        consumed[positions[found]] = -totals[found]
+    return ids, quantity.astype(np.float64), min_threshold.astype(np.float64), consumed, observed_days
+
+
+def compute(owner):
+    """
+    Forecast all of ``owner``'s products. Returns arrays for the products
+    being consumed or due for reordering, soonest stockout first.
+    """
+    ids, quantity, min_threshold, consumed, observed_days = load(
+        owner, timezone.now(), getattr(settings, 'FORECAST_WINDOW_DAYS', DEFAULT_WINDOW_DAYS)
+    )
+    rate, days_to_stockout, suggested = project(
+        quantity, min_threshold, consumed, observed_days,
+        getattr(settings, 'FORECAST_LEAD_TIME_DAYS', DEFAULT_LEAD_TIME_DAYS),
+        getattr(settings, 'FORECAST_COVER_DAYS', DEFAULT_COVER_DAYS),
+    )
+    days_to_stockout[days_to_stockout > HORIZON_DAYS] = np.nan
+    keep = np.flatnonzero((rate > 0) | (suggested > 0))
+    # By days to stockout (none last), then id.
+    keep = keep[np.lexsort((ids[keep], np.nan_to_num(days_to_stockout[keep], nan=np.inf)))]
+    return {
+        'product_id': ids[keep],
+        'daily_rate': rate[keep],
+        'days_to_stockout': days_to_stockout[keep],
+        'suggested_reorder': suggested[keep],
+    }
+
+
+def product_forecast(user):
+    """``(forecast, hit)``: ``compute(user)``, cached per inventory version and day."""
+    return cached_inventory_payload(user, 'forecast', lambda: compute(user))
+
+
+def select(forecast, reorder_only=False):
+    """Positions into ``forecast`` to list, optionally only those with a reorder suggestion."""
+    if reorder_only:
+        return np.flatnonzero(forecast['suggested_reorder'] > 0)
+    return np.arange(len(forecast['product_id']))
+
+
+def rows(user, forecast, positions):
+    """Response rows for ``positions``, with the products' names and stock."""
+    positions = np.asarray(positions, dtype=np.int64)
+    ids = forecast['product_id'][positions].tolist()
+    products = {
+        row['id']: row
+        for row in Product.objects.for_owner(user).filter(id__in=ids).values('id', 'name', 'quantity', 'min_threshold')
+    }
+    today = timezone.now().date()
+    result = []
+    for pk, rate, days, suggested in zip(
+        ids,
+        forecast['daily_rate'][positions].tolist(),
+        forecast['days_to_stockout'][positions].tolist(),
+        forecast['suggested_reorder'][positions].tolist(),
+    ):
+        product = products.get(pk)
+        if product is None:
+            continue
+        stockout = not math.isnan(days)
+        result.append({
+            "product_id": pk,
+            "name": product['name'],
+            "quantity": product['quantity'],
+            "min_threshold": product['min_threshold'],
+            "daily_rate": round(rate, 3),
+            "days_to_stockout": round(days, 1) if stockout else None,
+            "stockout_date": (today + timedelta(days=int(days))).isoformat() if stockout else None,
+            "suggested_reorder": suggested,
+        })
+    return result
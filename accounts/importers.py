@@ -0,0 +1,170 @@
+import codecs
+import csv
+import json
+import logging
+
+from django.conf import settings
+from django.db import DatabaseError, transaction
+
+from .models import Category, Product, StockMovement
+from .serializers import ProductImportRowSerializer
+from .signals import inventory_changed
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 1000
+MAX_BATCH_SIZE = 5000
+MAX_REPORTED_ERRORS = 1000
+READ_CHUNK_SIZE = 64 * 1024
+
+CSV_CONTENT_TYPES = ('text/csv', 'application/csv')
+NDJSON_CONTENT_TYPES = ('application/x-ndjson', 'application/ndjson', 'application/jsonl')
+
+
+def get_batch_size(requested=None):
+    default = getattr(settings, 'PRODUCT_IMPORT_BATCH_SIZE', DEFAULT_BATCH_SIZE)
+    try:
+        size = int(requested) if requested else default
+    except (TypeError, ValueError):
+        size = default
+    return max(1, min(size, getattr(settings, 'PRODUCT_IMPORT_MAX_BATCH_SIZE', MAX_BATCH_SIZE)))
+
+
+def detect_format(content_type, filename=''):
+    content_type = (content_type or '').split(';')[0].strip().lower()
+    if content_type in CSV_CONTENT_TYPES or filename.endswith('.csv'):
+        return 'csv'
+    if content_type in NDJSON_CONTENT_TYPES or filename.endswith(('.ndjson', '.jsonl')):
+        return 'ndjson'
+    return None
+
+
+def iter_request_chunks(stream, chunk_size=READ_CHUNK_SIZE):
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            return
+        yield chunk
+
+
+def iter_lines(chunks, encoding='utf-8'):
+    """Decode byte chunks into lines (keeping '\\n') without buffering the whole body."""
+    decoder = codecs.getincrementaldecoder(encoding)()
+    buffer = ''
+    for chunk in chunks:
+        buffer += decoder.decode(chunk)
+        *lines, buffer = buffer.split('\n')
+        for line in lines:
+            yield line + '\n'
+    buffer += decoder.decode(b'', final=True)
+    if buffer:
+        yield buffer
+
+
+def iter_csv_rows(lines):
+    reader = csv.DictReader(lines)
+    for row in reader:
+        if not any(row.values()):
+            continue
+        # Empty cells mean "not provided" (e.g. no expiration date).
+        yield reader.line_num, {key: value for key, value in row.items() if key and value not in ('', None)}
+
+
+def iter_ndjson_rows(lines):
+    for line_num, line in enumerate(lines, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            data = json.loads(line)
+        except ValueError:
+            yield line_num, None
+            continue
+        yield line_num, data if isinstance(data, dict) else None
+
+
+class ProductImporter:
+    """
+    Validates rows one by one and inserts them with bulk_create, checking
+    category ownership with a single query per batch.
+    """
+
+    def __init__(self, owner, batch_size=DEFAULT_BATCH_SIZE):
+        self.owner = owner
+        self.batch_size = batch_size
+        self.created = 0
+        self.failed = 0
+        self.errors = []
+        self._pending = []
+
+    def run(self, rows):
+        for row_num, data in rows:
+            if data is None:
+                self._error(row_num, {"non_field_errors": ["Invalid JSON object."]})
+                continue
+            serializer = ProductImportRowSerializer(data=data)
+            if not serializer.is_valid():
+                self._error(row_num, serializer.errors)
+                continue
+            self._pending.append((row_num, serializer.validated_data))
+            if len(self._pending) >= self.batch_size:
+                self.flush()
+        self.flush()
+        return self.report()
+
+    def flush(self):
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, []
+        category_ids = {data['category'] for _, data in batch}
+        owned = set(
+            Category.objects.filter(owner=self.owner, id__in=category_ids).values_list('id', flat=True)
+        )
+        products, row_nums = [], []
+        for row_num, data in batch:
+            if data['category'] not in owned:
+                self._error(row_num, {"category": [
+                    "Access Denied: You cannot assign products to a category you do not own."
+                ]})
+                continue
+            products.append(Product(
+                name=data['name'],
+                price=data['price'],
+                quantity=data['quantity'],
+                min_threshold=data['min_threshold'],
+                expiration_date=data.get('expiration_date'),
+                category_id=data['category'],
+                owner=self.owner,
+            ))
+            row_nums.append(row_num)
+        if not products:
+            return
+        try:
+            with transaction.atomic():
+                Product.objects.bulk_create(products, batch_size=self.batch_size)
+                inventory_changed.send(
+                    sender=Product,
+                    changes=[(None, product.tracked_state()) for product in products],
+                    reason=StockMovement.IMPORTED,
+                )
+        except DatabaseError:
+            # The batch is rolled back as a whole; earlier batches stay.
+            logger.exception("Import batch of rows %d-%d rejected by the database", row_nums[0], row_nums[-1])
+            for row_num in row_nums:
+                self._error(row_num, {"non_field_errors": ["Batch rejected by the database."]})
+            return
+        self.created += len(products)
+
+    def report(self):
+        return {
+            "created": self.created,
+            "failed": self.failed,
+            "errors": self.errors,
+            "errors_truncated": self.failed > len(self.errors),
+        }
+
+    def _error(self, row_num, errors):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"row": row_num, "errors": errors})
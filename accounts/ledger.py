@@ -0,0 +1,231 @@
+from collections import defaultdict
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Max, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import Category, CategoryDailyRollup, InventorySummary, StockMovement
+
+
+CHUNK_SIZE = 1000
+ROLLUP_FIELDS = ('total_stock', 'total_value', 'low_stock_count')
+# The build always redoes this many trailing days, so movements committed
+# just after a run (but timestamped before it) are picked up by the next.
+REBUILD_DAYS = 2
+ZERO = Decimal('0')
+
+
+def _contribution(state):
+    return (
+        state['quantity'],
+        state['price'] * state['quantity'],
+        1 if state['quantity'] <= state['min_threshold'] else 0,
+    )
+
+
+def _save(movements):
+    if len(movements) == 1:
+        # A plain INSERT; bulk_create would open a transaction of its own.
+        movements[0].save()
+    elif movements:
+        StockMovement.objects.bulk_create(movements, batch_size=CHUNK_SIZE)
+
+
+def record_changes(changes, reason=None):
+    """
+    Write the ledger entries for ``changes`` (``(before, after)`` tracked
+    states, as sent by ``inventory_changed``). A product moved to another
+    category gets one entry per category; changes that leave its stock,
+    value and low-stock status alone get none. The entries of a product
+    add up to its stored row only if ``before`` is that row as locked by
+    the write (see ``accounts.signals``).
+    """
+    movements = []
+    for before, after in changes:
+        if reason is not None:
+            entry_reason = reason
+        elif before is None:
+            entry_reason = StockMovement.CREATED
+        elif after is None:
+            entry_reason = StockMovement.DELETED
+        elif before['category_id'] != after['category_id']:
+            # Kept apart so moves never read as consumption.
+            entry_reason = StockMovement.MOVED
+        else:
+            entry_reason = StockMovement.UPDATED
+        deltas = defaultdict(lambda: [0, ZERO, 0])
+        for state, sign in ((before, -1), (after, 1)):
+            if state is None:
+                continue
+            delta = deltas[(state['category_id'], state['owner_id'])]
+            for index, value in enumerate(_contribution(state)):
+                delta[index] += sign * value
+        for (category_id, owner_id), (quantity, value, low) in deltas.items():
+            if quantity or value or low:
+                movements.append(StockMovement(
+                    owner_id=owner_id,
+                    category_id=category_id,
+                    product_id=(after or before)['id'],
+                    reason=entry_reason,
+                    quantity_delta=quantity,
+                    value_delta=value,
+                    low_stock_delta=low,
+                ))
+    _save(movements)
+
+
+def _category_entries(categories, reason, sign):
+    return [
+        StockMovement(
+            owner_id=row['owner_id'],
+            category_id=row['category_id'],
+            reason=reason,
+            quantity_delta=sign * row['total_stock'],
+            value_delta=sign * row['total_value'],
+            low_stock_delta=sign * row['low_stock_count'],
+        )
+        for row in InventorySummary.objects.filter(category__in=categories).values(
+            'owner_id', 'category_id', *ROLLUP_FIELDS
+        )
+        if row['total_stock'] or row['total_value'] or row['low_stock_count']
+    ]
+
+
+def record_opening_balances(categories):
+    """One entry per category carrying its current stock, from the summaries."""
+    _save(_category_entries(categories, StockMovement.OPENING, 1))
+
+
+def record_category_deleted(category):
+    """Close a category's balance before it is deleted (the cascade skips ``inventory_changed``)."""
+    _save(_category_entries(Category.objects.filter(pk=category.pk), StockMovement.CATEGORY_DELETED, -1))
+
+
+def _start_of(day):
+    return datetime.combine(day, time.min, tzinfo=dt_timezone.utc)
+
+
+def build_rollups(since=None, today=None):
+    """
+    Bring ``CategoryDailyRollup`` up to date through ``today``: each day's
+    rows are the previous day's plus that day's ledger entries. Days from
+    ``since`` on are rebuilt; by default that is the last ``REBUILD_DAYS``
+    days built, or the whole ledger on the first run. Returns the number
+    of rows written.
+
+    Not safe to run concurrently with itself; schedule a single instance.
+    """
+    today = today or timezone.now().date()
+    if since is None:
+        last = CategoryDailyRollup.objects.aggregate(last=Max('date'))['last']
+        if last is not None:
+            since = min(last, today) - timedelta(days=REBUILD_DAYS - 1)
+        else:
+            first = StockMovement.objects.order_by('created_at').values_list('created_at', flat=True).first()
+            if first is None:
+                return 0
+            since = first.astimezone(dt_timezone.utc).date()
+    days = [since + timedelta(days=n) for n in range((today - since).days + 1)]
+    if not days:
+        return 0
+    previous = since - timedelta(days=1)
+    movements = StockMovement.objects.filter(
+        created_at__gte=_start_of(since), created_at__lt=_start_of(today + timedelta(days=1))
+    )
+
+    # Categories holding stock before ``since`` or with entries since.
+    category_ids = sorted(
+        set(CategoryDailyRollup.objects.filter(date=previous).values_list('category_id', flat=True))
+        | set(movements.values_list('category_id', flat=True).distinct())
+    )
+    written = 0
+    for start in range(0, len(category_ids), CHUNK_SIZE):
+        chunk = category_ids[start:start + CHUNK_SIZE]
+        balances = {
+            row['category_id']: row
+            for row in CategoryDailyRollup.objects.filter(date=previous, category_id__in=chunk).values(
+                'category_id', 'owner_id', *ROLLUP_FIELDS
+            )
+        }
+        daily = defaultdict(dict)
+        for row in movements.filter(category_id__in=chunk).annotate(
+            day=TruncDate('created_at', tzinfo=dt_timezone.utc)
+        ).values('category_id', 'owner_id', 'day').annotate(
+            total_stock=Sum('quantity_delta'),
+            total_value=Sum('value_delta'),
+            low_stock_count=Sum('low_stock_delta'),
+        ).order_by():
+            daily[row['category_id']][row['day']] = row
+
+        rollups = []
+        for category_id in chunk:
+            opening = balances.get(category_id)
+            owner_id = opening['owner_id'] if opening else None
+            totals = [opening[field] if opening else 0 for field in ROLLUP_FIELDS]
+            for day in days:
+                delta = daily[category_id].get(day)
+                if delta is not None:
+                    owner_id = delta['owner_id']
+                    totals = [total + (delta[field] or 0) for total, field in zip(totals, ROLLUP_FIELDS)]
+                if any(totals):
+                    rollups.append(CategoryDailyRollup(
+                        owner_id=owner_id, category_id=category_id, date=day, **dict(zip(ROLLUP_FIELDS, totals))
+                    ))
+        with transaction.atomic():
+            CategoryDailyRollup.objects.filter(category_id__in=chunk, date__gte=since).delete()
+            CategoryDailyRollup.objects.bulk_create(rollups, batch_size=CHUNK_SIZE)
+        written += len(rollups)
+    return written
+
+
+def history_payload(user, start, end):
+    """
+    Daily stock, value and low-stock totals of ``user`` between ``start``
+    and ``end``, overall and per category, read from the rollups alone.
+    Days after the last build are left out.
+    """
+    built_through = CategoryDailyRollup.objects.aggregate(last=Max('date'))['last']
+    if built_through is not None:
+        end = min(end, built_through)
+    rows = list(
+        CategoryDailyRollup.objects.filter(owner=user, date__gte=start, date__lte=end).values(
+            'date', 'category_id', *ROLLUP_FIELDS
+        ).order_by('date', 'category_id')
+    )
+    names = dict(
+        Category.objects.filter(id__in={row['category_id'] for row in rows}).values_list('id', 'name')
+    )
+    by_date = defaultdict(list)
+    for row in rows:
+        by_date[row['date']].append(row)
+
+    days = []
+    for n in range((end - start).days + 1):
+        day = start + timedelta(days=n)
+        day_rows = by_date.get(day, [])
+        days.append({
+            "date": day.isoformat(),
+            "total_stock": sum(row['total_stock'] for row in day_rows),
+            "total_value": float(sum((row['total_value'] for row in day_rows), ZERO)),
+            "low_stock": sum(row['low_stock_count'] for row in day_rows),
+            "categories": [
+                {
+                    "id": row['category_id'],
+                    # None once the category has been deleted.
+                    "name": names.get(row['category_id']),
+                    "total_stock": row['total_stock'],
+                    "total_value": float(row['total_value']),
+                    "low_stock": row['low_stock_count'],
+                }
+                for row in day_rows
+            ],
+        })
+    return {
+        "from": start.isoformat(),
+        "to": end.isoformat(),
+        "built_through": built_through.isoformat() if built_through else None,
+        "days": days,
+    }
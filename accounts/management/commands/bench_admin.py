@@ -0,0 +1,102 @@
+import statistics
+import time
+import uuid
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+
+from accounts.models import Category, Product, User
+from accounts.pagination import EstimatedCountPaginator, estimated_row_count
+from accounts.seeding import seed_inventory
+
+
+CATEGORIES = 100
+
+# (name, budget, path): budgets hold for any table size, counting the
+# session and user lookups; growth with the data is an N+1.
+PAGES = (
+    ('product-changelist', 4, lambda ctx: '/admin/accounts/product/'),
+    ('product-changelist-page-10', 4, lambda ctx: '/admin/accounts/product/?p=10'),
+    ('product-low-stock', 4, lambda ctx: '/admin/accounts/product/?low_stock=yes'),
+    ('product-search', 4, lambda ctx: '/admin/accounts/product/?q=coffee'),
+    ('product-change', 4, lambda ctx: f'/admin/accounts/product/{ctx.product_id}/change/'),
+    ('product-add', 2, lambda ctx: '/admin/accounts/product/add/'),
+    ('category-changelist', 4, lambda ctx: '/admin/accounts/category/'),
+    ('category-change', 3, lambda ctx: f'/admin/accounts/category/{ctx.category_id}/change/'),
+    ('category-autocomplete', 4, lambda ctx: (
+        '/admin/autocomplete/?app_label=accounts&model_name=product&field_name=category&term=')),
+)
+
+
+class Context:
+    def __init__(self, owner):
+        self.category_id = Category.objects.filter(owner=owner).values_list('id', flat=True).first()
+        self.product_id = Product.objects.filter(owner=owner).values_list('id', flat=True).first()
+
+
+class Command(BaseCommand):
+    help = (
+        "Render the Product and Category admin pages against a temporary tenant of PRODUCTS "
+        "products: latency and query counts per page. Fails when a page exceeds its query "
+        "budget. Removes the tenant and its superuser afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--products', type=int, default=100000)
+        parser.add_argument('--requests', type=int, default=5, help="Requests per page.")
+
+    def handle(self, *args, **options):
+        if options['products'] < CATEGORIES:
+            raise CommandError(f"--products must be at least {CATEGORIES}.")
+        prefix = f'admin-{uuid.uuid4().hex[:8]}'
+        started = time.perf_counter()
+        owner = seed_inventory(1, CATEGORIES, options['products'] // CATEGORIES, prefix=prefix, seed=1)[0]
+        superuser = User.objects.create_superuser(f'{prefix}-admin', password=None)
+        try:
+            with connection.cursor() as cursor:
+                # Refreshes the planner's row estimates.
+                cursor.execute('ANALYZE')
+            self.stdout.write(f"Seeded {options['products']:,} products in {time.perf_counter() - started:.1f}s")
+            estimate = estimated_row_count(Product)
+            if estimate is None or estimate < EstimatedCountPaginator.estimate_threshold:
+                self.stdout.write(f"No row estimate used on {connection.vendor}: unfiltered lists count exactly.")
+            else:
+                self.stdout.write(f"Unfiltered lists use the row estimate: {estimate:,} products.")
+            violations = self.run_pages(Context(owner), superuser, options['requests'])
+        finally:
+            User.objects.filter(username__startswith=f'{prefix}-').delete()
+
+        if violations:
+            for line in violations:
+                self.stderr.write(line)
+            raise CommandError(f"{len(violations)} query budget violation(s).")
+        self.stdout.write(self.style.SUCCESS("All admin pages within their query budgets."))
+
+    def run_pages(self, ctx, superuser, requests):
+        client = Client()
+        client.force_login(superuser)
+        violations = []
+        for name, budget, build in PAGES:
+            path = build(ctx)
+            times, counts = [], []
+            # Warms the per-process caches (content types, templates).
+            client.get(path)
+            for _ in range(requests):
+                with CaptureQueriesContext(connection) as captured:
+                    started = time.perf_counter()
+                    response = client.get(path)
+                    times.append((time.perf_counter() - started) * 1000)
+                if response.status_code != 200:
+                    raise CommandError(f"{name}: GET {path} returned {response.status_code}.")
+                counts.append(len(captured))
+            over = max(counts) > budget
+            style = self.style.ERROR if over else (lambda text: text)
+            self.stdout.write(style(
+                f"  {name:<28} p50 {statistics.median(times):8.1f}ms  queries {max(counts):>3} / {budget}"
+            ))
+            if over:
+                top = '\n'.join(f"      {query['sql'][:160]}" for query in captured.captured_queries[:8])
+                violations.append(f"{name}: {max(counts)} queries, budget {budget}\n{top}")
+        return violations
@@ -0,0 +1,131 @@
+import json
+import statistics
+import time
+import uuid
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+
+from accounts.cache import get_cache
+from accounts.models import Product, User
+from accounts.seeding import seed_inventory
+
+
+CATEGORIES = 5
+# Per workload and copy (see --size).
+OPERATIONS = 7
+
+
+def pos_operations(product_ids, etags, round_number):
+    """What a POS client refreshes at once: categories, a few products, alerts and two stock updates."""
+    return [
+        {'method': 'GET', 'path': '/api/categories/'},
+        *({'method': 'GET', 'path': f'/api/products/{pk}/'} for pk in product_ids[:3]),
+        {'method': 'GET', 'path': '/api/products/alerts/?since=0'},
+        *(
+            {'method': 'PATCH', 'path': f'/api/products/{pk}/', 'body': {'quantity': 50 + round_number % 2}}
+            for pk in product_ids[3:5]
+        ),
+    ]
+
+
+def not_modified_operations(product_ids, etags, round_number):
+    """Revalidations answered 304 after one query: what is left is the per-request overhead."""
+    return [
+        {'method': 'GET', 'path': f'/api/products/{pk}/', 'headers': {'If-None-Match': etags[pk]}}
+        for pk in (product_ids * 2)[:7]
+    ]
+
+
+WORKLOADS = (
+    ('POS refresh', pos_operations),
+    ('304 revalidations', not_modified_operations),
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Time sets of API operations sent as individual requests against the same operations "
+        "in one POST /api/batch/, both in-process through the full middleware stack (network "
+        "round-trips, which the batch also saves, are not included): a POS-style refresh, and "
+        "304 revalidations, which leave little but the per-request overhead. Uses a temporary "
+        "tenant and removes it afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--products', type=int, default=1000)
+        parser.add_argument('--rounds', type=int, default=30)
+        parser.add_argument('--size', type=int, default=1, help="Copies of each workload's 7 operations per round (at most 14).")
+
+    def handle(self, *args, **options):
+        if options['products'] < CATEGORIES * 5:
+            raise CommandError(f"--products must be at least {CATEGORIES * 5}.")
+        if not 1 <= options['size'] <= 14:
+            raise CommandError("--size must be between 1 and 14 (a batch holds up to 100 operations).")
+        prefix = f'batch-{uuid.uuid4().hex[:8]}'
+        owner = seed_inventory(1, CATEGORIES, options['products'] // CATEGORIES, prefix=prefix, seed=1)[0]
+        try:
+            self.compare(owner, options['rounds'], options['size'])
+        finally:
+            User.objects.filter(username__startswith=f'{prefix}-').delete()
+
+    def compare(self, owner, rounds, size):
+        headers = {'Authorization': f'Token {owner.auth_token.key}'}
+        client = Client()
+        product_ids = list(Product.objects.filter(owner=owner).order_by('id').values_list('id', flat=True)[:5])
+
+        def individually(operations):
+            for operation in operations:
+                extra = {
+                    'HTTP_' + name.upper().replace('-', '_'): value
+                    for name, value in operation.get('headers', {}).items()
+                }
+                if operation['method'] == 'GET':
+                    response = client.get(operation['path'], headers=headers, **extra)
+                else:
+                    response = client.generic(
+                        operation['method'], operation['path'], json.dumps(operation['body']),
+                        'application/json', headers=headers, **extra,
+                    )
+                if response.status_code >= 400:
+                    raise CommandError(f"{operation['method']} {operation['path']} returned {response.status_code}.")
+
+        def batched(operations, atomic):
+            response = client.post(
+                '/api/batch/', data=json.dumps({'operations': operations, 'atomic': atomic}),
+                content_type='application/json', headers=headers,
+            )
+            failed = [result['status'] for result in response.json()['results'] if result['status'] >= 400]
+            if response.status_code != 200 or failed:
+                raise CommandError(f"Batch returned {response.status_code} {failed}.")
+
+        modes = (
+            ('individual requests', individually),
+            ('batch', lambda operations: batched(operations, False)),
+            ('batch, atomic', lambda operations: batched(operations, True)),
+        )
+        cache = get_cache()
+        for workload, build in WORKLOADS:
+            count = OPERATIONS * size
+            self.stdout.write(f"{workload}: {count} operations per round, {rounds} rounds, response cache cleared")
+            results = {}
+            for name, run in modes:
+                times, queries = [], []
+                for round_number in range(rounds):
+                    cache.clear()
+                    etags = {pk: client.get(f'/api/products/{pk}/', headers=headers)['ETag'] for pk in product_ids}
+                    operations = build(product_ids, etags, round_number) * size
+                    with CaptureQueriesContext(connection) as captured:
+                        started = time.perf_counter()
+                        run(operations)
+                        times.append((time.perf_counter() - started) * 1000)
+                    queries.append(len(captured))
+                results[name] = statistics.median(times)
+                self.stdout.write(
+                    f"  {name:<20} p50 {results[name]:7.1f}ms  {results[name] / count:5.2f}ms/operation  "
+                    f"{statistics.median(queries):4.0f} queries"
+                )
+            saved = (results['individual requests'] - results['batch']) / count
+            self.stdout.write(f"  batching saves {saved:.2f}ms per operation")
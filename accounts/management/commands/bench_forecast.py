@@ -0,0 +1,109 @@
+import math
+import random
+import time
+import uuid
+from datetime import timedelta
+
+import numpy as np
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from accounts import forecasting
+from accounts.models import Product, StockMovement, User
+from accounts.seeding import seed_inventory
+
+
+CATEGORIES = 10
+
+
+def project_loop(quantity, min_threshold, consumed, observed_days, lead_time_days, cover_days):
+    """``forecasting.project`` one product at a time, as plain Python would."""
+    rates, days, suggestions = [], [], []
+    for on_hand, threshold, used, observed in zip(quantity, min_threshold, consumed, observed_days):
+        rate = used / observed
+        reorder_point = threshold + rate * lead_time_days
+        rates.append(rate)
+        days.append(on_hand / rate if rate > 0 else math.nan)
+        suggestions.append(
+            math.ceil(max(reorder_point + rate * cover_days - on_hand, 0)) if on_hand <= reorder_point else 0
+        )
+    return rates, days, suggestions
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a temporary tenant with PRODUCTS products and a month of consumption, then time "
+        "the vectorized forecast against a per-product loop, and the whole uncached computation "
+        "behind /api/products/forecast/. Removes the tenant afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--products', type=int, default=100000)
+        parser.add_argument('--consuming', type=float, default=0.5, help="Share of products with consumption.")
+        parser.add_argument('--repeat', type=int, default=3, help="Best of N runs.")
+
+    def handle(self, *args, **options):
+        if options['products'] < CATEGORIES:
+            raise CommandError(f"--products must be at least {CATEGORIES}.")
+        prefix = f'forecast-{uuid.uuid4().hex[:8]}'
+        started = time.perf_counter()
+        owner = seed_inventory(1, CATEGORIES, options['products'] // CATEGORIES, prefix=prefix, seed=1)[0]
+        try:
+            self.add_consumption(owner, options['consuming'])
+            self.stdout.write(f"Seeded {options['products']:,} products in {time.perf_counter() - started:.1f}s")
+            self.compare(owner, options['repeat'])
+        finally:
+            User.objects.filter(username__startswith=f'{prefix}-').delete()
+
+    def add_consumption(self, owner, share):
+        # An established catalog: 2% of products were added within the window.
+        now = timezone.now()
+        products = Product.objects.filter(owner=owner)
+        products.update(created_at=now - timedelta(days=180))
+        recent = products.order_by('-id').values_list('id', flat=True)[:products.count() // 50]
+        Product.objects.filter(id__in=list(recent)).update(created_at=now - timedelta(days=3))
+
+        rng = random.Random(1)
+        entries = [
+            StockMovement(
+                owner=owner, category_id=category_id, product_id=pk, reason=StockMovement.ADJUSTED,
+                quantity_delta=-rng.randint(1, 20), value_delta=0, low_stock_delta=0,
+            )
+            for pk, category_id in Product.objects.filter(owner=owner).values_list('id', 'category_id')
+            for _ in range(3)
+            if rng.random() < share
+        ]
+        StockMovement.objects.bulk_create(entries, batch_size=5000)
+
+    def compare(self, owner, repeat):
+        now = timezone.now()
+        window = getattr(settings, 'FORECAST_WINDOW_DAYS', forecasting.DEFAULT_WINDOW_DAYS)
+        load_time = min(self.timed(lambda: forecasting.load(owner, now, window)) for _ in range(repeat))
+        _, quantity, min_threshold, consumed, observed_days = forecasting.load(owner, now, window)
+        args = (quantity, min_threshold, consumed, observed_days,
+                forecasting.DEFAULT_LEAD_TIME_DAYS, forecasting.DEFAULT_COVER_DAYS)
+
+        vectorized = forecasting.project(*args)
+        # The loop gets plain lists, not arrays, to be fair to it.
+        plain = [column.tolist() if isinstance(column, np.ndarray) else column for column in args]
+        looped = project_loop(*plain)
+        for name, fast, slow in zip(('rate', 'days to stockout', 'reorder'), vectorized, looped):
+            if not np.allclose(fast, np.array(slow, dtype=np.float64), equal_nan=True):
+                raise CommandError(f"Vectorized and looped {name} differ.")
+
+        vector_time = min(self.timed(lambda: forecasting.project(*args)) for _ in range(repeat))
+        loop_time = min(self.timed(lambda: project_loop(*plain)) for _ in range(repeat))
+        self.stdout.write(f"{'load (3 queries)':<26} {load_time * 1000:8.1f}ms")
+        self.stdout.write(f"{'forecast, NumPy':<26} {vector_time * 1000:8.1f}ms")
+        self.stdout.write(f"{'forecast, Python loop':<26} {loop_time * 1000:8.1f}ms  ({loop_time / vector_time:.0f}x slower)")
+
+        compute_time = min(self.timed(lambda: forecasting.compute(owner)) for _ in range(repeat))
+        kept = len(forecasting.compute(owner)['product_id'])
+        self.stdout.write(f"{'load, forecast and sort':<26} {compute_time * 1000:8.1f}ms  ({kept:,} products listed)")
+
+    @staticmethod
+    def timed(run):
+        started = time.perf_counter()
+        run()
+        return time.perf_counter() - started
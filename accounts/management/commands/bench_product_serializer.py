@@ -0,0 +1,81 @@
+import time
+import uuid
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db.models import BooleanField, Case, When
+from django.utils import timezone
+
+from accounts.models import Category, Product, User
+from accounts.serializers import ProductReadSerializer, ProductSerializer
+
+
+PRICES = (Decimal('0.00'), Decimal('0.10'), Decimal('1.50'), Decimal('10.00'), Decimal('99999999.99'))
+NAMES = ('Milk', 'Café crème', 'Ünïcode "quoted" name', 'x' * 200)
+
+
+class Command(BaseCommand):
+    help = (
+        "Report rows/sec for ProductSerializer and ProductReadSerializer; their "
+        "parity is covered by accounts.tests. Creates a temporary user and "
+        "removes it afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=5000)
+        parser.add_argument('--repeat', type=int, default=5, help="Best of N runs.")
+
+    def handle(self, *args, **options):
+        username = f'serializer-bench-{uuid.uuid4().hex[:8]}'
+        user = User.objects.create(username=username)
+        try:
+            self.seed(user, options['rows'])
+            queryset = self.queryset(user)
+            self.benchmark(queryset, options['repeat'])
+        finally:
+            User.objects.filter(username=username).delete()
+
+    def seed(self, user, count):
+        categories = [Category.objects.create(owner=user, name=f'Bench {n}') for n in range(3)]
+        today = timezone.now().date()
+        expirations = (None, today - timedelta(days=3), today, today + timedelta(days=30))
+        Product.objects.bulk_create([
+            Product(
+                owner=user,
+                category=categories[n % len(categories)],
+                name=NAMES[n % len(NAMES)],
+                price=PRICES[n % len(PRICES)],
+                quantity=n % 25,
+                min_threshold=n % 11,
+                expiration_date=expirations[n % len(expirations)],
+            )
+            for n in range(count)
+        ], batch_size=1000)
+
+    def queryset(self, user):
+        # Same annotation as the product views.
+        today = timezone.now().date()
+        return Product.objects.filter(owner=user).annotate(
+            has_expiry=Case(When(expiration_date__lte=today, then=True), default=False, output_field=BooleanField())
+        ).order_by('-created_at', '-id')
+
+    def benchmark(self, queryset, repeat):
+        count = queryset.count()
+        instances = list(queryset)
+        rows = list(ProductReadSerializer.rows(queryset))
+        scenarios = (
+            ('ProductSerializer, query + serialize', lambda: ProductSerializer(queryset.all(), many=True).data),
+            ('ProductReadSerializer, query + serialize', lambda: ProductReadSerializer(queryset.all()).data),
+            ('ProductSerializer, serialize only', lambda: ProductSerializer(instances, many=True).data),
+            ('ProductReadSerializer, serialize only', lambda: ProductReadSerializer(rows).data),
+        )
+        for label, run in scenarios:
+            best = min(self.timed(run) for _ in range(repeat))
+            self.stdout.write(f"{label:<42} {count / best:>12,.0f} rows/sec")
+
+    @staticmethod
+    def timed(run):
+        started = time.perf_counter()
+        run()
+        return time.perf_counter() - started
@@ -0,0 +1,65 @@
+import time
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.text import compress_string
+from rest_framework.renderers import JSONRenderer
+
+from accounts.renderers import FastJSONRenderer, orjson
+from accounts.serializers import ProductReadSerializer
+
+
+class Command(BaseCommand):
+    help = (
+        "Render a synthetic alerts payload with JSONRenderer and FastJSONRenderer; "
+        "report render time and bytes on the wire with and without gzip."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--items', type=int, default=10000)
+        parser.add_argument('--repeat', type=int, default=5, help="Best of N runs.")
+
+    def handle(self, *args, **options):
+        payload = self.alerts_payload(options['items'])
+        stock = JSONRenderer().render(payload)
+        fast = FastJSONRenderer().render(payload)
+        if stock != fast:
+            raise CommandError("FastJSONRenderer output differs from JSONRenderer.")
+
+        self.stdout.write(f"{options['items']} alert items; orjson {'installed' if orjson else 'NOT installed (fallback)'}")
+        for label, renderer in (('JSONRenderer', JSONRenderer()), ('FastJSONRenderer', FastJSONRenderer())):
+            best = min(self.timed(lambda: renderer.render(payload)) for _ in range(options['repeat']))
+            self.stdout.write(f"{label:<18} render {best * 1000:8.1f}ms")
+
+        compressed = compress_string(stock)
+        gzip_time = min(self.timed(lambda: compress_string(stock)) for _ in range(options['repeat']))
+        self.stdout.write(f"bytes: {len(stock):,} raw, {len(compressed):,} gzipped "
+                          f"({len(compressed) / len(stock):.0%}, {gzip_time * 1000:.1f}ms to compress)")
+
+    def alerts_payload(self, items):
+        today = date.today()
+        created = datetime(2026, 1, 1, 8, 30, tzinfo=dt_timezone.utc)
+        rows = [
+            {
+                'id': n,
+                'name': f'Product {n}',
+                'price': Decimal(n % 5000) / 4,
+                'quantity': n % 7,
+                'min_threshold': 10,
+                'expiration_date': today - timedelta(days=n % 30) if n % 3 else None,
+                'category_id': n % 40,
+                'is_low_stock': True,
+                'has_expiry': n % 3 != 0,
+                'created_at': created + timedelta(seconds=n),
+            }
+            for n in range(items)
+        ]
+        serialized = [ProductReadSerializer.to_representation(row, dt_timezone.utc) for row in rows]
+        return {"low_stock": serialized, "expired": serialized[::3]}
+
+    @staticmethod
+    def timed(run):
+        started = time.perf_counter()
+        run()
+        return time.perf_counter() - started
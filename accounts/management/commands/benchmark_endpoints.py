@@ -0,0 +1,289 @@
+import asyncio
+import json
+import statistics
+import threading
+import time
+import uuid
+from base64 import urlsafe_b64encode
+from collections import Counter
+from dataclasses import dataclass
+from typing import Callable
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.test import AsyncClient, Client
+
+from accounts.authentication import token_cache
+from accounts.cache import get_cache
+from accounts.models import Category, Product, User
+from accounts.seeding import seed_inventory
+
+
+CATEGORIES_PER_TENANT = 10
+
+
+@dataclass
+class Scenario:
+    """One request against a route. ``build(ctx)`` returns ``(method, path, kwargs)``; it runs uncounted."""
+    name: str
+    budget: int
+    build: Callable
+    is_async: bool = False
+
+
+async def _async_request(method, path, headers, kwargs):
+    response = await getattr(AsyncClient(), method)(path, headers=headers, **kwargs)
+    if response.streaming:
+        # Async streams can only be read in the loop that served them.
+        [chunk async for chunk in response.streaming_content]
+    return response
+
+
+def _csv_body(ctx, rows):
+    lines = ['name,price,quantity,min_threshold,expiration_date,category']
+    lines += [f'Imported {n},2.50,{n % 30},10,,{ctx.category_id}' for n in range(rows)]
+    return '\n'.join(lines)
+
+
+def _new_category(ctx):
+    return Category.objects.create(owner=ctx.user, name='Scratch').pk
+
+
+def _new_product(ctx):
+    return Product.objects.create(category_id=ctx.category_id, name='Scratch', price='1.00', quantity=5, min_threshold=2).pk
+
+
+def _deep_cursor(ctx):
+    # The keyset equivalent of the last page-number page.
+    row = Product.objects.filter(owner=ctx.user).order_by('-created_at', '-id').values('id', 'created_at')[ctx.size - 20]
+    token = {'o': '-created_at', 'p': row['created_at'].isoformat(), 'i': row['id'], 'r': 0}
+    return urlsafe_b64encode(json.dumps(token, separators=(',', ':')).encode()).decode()
+
+
+def _etag(ctx, path):
+    return Client().get(path, headers={'Authorization': f'Token {ctx.token}'})['ETag']
+
+
+# Budgets are for a cold request (response and token caches empty) and must
+# not depend on the catalog size: growth with the data is an N+1.
+SCENARIOS = (
+    Scenario('register', 4, lambda ctx: ('post', '/api/register/', {'data': {
+        'username': f'{ctx.user.username}-{uuid.uuid4().hex[:8]}', 'password': 'bench-password-123'}, 'auth': False})),
+    Scenario('login', 3, lambda ctx: ('post', '/api/login/', {'data': {
+        'username': ctx.user.username, 'password': ctx.password}, 'auth': False})),
+    Scenario('category-list', 4, lambda ctx: ('get', '/api/categories/', {})),
+    Scenario('category-create', 8, lambda ctx: ('post', '/api/categories/', {'data': {'name': 'Bench'}})),
+    Scenario('category-detail', 2, lambda ctx: ('get', f'/api/categories/{ctx.category_id}/', {})),
+    Scenario('category-update', 6, lambda ctx: ('patch', f'/api/categories/{ctx.category_id}/', {
+        'data': {'description': 'updated'}, 'content_type': 'application/json'})),
+    Scenario('category-delete', 16, lambda ctx: ('delete', f'/api/categories/{_new_category(ctx)}/', {})),
+    Scenario('product-list', 4, lambda ctx: ('get', '/api/products/', {})),
+    Scenario('product-list-deep-page', 4, lambda ctx: ('get', f'/api/products/?page={ctx.size // 20}&page_size=20', {})),
+    Scenario('product-list-cursor', 3, lambda ctx: ('get', '/api/products/?cursor=&page_size=20', {})),
+    Scenario('product-list-deep-cursor', 3, lambda ctx: ('get', f'/api/products/?page_size=20&cursor={_deep_cursor(ctx)}', {})),
+    Scenario('product-list-not-modified', 2, lambda ctx: ('get', '/api/products/', {
+        'HTTP_IF_NONE_MATCH': _etag(ctx, '/api/products/')})),
+    Scenario('product-search', 4, lambda ctx: ('get', '/api/products/?search=coffee', {})),
+    Scenario('product-create', 10, lambda ctx: ('post', '/api/products/', {'data': {
+        'name': 'Bench', 'price': '3.00', 'quantity': 2, 'min_threshold': 5, 'category': ctx.category_id}})),
+    Scenario('product-detail', 3, lambda ctx: ('get', f'/api/products/{ctx.product_id}/', {})),
+    Scenario('product-update', 11, lambda ctx: ('patch', f'/api/products/{ctx.product_id}/', {
+        'data': {'quantity': ctx.next_quantity()}, 'content_type': 'application/json'})),
+    Scenario('product-delete', 10, lambda ctx: ('delete', f'/api/products/{_new_product(ctx)}/', {})),
+    Scenario('product-export', 2, lambda ctx: ('get', '/api/products/export/?format=ndjson', {})),
+    Scenario('product-export-asgi', 2, lambda ctx: ('get', '/api/products/export/?format=ndjson', {}), is_async=True),
+    Scenario('product-import-100', 12, lambda ctx: ('post', '/api/products/import/', {
+        'data': _csv_body(ctx, 100), 'content_type': 'text/csv'})),
+    Scenario('product-stock-50', 12, lambda ctx: ('post', '/api/products/stock/', {'data': {'movements': [
+        {'product_id': pk, 'delta': 1} for pk in ctx.product_ids[:50]]}, 'content_type': 'application/json'})),
+    Scenario('product-forecast', 6, lambda ctx: ('get', '/api/products/forecast/?reorder=true', {})),
+    Scenario('product-alerts', 5, lambda ctx: ('get', '/api/products/alerts/', {})),
+    Scenario('product-alerts-feed', 2, lambda ctx: ('get', '/api/products/alerts/?since=0', {})),
+    Scenario('dashboard', 4, lambda ctx: ('get', '/api/dashboard/', {})),
+    Scenario('dashboard-not-modified', 2, lambda ctx: ('get', '/api/dashboard/', {
+        'HTTP_IF_NONE_MATCH': _etag(ctx, '/api/dashboard/')})),
+    Scenario('dashboard-history', 4, lambda ctx: ('get', '/api/dashboard/history/?from=2026-01-01&to=2026-03-31', {})),
+    Scenario('batch-5', 23, lambda ctx: ('post', '/api/batch/', {'data': {'operations': [
+        {'method': 'GET', 'path': '/api/categories/'},
+        {'method': 'GET', 'path': f'/api/products/{ctx.product_id}/'},
+        {'method': 'GET', 'path': '/api/products/alerts/'},
+        {'method': 'GET', 'path': '/api/dashboard/'},
+        {'method': 'PATCH', 'path': f'/api/products/{ctx.product_id}/', 'body': {'quantity': ctx.next_quantity()}},
+    ]}, 'content_type': 'application/json'})),
+    Scenario('async-product-alerts', 5, lambda ctx: ('get', '/api/async/products/alerts/', {}), is_async=True),
+    Scenario('async-dashboard', 4, lambda ctx: ('get', '/api/async/dashboard/', {}), is_async=True),
+    # /api/events/ never ends; see the loadtest_event_stream command.
+)
+
+
+class QueryCounter:
+    """Counts queries on every connection, including async views' pool threads."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.statements = Counter()
+        self.active = False
+
+    def __call__(self, execute, sql, params, many, context):
+        if self.active:
+            with self.lock:
+                self.statements[sql] += 1
+        return execute(sql, params, many, context)
+
+    def install(self, connection, **kwargs):
+        if self not in connection.execute_wrappers:
+            connection.execute_wrappers.append(self)
+
+    def __enter__(self):
+        for connection in connections.all():
+            self.install(connection)
+        connection_created.connect(self.install, dispatch_uid='benchmark-query-counter', weak=False)
+        return self
+
+    def __exit__(self, *exc):
+        connection_created.disconnect(dispatch_uid='benchmark-query-counter')
+        for connection in connections.all():
+            if self in connection.execute_wrappers:
+                connection.execute_wrappers.remove(self)
+
+    def start(self):
+        self.statements.clear()
+        self.active = True
+
+    def stop(self):
+        self.active = False
+        return sum(self.statements.values())
+
+
+class Tenant:
+    def __init__(self, user, password, size):
+        self.user = user
+        self.password = password
+        self.size = size
+        self.token = user.auth_token.key
+        self.category_id = Category.objects.filter(owner=user).values_list('id', flat=True).first()
+        self.product_ids = list(Product.objects.filter(owner=user).order_by('id').values_list('id', flat=True)[:200])
+        self.product_id = self.product_ids[0]
+        self._quantity = 0
+
+    def next_quantity(self):
+        self._quantity += 1
+        return self._quantity
+
+
+def _percentile(values, percent):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * percent / 100))]
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark every route in accounts/urls.py at several catalog sizes: p50/p95 "
+        "latency and query counts per request (cold caches). Fails when a route exceeds "
+        "its query budget. Seeds a temporary tenant per size and removes it afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='100,1000,10000', help="Comma-separated product counts per tenant.")
+        parser.add_argument('--requests', type=int, default=10, help="Requests per route and size.")
+        parser.add_argument('--only', help="Comma-separated scenario names.")
+        parser.add_argument('--import-rows', type=int, default=2000,
+                            help="Rows for the import vs per-row create throughput comparison (0 to skip).")
+
+    def handle(self, *args, **options):
+        try:
+            sizes = [int(size) for size in options['sizes'].split(',')]
+        except ValueError:
+            raise CommandError("--sizes must be comma-separated integers.")
+        scenarios = SCENARIOS
+        if options['only']:
+            names = set(options['only'].split(','))
+            scenarios = [scenario for scenario in SCENARIOS if scenario.name in names]
+            if not scenarios:
+                raise CommandError(f"No scenario named {options['only']}.")
+
+        violations = []
+        with QueryCounter() as counter:
+            for size in sizes:
+                if size < max(CATEGORIES_PER_TENANT, 40):
+                    raise CommandError("Sizes must be at least 40 products.")
+                prefix = f'bench-{uuid.uuid4().hex[:8]}'
+                password = uuid.uuid4().hex
+                started = time.perf_counter()
+                users = seed_inventory(1, CATEGORIES_PER_TENANT, size // CATEGORIES_PER_TENANT,
+                                       prefix=prefix, password=password, seed=size)
+                self.stdout.write(self.style.MIGRATE_HEADING(
+                    f"\n{size} products (seeded in {time.perf_counter() - started:.1f}s)"
+                ))
+                try:
+                    tenant = Tenant(users[0], password, size)
+                    for scenario in scenarios:
+                        violations += self.run_scenario(scenario, tenant, counter, options['requests'])
+                    if options['import_rows']:
+                        self.compare_import(tenant, options['import_rows'])
+                finally:
+                    # Also removes the users created by the register scenario.
+                    User.objects.filter(username__startswith=f'{prefix}-').delete()
+
+        if violations:
+            for line in violations:
+                self.stderr.write(line)
+            raise CommandError(f"{len(violations)} query budget violation(s).")
+        self.stdout.write(self.style.SUCCESS("\nAll routes within their query budgets."))
+
+    def run_scenario(self, scenario, tenant, counter, requests):
+        times, counts, worst = [], [], Counter()
+        for _ in range(requests):
+            method, path, kwargs = scenario.build(tenant)
+            headers = {} if not kwargs.pop('auth', True) else {'Authorization': f'Token {tenant.token}'}
+            get_cache().clear()
+            token_cache.clear()
+
+            counter.start()
+            started = time.perf_counter()
+            if scenario.is_async:
+                response = asyncio.run(_async_request(method, path, headers, kwargs))
+            else:
+                response = getattr(Client(), method)(path, headers=headers, **kwargs)
+                if response.streaming:
+                    b''.join(response.streaming_content)
+            elapsed = time.perf_counter() - started
+            count = counter.stop()
+
+            if response.status_code >= 400 or ('HTTP_IF_NONE_MATCH' in kwargs and response.status_code != 304):
+                raise CommandError(f"{scenario.name}: {method.upper()} {path} returned {response.status_code}.")
+            times.append(elapsed * 1000)
+            counts.append(count)
+            if count >= sum(worst.values()):
+                worst = Counter(counter.statements)
+
+        over = max(counts) > scenario.budget
+        style = self.style.ERROR if over else (lambda text: text)
+        self.stdout.write(style(
+            f"  {scenario.name:<26} p50 {statistics.median(times):8.1f}ms  p95 {_percentile(times, 95):8.1f}ms  "
+            f"queries {max(counts):>3} / {scenario.budget}"
+        ))
+        if not over:
+            return []
+        top = '\n'.join(f"      {n}x {sql[:160]}" for sql, n in worst.most_common(5))
+        return [f"{scenario.name} at {tenant.size} products: {max(counts)} queries, budget {scenario.budget}\n{top}"]
+
+    def compare_import(self, tenant, rows):
+        headers = {'Authorization': f'Token {tenant.token}'}
+        client = Client()
+        started = time.perf_counter()
+        response = client.post('/api/products/import/', _csv_body(tenant, rows), content_type='text/csv', headers=headers)
+        bulk = rows / (time.perf_counter() - started)
+        if response.status_code != 201:
+            raise CommandError(f"Import returned {response.status_code}.")
+
+        single_rows = max(1, rows // 10)
+        started = time.perf_counter()
+        for n in range(single_rows):
+            client.post('/api/products/', {
+                'name': f'Single {n}', 'price': '2.50', 'quantity': n % 30, 'min_threshold': 10,
+                'category': tenant.category_id,
+            }, headers=headers)
+        single = single_rows / (time.perf_counter() - started)
+        self.stdout.write(f"  {'import vs per-row create':<26} {bulk:,.0f} rows/sec bulk, {single:,.0f} rows/sec per-row POST")
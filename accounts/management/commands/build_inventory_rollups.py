@@ -0,0 +1,31 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from accounts import ledger
+
+
+class Command(BaseCommand):
+    help = (
+        "Fold new stock ledger entries into the daily per-category rollups read by "
+        "/api/dashboard/history/. Incremental; run hourly or at least daily, one instance at a time."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--since', help="Rebuild from this date (YYYY-MM-DD) instead of the last days built.")
+
+    def handle(self, *args, **options):
+        since = None
+        if options['since']:
+            try:
+                since = parse_date(options['since'])
+            except ValueError:
+                since = None
+            if since is None:
+                raise CommandError("--since must be a date (YYYY-MM-DD).")
+        started = time.perf_counter()
+        count = ledger.build_rollups(since)
+        self.stdout.write(self.style.SUCCESS(
+            f"Wrote {count} rollup rows in {time.perf_counter() - started:.1f}s."
+        ))
@@ -0,0 +1,115 @@
+import asyncio
+import statistics
+import time
+import uuid
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.test import AsyncClient, Client
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+
+from accounts.cache import get_cache
+from accounts.models import Category, Product, User
+
+
+ROUTES = (
+    ('dashboard', '/api/dashboard/', '/api/async/dashboard/'),
+    ('alerts', '/api/products/alerts/', '/api/async/products/alerts/'),
+)
+
+
+def _percentile(values, percent):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * percent / 100))]
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the sync and async dashboard/alerts views against a database with "
+        "simulated round-trip latency. Responses are uncached (the cache is cleared "
+        "before every request). Creates a temporary user and removes it afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--latency-ms', type=float, default=10, help="Added to every query.")
+        parser.add_argument('--requests', type=int, default=30, help="Requests per route and mode.")
+        parser.add_argument('--products', type=int, default=200)
+
+    def handle(self, *args, **options):
+        username = f'async-bench-{uuid.uuid4().hex[:8]}'
+        user = User.objects.create(username=username)
+        try:
+            token = Token.objects.create(user=user)
+            self.seed(user, options['products'])
+            self.simulate_latency(options['latency_ms'] / 1000)
+            self.compare(token.key, options)
+        finally:
+            self.simulate_latency(None)
+            User.objects.filter(username=username).delete()
+
+    def seed(self, user, count):
+        category = Category.objects.create(owner=user, name='Bench')
+        today = timezone.now().date()
+        for n in range(count):
+            Product.objects.create(
+                category=category, name=f'Item {n}', price=Decimal('1.50'),
+                quantity=n % 20, min_threshold=5,
+                expiration_date=today - timedelta(days=1) if n % 7 == 0 else None,
+            )
+
+    def simulate_latency(self, seconds):
+        def delay(execute, sql, params, many, context):
+            time.sleep(seconds)
+            return execute(sql, params, many, context)
+
+        def install(connection, **kwargs):
+            connection.execute_wrappers[:] = [w for w in connection.execute_wrappers if not getattr(w, 'simulated', False)]
+            if seconds is not None:
+                connection.execute_wrappers.append(delay)
+
+        delay.simulated = True
+        # Connections opened later, e.g. by the async views' pool threads.
+        connection_created.disconnect(dispatch_uid='simulated-latency')
+        if seconds is not None:
+            connection_created.connect(install, dispatch_uid='simulated-latency', weak=False)
+        for connection in connections.all():
+            install(connection)
+
+    def compare(self, key, options):
+        headers = {'Authorization': f'Token {key}'}
+        sync_client, async_client = Client(), AsyncClient()
+        cache = get_cache()
+
+        async def timed_async(path):
+            cache.clear()
+            started = time.perf_counter()
+            response = await async_client.get(path, headers=headers)
+            return (time.perf_counter() - started) * 1000, response.status_code
+
+        self.stdout.write(f"simulated latency: {options['latency_ms']}ms per query")
+        for name, sync_path, async_path in ROUTES:
+            sync_times, async_times = [], []
+            sync_client.get(sync_path, headers=headers)
+            asyncio.run(timed_async(async_path))
+            for _ in range(options['requests']):
+                cache.clear()
+                started = time.perf_counter()
+                response = sync_client.get(sync_path, headers=headers)
+                sync_times.append((time.perf_counter() - started) * 1000)
+                if response.status_code != 200:
+                    raise CommandError(f"{sync_path} returned {response.status_code}.")
+
+                elapsed, status = asyncio.run(timed_async(async_path))
+                async_times.append(elapsed)
+                if status != 200:
+                    raise CommandError(f"{async_path} returned {status}.")
+
+            for mode, times in (('sync', sync_times), ('async', async_times)):
+                self.stdout.write(
+                    f"{name:<10} {mode:<6} p50 {statistics.median(times):7.1f}ms  "
+                    f"p95 {_percentile(times, 95):7.1f}ms"
+                )
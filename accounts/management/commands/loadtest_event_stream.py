@@ -0,0 +1,144 @@
+import asyncio
+import resource
+import statistics
+import time
+import uuid
+
+from asgiref.sync import sync_to_async
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.authtoken.models import Token
+
+from accounts.events import get_broker
+from accounts.models import User
+
+
+class StreamClient:
+    """One SSE connection driven straight through the ASGI application."""
+
+    def __init__(self, app, token):
+        self.app = app
+        self.token = token
+        self.status = None
+        self.connected = asyncio.Event()
+        self.closed = asyncio.Event()
+        self.received = {}
+        self._requested = False
+
+    async def run(self):
+        scope = {
+            'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1',
+            'method': 'GET', 'scheme': 'http', 'path': '/api/events/', 'raw_path': b'/api/events/',
+            'query_string': f'token={self.token}'.encode(), 'root_path': '',
+            'headers': [(b'host', b'testserver'), (b'accept', b'text/event-stream')],
+            'client': ('127.0.0.1', 0), 'server': ('testserver', 80),
+        }
+        await self.app(scope, self.receive, self.send)
+
+    async def receive(self):
+        if not self._requested:
+            self._requested = True
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+        await self.closed.wait()
+        return {'type': 'http.disconnect'}
+
+    async def send(self, message):
+        if message['type'] == 'http.response.start':
+            self.status = message['status']
+            if self.status != 200:
+                self.connected.set()
+            return
+        now = time.perf_counter()
+        for line in message.get('body', b'').decode().splitlines():
+            if line.startswith('retry:'):
+                self.connected.set()
+            elif line.startswith('id:'):
+                self.received[int(line[3:])] = now
+
+
+def _percentile(values, percent):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * percent / 100))]
+
+
+class Command(BaseCommand):
+    help = (
+        "Open many idle SSE connections against the ASGI app in this process, publish "
+        "events through the configured broker and report connect time, memory and "
+        "delivery latency. Creates temporary users and removes them afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clients', type=int, default=2000, help="Concurrent connections.")
+        parser.add_argument('--users', type=int, default=10, help="Users the connections are spread over.")
+        parser.add_argument('--events', type=int, default=20, help="Events published to each user.")
+        parser.add_argument('--idle', type=float, default=1.0, help="Seconds to hold the connections idle.")
+
+    def handle(self, *args, **options):
+        if options['clients'] < 1 or options['users'] < 1:
+            raise CommandError("--clients and --users must be positive.")
+        prefix = f'sse-loadtest-{uuid.uuid4().hex[:8]}'
+        users = [User.objects.create(username=f'{prefix}-{n}') for n in range(options['users'])]
+        try:
+            tokens = [Token.objects.create(user=user) for user in users]
+            asyncio.run(self.run(tokens, options))
+        finally:
+            User.objects.filter(username__startswith=prefix).delete()
+
+    async def run(self, tokens, options):
+        from config.asgi import application
+
+        broker = get_broker()
+        rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        started = time.perf_counter()
+        clients = [
+            StreamClient(application, tokens[n % len(tokens)].key) for n in range(options['clients'])
+        ]
+        tasks = [asyncio.create_task(client.run()) for client in clients]
+        await asyncio.gather(*(client.connected.wait() for client in clients))
+        connect_time = time.perf_counter() - started
+        failed = sum(client.status != 200 for client in clients)
+        if failed:
+            raise CommandError(f"{failed} connections were refused.")
+        await asyncio.sleep(options['idle'])
+        rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+        published = {}
+        for event_id in range(1, options['events'] + 1):
+            for token in tokens:
+                # Publish from a worker thread, like a sync request would.
+                published[token.key, event_id] = time.perf_counter()
+                await sync_to_async(broker.publish, thread_sensitive=False)(
+                    token.user_id, {'event': 'alert', 'id': event_id, 'data': {'loadtest': True}}
+                )
+            await asyncio.sleep(0)
+        deadline = time.perf_counter() + 10
+        while time.perf_counter() < deadline and any(
+            len(client.received) < options['events'] for client in clients
+        ):
+            await asyncio.sleep(0.05)
+
+        latencies = [
+            (received - published[client.token, event_id]) * 1000
+            for client in clients for event_id, received in client.received.items()
+        ]
+        missing = options['events'] * len(clients) - len(latencies)
+
+        for client in clients:
+            client.closed.set()
+        await asyncio.wait_for(asyncio.gather(*tasks, return_exceptions=True), 30)
+        leaked = broker.subscriber_count()
+
+        self.stdout.write(f"connections:        {len(clients)} over {len(tokens)} users")
+        self.stdout.write(f"connect time:       {connect_time:.2f}s")
+        self.stdout.write(f"peak RSS growth:    {(rss_after - rss_before) / 1024:.1f} MiB "
+                          f"(~{(rss_after - rss_before) / len(clients):.1f} KiB per connection)")
+        if latencies:
+            self.stdout.write(
+                f"delivery latency:   p50 {statistics.median(latencies):.1f}ms, "
+                f"p95 {_percentile(latencies, 95):.1f}ms, max {max(latencies):.1f}ms"
+            )
+        self.stdout.write(f"events delivered:   {len(latencies)} ({missing} missing)")
+        self.stdout.write(f"subscribers left:   {leaked}")
+        if missing or leaked:
+            raise CommandError("Load test failed: events were lost or subscriptions leaked.")
+        self.stdout.write(self.style.SUCCESS("Load test passed."))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from accounts import purge
+
+
+class Command(BaseCommand):
+    help = (
+        "Finish purging soft-deleted categories whose background purge did not complete "
+        "(server restart, CATEGORY_PURGE_IN_BACKGROUND off). Run periodically, one instance at a time."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, help="Products deleted per statement.")
+
+    def handle(self, *args, **options):
+        count = purge.purge_pending(options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Purged {count} categories."))
@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts import summary
+from accounts.models import Category
+
+
+class Command(BaseCommand):
+    help = "Rebuild (or with --verify, check) the per-category inventory summaries."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', help="Only process categories owned by this username.")
+        parser.add_argument('--verify', action='store_true', help="Report mismatches without writing.")
+
+    def handle(self, *args, **options):
+        categories = Category.objects.order_by('id')
+        if options['user']:
+            categories = categories.filter(owner__username=options['user'])
+
+        if options['verify']:
+            mismatches = 0
+            for stored, expected in summary.verify(categories):
+                mismatches += 1
+                if stored is None:
+                    self.stdout.write(f"category {expected.category_id}: missing summary")
+                    continue
+                diffs = ", ".join(
+                    f"{field} {getattr(stored, field)} != {getattr(expected, field)}"
+                    for field in summary.SUMMARY_FIELDS
+                    if getattr(stored, field) != getattr(expected, field)
+                )
+                self.stdout.write(f"category {expected.category_id}: {diffs}")
+            if mismatches:
+                raise CommandError(f"{mismatches} summaries out of date; run without --verify to rebuild.")
+            self.stdout.write(self.style.SUCCESS("All summaries match."))
+            return
+
+        count = summary.rebuild(categories)
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {count} summaries."))
@@ -0,0 +1,29 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from accounts import summary
+from accounts.models import AlertEvent
+
+
+class Command(BaseCommand):
+    help = (
+        "Roll the expired_* summary figures forward to today and raise expiry alerts "
+        "for products that crossed their date. Run daily, after midnight."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--prune-alerts-days', type=int,
+            help="Also delete alert events older than this many days.",
+        )
+
+    def handle(self, *args, **options):
+        count = summary.rollover_expiry()
+        self.stdout.write(self.style.SUCCESS(f"Rolled over {count} summaries."))
+
+        if options['prune_alerts_days'] is not None:
+            cutoff = timezone.now() - timedelta(days=options['prune_alerts_days'])
+            deleted, _ = AlertEvent.objects.filter(created_at__lt=cutoff).delete()
+            self.stdout.write(self.style.SUCCESS(f"Pruned {deleted} alert events."))
@@ -0,0 +1,286 @@
+import heapq
+import json
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+from .authentication import token_cache
+from .cache import stats as cache_stats
+from .events import get_broker
+
+
+logger = logging.getLogger(__name__)
+
+# Request latency histogram bounds, in seconds.
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Layout of a route's row: totals, then one slot per bucket plus +Inf.
+COUNT, LATENCY, QUERIES, DB_TIME, RENDER_TIME, BYTES = range(6)
+FIRST_BUCKET = 6
+ROW_SIZE = FIRST_BUCKET + len(BUCKETS) + 1
+
+DEFAULT_FLUSH_INTERVAL = 5
+DEFAULT_SLOW_QUERY_COUNT = 5
+
+
+class RequestRecorder:
+    """What one request did. Queries may be recorded from the async views' pool threads."""
+
+    def __init__(self, keep_statements=0):
+        self.queries = 0
+        self.db_time = 0.0
+        self.render_time = 0.0
+        self.keep_statements = keep_statements
+        self.statements = []
+        self._lock = threading.Lock()
+
+    def add_query(self, sql, duration):
+        with self._lock:
+            self.queries += 1
+            self.db_time += duration
+            if self.keep_statements:
+                entry = (duration, self.queries, sql)
+                if len(self.statements) < self.keep_statements:
+                    heapq.heappush(self.statements, entry)
+                else:
+                    heapq.heappushpop(self.statements, entry)
+
+    def slowest(self):
+        return sorted(self.statements, reverse=True)
+
+
+current_request = ContextVar('request_metrics', default=None)
+
+
+def record_query(execute, sql, params, many, context):
+    recorder = current_request.get()
+    if recorder is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        recorder.add_query(sql, time.perf_counter() - started)
+
+
+def _install(connection, **kwargs):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+def install_query_recorder():
+    """Wrap every connection, including those opened later by other threads."""
+    connection_created.connect(_install, dispatch_uid='accounts-metrics')
+    for connection in connections.all():
+        _install(connection)
+
+
+class MetricsRegistry:
+    """
+    Per-process request metrics. Each thread writes to its own shard, so
+    recording takes no lock; ``snapshot()`` sums the shards. With
+    ``METRICS_DIR`` set, each process also writes its snapshot there
+    every ``METRICS_FLUSH_INTERVAL`` seconds, and ``collect()`` merges
+    the files of the workers still running.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        self._shards = []
+        self._shards_lock = threading.Lock()
+        self._next_flush = 0.0
+
+    def _shard(self):
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            shard = self._local.shard = {'routes': {}, 'status': {}}
+            with self._shards_lock:
+                self._shards.append(shard)
+        return shard
+
+    def observe(self, route, method, status, latency, recorder, size):
+        shard = self._shard()
+        key = f'{route}|{method}'
+        row = shard['routes'].get(key)
+        if row is None:
+            row = shard['routes'][key] = [0] * ROW_SIZE
+        row[COUNT] += 1
+        row[LATENCY] += latency
+        row[QUERIES] += recorder.queries
+        row[DB_TIME] += recorder.db_time
+        row[RENDER_TIME] += recorder.render_time
+        row[BYTES] += size
+        row[FIRST_BUCKET + bisect_left(BUCKETS, latency)] += 1
+        status_key = f'{key}|{status}'
+        shard['status'][status_key] = shard['status'].get(status_key, 0) + 1
+
+    def snapshot(self):
+        merged = {'routes': {}, 'status': {}}
+        with self._shards_lock:
+            shards = list(self._shards)
+        for shard in shards:
+            _merge(merged, {'routes': dict(shard['routes']), 'status': dict(shard['status'])})
+        token_stats = token_cache.stats()
+        merged['counters'] = {
+            'inventory_cache_hits': cache_stats.hits,
+            'inventory_cache_misses': cache_stats.misses,
+            'token_cache_hits': token_stats['hits'],
+            'token_cache_misses': token_stats['misses'],
+        }
+        merged['gauges'] = {
+            'token_cache_size': token_stats['size'],
+            'event_stream_subscribers': get_broker().subscriber_count(),
+        }
+        return merged
+
+    def _path(self, directory, pid=None):
+        return os.path.join(directory, f'metrics-{pid or os.getpid()}.json')
+
+    def flush(self, force=False):
+        directory = getattr(settings, 'METRICS_DIR', None)
+        now = time.monotonic()
+        if not directory or (not force and now < self._next_flush):
+            return
+        self._next_flush = now + getattr(settings, 'METRICS_FLUSH_INTERVAL', DEFAULT_FLUSH_INTERVAL)
+        path = self._path(directory)
+        tmp = f'{path}.tmp'
+        with open(tmp, 'w') as fh:
+            json.dump(self.snapshot(), fh)
+        os.replace(tmp, path)
+
+    def collect(self):
+        """This process's metrics merged with every other worker's last flush."""
+        directory = getattr(settings, 'METRICS_DIR', None)
+        merged = self.snapshot()
+        if not directory:
+            return merged
+        self.flush(force=True)
+        for name in os.listdir(directory):
+            if not name.startswith('metrics-') or not name.endswith('.json'):
+                continue
+            try:
+                pid = int(name[len('metrics-'):-len('.json')])
+            except ValueError:
+                continue
+            if pid == os.getpid():
+                continue
+            if not pid_alive(pid):
+                # Left by a worker that exited or was restarted.
+                mark_process_dead(pid, directory)
+                continue
+            path = self._path(directory, pid)
+            try:
+                with open(path) as fh:
+                    _merge(merged, json.load(fh))
+            except (OSError, ValueError):
+                # Being replaced by its worker; the next scrape will have it.
+                continue
+        return merged
+
+
+def _merge(into, snapshot):
+    for key, row in snapshot.get('routes', {}).items():
+        target = into['routes'].setdefault(key, [0] * ROW_SIZE)
+        for index, value in enumerate(row):
+            target[index] += value
+    for section in ('status', 'counters', 'gauges'):
+        target = into.setdefault(section, {})
+        for key, value in snapshot.get(section, {}).items():
+            target[key] = target.get(key, 0) + value
+
+
+registry = MetricsRegistry()
+
+
+def pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        # Exists, but belongs to another user.
+        pass
+    return True
+
+
+def mark_process_dead(pid, directory=None):
+    """
+    Drop the metrics file of worker ``pid``, as ``prometheus_client``'s
+    ``mark_process_dead``. ``collect()`` does it for files of pids that no
+    longer run; a server hook on worker exit can call it sooner.
+    """
+    directory = directory or getattr(settings, 'METRICS_DIR', None)
+    if not directory:
+        return
+    try:
+        os.remove(registry._path(directory, pid))
+    except FileNotFoundError:
+        pass
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def render_prometheus(snapshot, prefix='stock'):
+    lines = []
+
+    def header(name, kind, help_text):
+        lines.append(f'# HELP {prefix}_{name} {help_text}')
+        lines.append(f'# TYPE {prefix}_{name} {kind}')
+
+    routes = sorted(
+        (key.split('|'), row) for key, row in snapshot['routes'].items()
+    )
+
+    header('http_requests_total', 'counter', 'Requests by URL name, method and status.')
+    for key, count in sorted(snapshot['status'].items()):
+        route, method, status = key.split('|')
+        lines.append(f'{prefix}_http_requests_total{{route="{_escape(route)}",method="{method}",status="{status}"}} {count}')
+
+    header('http_request_duration_seconds', 'histogram', 'Request latency, including rendering.')
+    for (route, method), row in routes:
+        labels = f'route="{_escape(route)}",method="{method}"'
+        cumulative = 0
+        for bound, count in zip((*BUCKETS, '+Inf'), row[FIRST_BUCKET:]):
+            cumulative += count
+            lines.append(f'{prefix}_http_request_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+        lines.append(f'{prefix}_http_request_duration_seconds_sum{{{labels}}} {row[LATENCY]:.6f}')
+        lines.append(f'{prefix}_http_request_duration_seconds_count{{{labels}}} {row[COUNT]}')
+
+    for name, index, help_text in (
+        ('db_queries_total', QUERIES, 'Database queries.'),
+        ('db_query_seconds_total', DB_TIME, 'Time spent in database queries.'),
+        ('render_seconds_total', RENDER_TIME, 'Time spent rendering responses (JSON, CSV, ...).'),
+        ('response_bytes_total', BYTES, 'Response body bytes, after compression; streamed bodies are not counted.'),
+    ):
+        header(name, 'counter', help_text)
+        for (route, method), row in routes:
+            value = row[index]
+            value = f'{value:.6f}' if isinstance(value, float) else value
+            lines.append(f'{prefix}_{name}{{route="{_escape(route)}",method="{method}"}} {value}')
+
+    for name, value in sorted(snapshot.get('counters', {}).items()):
+        header(f'{name}_total', 'counter', name.replace('_', ' ').capitalize() + '.')
+        lines.append(f'{prefix}_{name}_total {value}')
+    for name, value in sorted(snapshot.get('gauges', {}).items()):
+        header(name, 'gauge', name.replace('_', ' ').capitalize() + '.')
+        lines.append(f'{prefix}_{name} {value}')
+    return '\n'.join(lines) + '\n'
+
+
+def log_slow_request(request, route, latency, recorder):
+    statements = '\n'.join(
+        f'  {duration * 1000:.1f}ms  {sql}' for duration, _, sql in recorder.slowest()
+    )
+    logger.warning(
+        "Slow request: %s %s (%s) took %.0fms, %d queries, %.0fms in the database. Slowest queries:\n%s",
+        request.method, request.get_full_path(), route, latency * 1000, recorder.queries,
+        recorder.db_time * 1000, statements,
+    )
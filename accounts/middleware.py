@@ -0,0 +1,181 @@
+import hashlib
+import random
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.middleware.gzip import GZipMiddleware
+
+from config.routers import read_alias, replica_aliases
+
+from .metrics import (
+    DEFAULT_SLOW_QUERY_COUNT, RequestRecorder, current_request, install_query_recorder,
+    log_slow_request, registry,
+)
+
+
+DEFAULT_GZIP_MIN_SIZE = 1024
+DEFAULT_REPLICA_STICKY_SECONDS = 15
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+class APIGZipMiddleware(GZipMiddleware):
+    """
+    ``GZipMiddleware`` for API responses only, above ``API_GZIP_MIN_SIZE``
+    bytes. Streamed exports are compressed as they stream; Server-Sent
+    Events are left alone so each event is flushed as soon as it is sent.
+    """
+    path_prefix = '/api/'
+
+    def process_response(self, request, response):
+        if not request.path.startswith(self.path_prefix):
+            return response
+        if response.get('Content-Type', '').startswith('text/event-stream'):
+            return response
+        min_size = getattr(settings, 'API_GZIP_MIN_SIZE', DEFAULT_GZIP_MIN_SIZE)
+        if not response.streaming and len(response.content) < min_size:
+            return response
+        return super().process_response(request, response)
+
+
+class MetricsMiddleware:
+    """
+    Records latency, query count and time, render time and response size
+    per URL name into ``accounts.metrics.registry``. Place it first so the
+    figures cover the whole stack, compression included.
+
+    With ``METRICS_SLOW_REQUEST_MS`` set, requests slower than that are
+    logged to ``accounts.metrics`` with their slowest SQL statements.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.slow_ms = getattr(settings, 'METRICS_SLOW_REQUEST_MS', None)
+        self.keep_statements = (
+            getattr(settings, 'METRICS_SLOW_QUERY_COUNT', DEFAULT_SLOW_QUERY_COUNT) if self.slow_ms is not None else 0
+        )
+        install_query_recorder()
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        recorder, token, started = self.start()
+        try:
+            response = self.get_response(request)
+        finally:
+            current_request.reset(token)
+        self.finish(request, response, recorder, started)
+        return response
+
+    async def __acall__(self, request):
+        recorder, token, started = self.start()
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_request.reset(token)
+        self.finish(request, response, recorder, started)
+        return response
+
+    def start(self):
+        recorder = RequestRecorder(self.keep_statements)
+        return recorder, current_request.set(recorder), time.perf_counter()
+
+    def process_template_response(self, request, response):
+        # DRF responses render right after this hook.
+        recorder = current_request.get()
+        if recorder is not None:
+            started = time.perf_counter()
+
+            def rendered(response):
+                recorder.render_time += time.perf_counter() - started
+
+            response.add_post_render_callback(rendered)
+        return response
+
+    def finish(self, request, response, recorder, started):
+        latency = time.perf_counter() - started
+        match = request.resolver_match
+        route = match.view_name if match is not None else '<unmatched>'
+        size = 0 if response.streaming else len(response.content)
+        registry.observe(route, request.method, response.status_code, latency, recorder, size)
+        registry.flush()
+        if self.slow_ms is not None and latency * 1000 >= self.slow_ms:
+            log_slow_request(request, route, latency, recorder)
+
+
+class ReplicaMiddleware:
+    """
+    Sends the reads of safe ``/api/`` requests to a random read replica
+    (``config.routers.ReplicaRouter``). After a successful write a client
+    reads from the primary for ``REPLICA_STICKY_SECONDS``, so it never sees
+    its own changes missing; clients are told apart by their credentials,
+    the pin is kept in the default cache. Not used without replicas.
+    """
+    sync_capable = True
+    async_capable = True
+    path_prefix = '/api/'
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.replicas = replica_aliases()
+        if not self.replicas:
+            raise MiddlewareNotUsed
+        self.sticky_seconds = getattr(settings, 'REPLICA_STICKY_SECONDS', DEFAULT_REPLICA_STICKY_SECONDS)
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        key = self.pin_key(request)
+        pinned = key is not None and self.reads_from_replica(request) and cache.get(key) is not None
+        token = read_alias.set(self.choose(request, pinned))
+        try:
+            response = self.get_response(request)
+        finally:
+            read_alias.reset(token)
+        if key is not None and self.wrote(request, response):
+            cache.set(key, True, self.sticky_seconds)
+        return response
+
+    async def __acall__(self, request):
+        key = self.pin_key(request)
+        pinned = key is not None and self.reads_from_replica(request) and await cache.aget(key) is not None
+        token = read_alias.set(self.choose(request, pinned))
+        try:
+            response = await self.get_response(request)
+        finally:
+            read_alias.reset(token)
+        if key is not None and self.wrote(request, response):
+            await cache.aset(key, True, self.sticky_seconds)
+        return response
+
+    def reads_from_replica(self, request):
+        return request.method in SAFE_METHODS and request.path.startswith(self.path_prefix)
+
+    def choose(self, request, pinned):
+        # One replica for the whole request, so its reads are consistent.
+        if pinned or not self.reads_from_replica(request):
+            return None
+        return random.choice(self.replicas)
+
+    @staticmethod
+    def wrote(request, response):
+        return request.method not in SAFE_METHODS and response.status_code < 400
+
+    @staticmethod
+    def pin_key(request):
+        credentials = (
+            request.headers.get('Authorization')
+            or request.GET.get('token')
+            or request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+        )
+        if not credentials:
+            return None
+        return 'replica-pin:' + hashlib.sha256(credentials.encode()).hexdigest()
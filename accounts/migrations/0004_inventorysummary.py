@@ -0,0 +1,74 @@
+# Generated by Django 6.0.2 on 2026-10-18 14:25
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Case, Count, F, IntegerField, Sum, When
+from django.utils import timezone
+
+
+def build_summaries(apps, schema_editor):
+    Category = apps.get_model('accounts', 'Category')
+    Product = apps.get_model('accounts', 'Product')
+    InventorySummary = apps.get_model('accounts', 'InventorySummary')
+    today = timezone.now().date()
+    money = models.DecimalField(max_digits=18, decimal_places=2)
+
+    category_ids = list(Category.objects.order_by('id').values_list('id', 'owner_id'))
+    for start in range(0, len(category_ids), 1000):
+        chunk = dict(category_ids[start:start + 1000])
+        totals = {
+            row['category_id']: row
+            for row in Product.objects.filter(category_id__in=chunk).values('category_id').annotate(
+                product_count=Count('id'),
+                total_stock=Sum('quantity'),
+                total_value=Sum(F('price') * F('quantity'), output_field=money),
+                low_stock_count=Sum(Case(When(quantity__lte=F('min_threshold'), then=1), default=0, output_field=IntegerField())),
+                expired_count=Sum(Case(When(expiration_date__lte=today, then=1), default=0, output_field=IntegerField())),
+                expired_value=Sum(Case(When(expiration_date__lte=today, then=F('price') * F('quantity')), default=0, output_field=money)),
+            ).order_by()
+        }
+        InventorySummary.objects.bulk_create([
+            InventorySummary(
+                owner_id=owner_id,
+                category_id=category_id,
+                expired_as_of=today,
+                **{
+                    field: totals.get(category_id, {}).get(field) or 0
+                    for field in ('product_count', 'total_stock', 'total_value',
+                                  'low_stock_count', 'expired_count', 'expired_value')
+                },
+            )
+            for category_id, owner_id in chunk.items()
+        ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0003_product'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='category',
+            options={'ordering': ['-created_at']},
+        ),
+        migrations.CreateModel(
+            name='InventorySummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('product_count', models.IntegerField(default=0)),
+                ('total_stock', models.BigIntegerField(default=0)),
+                ('total_value', models.DecimalField(decimal_places=2, default=0, max_digits=18)),
+                ('low_stock_count', models.IntegerField(default=0)),
+                ('expired_count', models.IntegerField(default=0)),
+                ('expired_value', models.DecimalField(decimal_places=2, default=0, max_digits=18)),
+                ('expired_as_of', models.DateField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('category', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='summary', to='accounts.category')),
+                ('owner', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='inventory_summaries', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.RunPython(build_summaries, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 6.0.2 on 2026-10-18 14:26
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def create_versions(apps, schema_editor):
+    User = apps.get_model('accounts', 'User')
+    InventoryVersion = apps.get_model('accounts', 'InventoryVersion')
+    user_ids = list(User.objects.values_list('id', flat=True))
+    InventoryVersion.objects.bulk_create(
+        [InventoryVersion(owner_id=user_id) for user_id in user_ids], batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0004_inventorysummary'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InventoryVersion',
+            fields=[
+                ('owner', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='inventory_version', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('version', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.RunPython(create_versions, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 6.0.2 on 2026-10-18 14:40
+
+from django.db import migrations
+
+from accounts.search import FTS_TABLE, ensure_sqlite_fts
+
+
+def create_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor == 'postgresql':
+        schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        schema_editor.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS accounts_product_name_trgm "
+            "ON accounts_product USING gin (name gin_trgm_ops)"
+        )
+    elif connection.vendor == 'sqlite':
+        ensure_sqlite_fts(connection)
+
+
+def drop_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor == 'postgresql':
+        schema_editor.execute("DROP INDEX CONCURRENTLY IF EXISTS accounts_product_name_trgm")
+    elif connection.vendor == 'sqlite':
+        for suffix in ('ai', 'ad', 'au'):
+            schema_editor.execute(f"DROP TRIGGER IF EXISTS {FTS_TABLE}_{suffix}")
+        schema_editor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction.
+    atomic = False
+
+    dependencies = [
+        ('accounts', '0005_inventoryversion'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 6.0.2 on 2026-10-18 14:55
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+BATCH_SIZE = 5000
+
+
+def backfill_owner(apps, schema_editor):
+    Category = apps.get_model('accounts', 'Category')
+    Product = apps.get_model('accounts', 'Product')
+    owner_of_category = Subquery(Category.objects.filter(pk=OuterRef('category_id')).values('owner_id')[:1])
+    last_id = Product.objects.order_by('-id').values_list('id', flat=True).first() or 0
+    # One short transaction per id range keeps row locks brief on large tables.
+    for start in range(0, last_id + 1, BATCH_SIZE):
+        Product.objects.filter(
+            id__gte=start, id__lt=start + BATCH_SIZE, owner__isnull=True
+        ).update(owner_id=owner_of_category)
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('accounts', '0006_product_name_search_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='owner',
+            field=models.ForeignKey(db_index=False, editable=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='products', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.RunPython(backfill_owner, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='product',
+            name='owner',
+            field=models.ForeignKey(db_index=False, editable=False, on_delete=django.db.models.deletion.CASCADE, related_name='products', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['owner', '-created_at'], name='product_owner_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['owner', 'expiration_date'], name='product_owner_expiry_idx'),
+        ),
+    ]
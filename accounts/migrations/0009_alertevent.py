@@ -0,0 +1,33 @@
+# Generated by Django 6.0.2 on 2026-10-18 15:25
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0008_product_is_low_stock'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AlertEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('product_id', models.BigIntegerField()),
+                ('product_name', models.CharField(max_length=255)),
+                ('kind', models.CharField(choices=[('low_stock', 'Low stock'), ('expired', 'Expired')], max_length=16)),
+                ('state', models.CharField(choices=[('raised', 'Raised'), ('cleared', 'Cleared')], max_length=16)),
+                ('quantity', models.PositiveIntegerField()),
+                ('min_threshold', models.PositiveIntegerField()),
+                ('expiration_date', models.DateField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('owner', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='alert_events', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['owner', 'id'], name='alertevent_owner_id_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,80 @@
+# Generated by Django 6.0.2 on 2026-10-18 15:40
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Case, F, IntegerField, Sum, When
+
+
+def record_opening_balances(apps, schema_editor):
+    # History starts from the current stock: one opening entry per category.
+    Category = apps.get_model('accounts', 'Category')
+    Product = apps.get_model('accounts', 'Product')
+    StockMovement = apps.get_model('accounts', 'StockMovement')
+    money = models.DecimalField(max_digits=18, decimal_places=2)
+
+    category_ids = list(Category.objects.order_by('id').values_list('id', flat=True))
+    for start in range(0, len(category_ids), 1000):
+        totals = Product.objects.filter(category_id__in=category_ids[start:start + 1000]).values(
+            'category_id', 'owner_id'
+        ).annotate(
+            total_stock=Sum('quantity'),
+            total_value=Sum(F('price') * F('quantity'), output_field=money),
+            low_stock_count=Sum(Case(When(quantity__lte=F('min_threshold'), then=1), default=0, output_field=IntegerField())),
+        ).order_by()
+        StockMovement.objects.bulk_create([
+            StockMovement(
+                owner_id=row['owner_id'],
+                category_id=row['category_id'],
+                reason='opening',
+                quantity_delta=row['total_stock'] or 0,
+                value_delta=row['total_value'] or 0,
+                low_stock_delta=row['low_stock_count'] or 0,
+            )
+            for row in totals
+        ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0009_alertevent'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CategoryDailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('category_id', models.BigIntegerField()),
+                ('date', models.DateField()),
+                ('total_stock', models.BigIntegerField(default=0)),
+                ('total_value', models.DecimalField(decimal_places=2, default=0, max_digits=18)),
+                ('low_stock_count', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('owner', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='daily_rollups', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['owner', 'date'], name='rollup_owner_date_idx')],
+                'constraints': [models.UniqueConstraint(fields=('date', 'category_id'), name='rollup_date_category_uniq')],
+            },
+        ),
+        migrations.CreateModel(
+            name='StockMovement',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('category_id', models.BigIntegerField()),
+                ('product_id', models.BigIntegerField(blank=True, null=True)),
+                ('reason', models.CharField(choices=[('opening', 'Opening balance'), ('created', 'Product created'), ('updated', 'Product updated'), ('deleted', 'Product deleted'), ('imported', 'Bulk import'), ('adjusted', 'Stock movement'), ('category_deleted', 'Category deleted')], max_length=16)),
+                ('quantity_delta', models.BigIntegerField()),
+                ('value_delta', models.DecimalField(decimal_places=2, max_digits=18)),
+                ('low_stock_delta', models.IntegerField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('owner', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='stock_movements', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['created_at'], name='stockmovement_created_idx'), models.Index(fields=['owner', 'id'], name='stockmovement_owner_id_idx')],
+            },
+        ),
+        migrations.RunPython(record_opening_balances, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 6.0.2 on 2026-10-18 16:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0010_stockmovement_categorydailyrollup'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='stockmovement',
+            name='reason',
+            field=models.CharField(choices=[('opening', 'Opening balance'), ('created', 'Product created'), ('updated', 'Product updated'), ('deleted', 'Product deleted'), ('imported', 'Bulk import'), ('adjusted', 'Stock movement'), ('moved', 'Moved between categories'), ('category_deleted', 'Category deleted')], max_length=16),
+        ),
+        migrations.AddIndex(
+            model_name='stockmovement',
+            index=models.Index(fields=['owner', 'created_at'], name='movement_owner_created_idx'),
+        ),
+    ]
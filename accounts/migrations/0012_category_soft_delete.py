@@ -0,0 +1,42 @@
+# Generated by Django 6.0.2 on 2026-10-18 17:05
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0011_stockmovement_moved'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CategoryPurge',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('category_id', models.BigIntegerField(unique=True)),
+                ('category_name', models.CharField(max_length=255)),
+                ('products_total', models.IntegerField()),
+                ('products_purged', models.IntegerField(default=0)),
+                ('expired_as_of', models.DateField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='deleted_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='category',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', False)), fields=['deleted_at'], name='category_deleted_idx'),
+        ),
+        migrations.AddField(
+            model_name='categorypurge',
+            name='owner',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='category_purges', to=settings.AUTH_USER_MODEL),
+        ),
+    ]
@@ -1,4 +1,5 @@
-from django.db import models
+from django.db import models, router, transaction
+from django.db.models import F, Q
 from django.utils import timezone
 
 from django.contrib.auth.models import AbstractUser
@@ -14,10 +15,18 @@ class User(AbstractUser):
 from django.conf import settings
 
 
+class ActiveCategoryManager(models.Manager):
+    """Hides soft-deleted categories; ``Category.all_objects`` includes them."""
+
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted_at__isnull=True)
+
+
 class Category(models.Model):
     name = models.CharField(max_length=255)
     description = models.TextField(blank=True, null=True)
 
+    # Fixed once created: products and summaries keep a copy of it.
     owner = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
@@ -26,8 +35,19 @@ class Category(models.Model):
 
     created_at = models.DateTimeField(auto_now_add=True)
 
+    # Set by a soft delete; the row goes once its products are purged
+    # (see accounts.purge).
+    deleted_at = models.DateTimeField(blank=True, null=True, editable=False)
+
+    objects = ActiveCategoryManager()
+    all_objects = models.Manager()
+
     class Meta:
         ordering = ['-created_at']   
+        indexes = [
+            # Only categories awaiting their purge are indexed.
+            models.Index(fields=['deleted_at'], condition=Q(deleted_at__isnull=False), name='category_deleted_idx'),
+        ]
 
     def __str__(self):
         return f"{self.name} - {self.owner.username}"
@@ -35,6 +55,23 @@ class Category(models.Model):
 
 
 
+# Largest quantity a PositiveIntegerField holds on every backend (int4 on
+# PostgreSQL).
+MAX_QUANTITY = 2147483647
+
+
+class ProductQuerySet(models.QuerySet):
+    def active(self):
+        """Without the products of soft-deleted categories, which await their purge (see accounts.purge)."""
+        return self.exclude(category_id__in=Category.all_objects.filter(deleted_at__isnull=False).values('id'))
+
+    def for_owner(self, owner):
+        """``owner``'s active products; tenant queries start from here."""
+        return self.filter(owner=owner).exclude(
+            category_id__in=Category.all_objects.filter(owner=owner, deleted_at__isnull=False).values('id')
+        )
+
+
 class Product(models.Model):
     name = models.CharField(max_length=255)
 
@@ -52,10 +89,72 @@ class Product(models.Model):
         related_name='products'
     )
 
+    # Denormalized from category.owner so tenant queries skip the Category
+    # join and can use the composite indexes below. Kept in sync by save().
+    owner = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='products',
+        editable=False,
+        # Served by the composite indexes, which lead with owner.
+        db_index=False
+    )
+
     created_at = models.DateTimeField(auto_now_add=True)
 
-    def is_low_stock(self):
-        return self.quantity <= self.min_threshold
+    # Computed and stored by the database, so alert queries can use the
+    # partial index below instead of a CASE expression over every row.
+    is_low_stock = models.GeneratedField(
+        expression=Q(quantity__lte=F('min_threshold')),
+        output_field=models.BooleanField(),
+        db_persist=True,
+    )
+
+    objects = ProductQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['owner', '-created_at'], name='product_owner_created_idx'),
+            models.Index(fields=['owner', 'expiration_date'], name='product_owner_expiry_idx'),
+            models.Index(fields=['owner'], condition=Q(is_low_stock=True), name='product_owner_low_stock_idx'),
+        ]
+
+    # Fields whose stored values feed the inventory summaries and alert log.
+    TRACKED_FIELDS = ('owner_id', 'category_id', 'name', 'price', 'quantity', 'min_threshold', 'expiration_date')
+
+    def save(self, *args, **kwargs):
+        if self.category_id is not None:
+            # Uses the cached category when there is one (the serializer
+            # always provides it); a moved product follows its new category.
+            self.owner_id = self.category.owner_id
+        # The signal receivers lock the row in pre_save and apply its deltas
+        # in post_save (see accounts.signals): both in this transaction.
+        with transaction.atomic(using=kwargs.get('using') or router.db_for_write(Product, instance=self)):
+            super().save(*args, **kwargs)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored state so changes can be applied as deltas.
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+    def tracked_state(self):
+        # to_python() normalises values assigned in code (e.g. price='9.99').
+        return {
+            'id': self.pk,
+            **{name: self._meta.get_field(name).to_python(getattr(self, name)) for name in self.TRACKED_FIELDS},
+        }
+
+    def stored_state(self):
+        """
+        Tracked values as last loaded from / saved to the database, if known.
+        Saves and deletes replace them with the row's locked values first.
+        """
+        loaded = getattr(self, '_loaded_values', None)
+        if not loaded or any(name not in loaded for name in self.TRACKED_FIELDS):
+            return None
+        return {'id': self.pk, **{name: loaded[name] for name in self.TRACKED_FIELDS}}
 
     def has_expiry(self):
         if self.expiration_date:
@@ -64,3 +163,213 @@ class Product(models.Model):
 
     def __str__(self):
         return f"{self.name} - {self.category.name}"
+
+
+class InventorySummary(models.Model):
+    """
+    Running totals of a category's products, kept up to date with deltas on
+    every product write so the dashboard never has to scan the catalog.
+
+    The ``expired_*`` figures are relative to ``expired_as_of`` and are
+    rolled forward day by day (see ``rollover_inventory_expiry``).
+    """
+    owner = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='inventory_summaries'
+    )
+    category = models.OneToOneField(
+        Category,
+        on_delete=models.CASCADE,
+        related_name='summary'
+    )
+
+    product_count = models.IntegerField(default=0)
+    total_stock = models.BigIntegerField(default=0)
+    total_value = models.DecimalField(max_digits=18, decimal_places=2, default=0)
+    low_stock_count = models.IntegerField(default=0)
+    expired_count = models.IntegerField(default=0)
+    expired_value = models.DecimalField(max_digits=18, decimal_places=2, default=0)
+    expired_as_of = models.DateField()
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Summary of {self.category_id}"
+
+
+class CategoryPurge(models.Model):
+    """
+    Progress of removing a soft-deleted category's products in batches
+    (see ``accounts.purge``); ``finished_at`` is set once the category row
+    itself is gone. ``category_id`` is a plain column so the record outlives
+    the category.
+    """
+    owner = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='category_purges'
+    )
+    category_id = models.BigIntegerField(unique=True)
+    category_name = models.CharField(max_length=255)
+    products_total = models.IntegerField()
+    products_purged = models.IntegerField(default=0)
+    # The deleted summary's, for clearing the products' expiry alerts.
+    expired_as_of = models.DateField(blank=True, null=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    def __str__(self):
+        return f"Purge of {self.category_id} ({self.products_purged}/{self.products_total})"
+
+
+class InventoryVersion(models.Model):
+    """
+    Per-user counter bumped by every write to the user's categories or
+    products. Cached read payloads are keyed on it (see accounts.cache).
+    """
+    owner = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='inventory_version'
+    )
+    version = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.owner_id} v{self.version}"
+
+
+class AlertEvent(models.Model):
+    """
+    Append-only log of low-stock / expiry alerts being raised and cleared.
+    Clients follow it with ``?since=<id>`` instead of re-reading every alert.
+
+    ``product_id`` is a plain column rather than a foreign key so deleting
+    products never has to touch the log.
+    """
+    LOW_STOCK = 'low_stock'
+    EXPIRED = 'expired'
+    KIND_CHOICES = [(LOW_STOCK, 'Low stock'), (EXPIRED, 'Expired')]
+
+    RAISED = 'raised'
+    CLEARED = 'cleared'
+    STATE_CHOICES = [(RAISED, 'Raised'), (CLEARED, 'Cleared')]
+
+    owner = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='alert_events',
+        db_index=False
+    )
+    product_id = models.BigIntegerField()
+    product_name = models.CharField(max_length=255)
+    kind = models.CharField(max_length=16, choices=KIND_CHOICES)
+    state = models.CharField(max_length=16, choices=STATE_CHOICES)
+    quantity = models.PositiveIntegerField()
+    min_threshold = models.PositiveIntegerField()
+    expiration_date = models.DateField(blank=True, null=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['owner', 'id'], name='alertevent_owner_id_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.product_name} {self.kind} {self.state}"
+
+
+class StockMovement(models.Model):
+    """
+    Append-only ledger of changes to a category's stock: quantity, value
+    (price x quantity) and low-stock count, one row per product write.
+    ``accounts.ledger`` aggregates it into ``CategoryDailyRollup`` rows.
+
+    ``category_id`` and ``product_id`` are plain columns so history
+    outlives deleted rows; ``product_id`` is NULL for category-level
+    entries (opening balances, category deletion).
+    """
+    OPENING = 'opening'
+    CREATED = 'created'
+    UPDATED = 'updated'
+    DELETED = 'deleted'
+    IMPORTED = 'imported'
+    ADJUSTED = 'adjusted'
+    MOVED = 'moved'
+    CATEGORY_DELETED = 'category_deleted'
+    REASON_CHOICES = [
+        (OPENING, 'Opening balance'),
+        (CREATED, 'Product created'),
+        (UPDATED, 'Product updated'),
+        (DELETED, 'Product deleted'),
+        (IMPORTED, 'Bulk import'),
+        (ADJUSTED, 'Stock movement'),
+        (MOVED, 'Moved between categories'),
+        (CATEGORY_DELETED, 'Category deleted'),
+    ]
+
+    owner = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='stock_movements',
+        db_index=False
+    )
+    category_id = models.BigIntegerField()
+    product_id = models.BigIntegerField(blank=True, null=True)
+    reason = models.CharField(max_length=16, choices=REASON_CHOICES)
+    quantity_delta = models.BigIntegerField()
+    value_delta = models.DecimalField(max_digits=18, decimal_places=2)
+    low_stock_delta = models.IntegerField()
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # The rollup build reads the ledger by time.
+            models.Index(fields=['created_at'], name='stockmovement_created_idx'),
+            models.Index(fields=['owner', 'id'], name='stockmovement_owner_id_idx'),
+            # A tenant's recent consumption, for the forecasts.
+            models.Index(fields=['owner', 'created_at'], name='movement_owner_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.category_id} {self.reason} {self.quantity_delta:+d}"
+
+
+class CategoryDailyRollup(models.Model):
+    """
+    A category's stock at the end of ``date`` (or so far, for today), built
+    from the ``StockMovement`` ledger by ``build_inventory_rollups``. Days
+    on which a category held nothing have no row.
+    """
+    owner = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='daily_rollups',
+        db_index=False
+    )
+    category_id = models.BigIntegerField()
+    date = models.DateField()
+
+    total_stock = models.BigIntegerField(default=0)
+    total_value = models.DecimalField(max_digits=18, decimal_places=2, default=0)
+    low_stock_count = models.IntegerField(default=0)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            # Leads with date: the build reads and replaces whole days.
+            models.UniqueConstraint(fields=['date', 'category_id'], name='rollup_date_category_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['owner', 'date'], name='rollup_owner_date_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.category_id} on {self.date}"
+
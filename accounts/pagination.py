@@ -0,0 +1,188 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from collections import OrderedDict
+
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator
+from django.db import connections, router
+from django.db.models import Q
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class StandardResultsSetPagination(PageNumberPagination):
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination over ``(ordering field, id)``.
+
+    Unlike ``PageNumberPagination`` it runs no ``COUNT(*)`` and no
+    ``OFFSET``: each page is a range condition on the sort key with ``id``
+    as tie-breaker, so deep pages cost the same as the first one. The sort
+    field comes from the view's ``ordering`` query parameter and must be one
+    of its ``ordering_fields``.
+    """
+    cursor_query_param = 'cursor'
+    ordering_query_param = 'ordering'
+    page_size = StandardResultsSetPagination.page_size
+    page_size_query_param = StandardResultsSetPagination.page_size_query_param
+    max_page_size = StandardResultsSetPagination.max_page_size
+    default_ordering = '-created_at'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.ordering = self.get_ordering(request, view)
+        self.field = self.ordering.lstrip('-')
+        self.descending = self.ordering.startswith('-')
+
+        cursor = self.decode_cursor(request, queryset.model)
+        self.reverse = bool(cursor and cursor['r'])
+        # Walking backwards means querying in the opposite order and
+        # flipping the page afterwards.
+        descending = self.descending != self.reverse
+        sign = '-' if descending else ''
+        queryset = queryset.order_by(f'{sign}{self.field}', f'{sign}id')
+        if cursor:
+            op = 'lt' if descending else 'gt'
+            # The redundant inclusive bound lets the planner range-scan the
+            # sort index instead of filtering the OR row by row.
+            queryset = queryset.filter(
+                Q(**{f'{self.field}__{op}e': cursor['p']}),
+                Q(**{f'{self.field}__{op}': cursor['p']})
+                | Q(**{self.field: cursor['p'], f'id__{op}': cursor['i']}),
+            )
+
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+        if self.reverse:
+            results.reverse()
+            self.has_next, self.has_previous = cursor is not None, has_more
+        else:
+            self.has_next, self.has_previous = has_more, cursor is not None
+        self.page = results
+        return results
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def get_ordering(self, request, view):
+        allowed = getattr(view, 'ordering_fields', None) or ()
+        requested = request.query_params.get(self.ordering_query_param, '').split(',')[0].strip()
+        if requested and requested.lstrip('-') in allowed:
+            return requested
+        return self.default_ordering
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def encode_cursor(self, item, reverse):
+        position = item[self.field] if isinstance(item, dict) else getattr(item, self.field)
+        pk = item['id'] if isinstance(item, dict) else item.pk
+        token = {
+            'o': self.ordering,
+            'p': position.isoformat() if hasattr(position, 'isoformat') else str(position),
+            'i': pk,
+            'r': int(reverse),
+        }
+        encoded = urlsafe_b64encode(json.dumps(token, separators=(',', ':')).encode('ascii')).decode('ascii')
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, encoded)
+
+    def decode_cursor(self, request, model):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            token = json.loads(urlsafe_b64decode(encoded.encode('ascii')).decode('ascii'))
+            if token.get('o') != self.ordering:
+                raise ValueError
+            # A position the sort field cannot hold is a bad cursor, not a
+            # database error.
+            position = model._meta.get_field(self.field).to_python(token['p'])
+            cursor = {'p': position, 'i': int(token['i']), 'r': bool(token['r'])}
+        except (TypeError, ValueError, KeyError, UnicodeError, AttributeError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+        if cursor['p'] is None:
+            raise NotFound(self.invalid_cursor_message)
+        return cursor
+
+
+def estimated_row_count(model):
+    """
+    The planner's row estimate for ``model``'s table (``pg_class.reltuples``,
+    refreshed by autovacuum/ANALYZE), or None where there is none: other
+    databases, or a table never analyzed.
+    """
+    connection = connections[router.db_for_read(model)]
+    if connection.vendor != 'postgresql':
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(%s)",
+            [connection.ops.quote_name(model._meta.db_table)],
+        )
+        row = cursor.fetchone()
+    # -1 until the first ANALYZE.
+    return row[0] if row and row[0] >= 0 else None
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator for the admin that reports the table's estimated row count
+    instead of running an exact ``COUNT(*)``, which scans the whole table,
+    when ``estimate`` is set (unfiltered lists only) and the estimate is at
+    least ``estimate_threshold``. Otherwise it counts exactly, as on SQLite.
+    The last pages may then come out short or empty.
+    """
+    estimate_threshold = 10000
+
+    def __init__(self, *args, estimate=False, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.estimate = estimate
+
+    @cached_property
+    def count(self):
+        if self.estimate and hasattr(self.object_list, 'model'):
+            estimate = estimated_row_count(self.object_list.model)
+            if estimate is not None and estimate >= self.estimate_threshold:
+                return estimate
+        return super().count
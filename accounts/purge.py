@@ -0,0 +1,123 @@
+import logging
+import threading
+
+from django.conf import settings
+from django.db import connections, router, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from . import alerts, ledger
+from .cache import bump_inventory_version
+from .events import publish_dashboard_refresh
+from .models import Category, CategoryPurge, InventorySummary, Product
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 1000
+
+
+def get_batch_size():
+    return getattr(settings, 'CATEGORY_PURGE_BATCH_SIZE', DEFAULT_BATCH_SIZE)
+
+
+def soft_delete_category(category):
+    """
+    Hide ``category`` and, through it, its products (see
+    ``ProductQuerySet.for_owner``), and record the ``CategoryPurge`` that
+    will remove them. The work is the same whatever the category's size:
+    the ledger closes its balance from the summary, which goes with it, and
+    the products' alerts are left for the purge to clear batch by batch.
+    Returns the purge.
+    """
+    with transaction.atomic(savepoint=False):
+        # Reads the summary before it is deleted.
+        ledger.record_category_deleted(category)
+        stored = InventorySummary.objects.filter(category=category).values_list('product_count', 'expired_as_of').first()
+        if stored is None:
+            # Data that predates the summaries.
+            stored = Product.objects.filter(category=category).count(), timezone.now().date()
+        InventorySummary.objects.filter(category=category).delete()
+        category.deleted_at = timezone.now()
+        Category.all_objects.filter(pk=category.pk).update(deleted_at=category.deleted_at)
+        purge = CategoryPurge.objects.create(
+            owner_id=category.owner_id,
+            category_id=category.pk,
+            category_name=category.name,
+            products_total=stored[0],
+            expired_as_of=stored[1],
+        )
+        bump_inventory_version(category.owner_id)
+        publish_dashboard_refresh(category.owner_id)
+    return purge
+
+
+def purge_category(purge, batch_size=None):
+    """
+    Delete the products of ``purge``'s category ``batch_size`` at a time
+    with plain ``DELETE`` statements (no collector, no signals), logging
+    their active alerts as cleared in the same transaction, then the
+    category itself. Progress is saved after every batch; an interrupted
+    purge simply runs again.
+    """
+    batch_size = batch_size or get_batch_size()
+    as_of = purge.expired_as_of or timezone.now().date()
+    using = router.db_for_write(Product)
+    products = Product.objects.filter(category_id=purge.category_id)
+    while True:
+        ids = list(products.values_list('id', flat=True)[:batch_size])
+        if ids:
+            with transaction.atomic(using=using, savepoint=False):
+                batch = Product.objects.filter(id__in=ids)
+                alerts.record_cleared(batch, as_of)
+                deleted = batch._raw_delete(using)
+                CategoryPurge.objects.filter(pk=purge.pk).update(products_purged=F('products_purged') + deleted)
+            purge.products_purged += deleted
+        if len(ids) < batch_size:
+            break
+    with transaction.atomic(using=using, savepoint=False):
+        # The summary went with the soft delete and the signals' work is
+        # done, so nothing else references the row.
+        Category.all_objects.filter(pk=purge.category_id)._raw_delete(using)
+        purge.finished_at = timezone.now()
+        CategoryPurge.objects.filter(pk=purge.pk).update(finished_at=purge.finished_at)
+
+
+def purge_in_background(purge):
+    """Run ``purge_category`` in a thread once the current transaction commits."""
+    def run():
+        try:
+            purge_category(purge)
+        except Exception:
+            logger.exception("Purge of category %s failed; purge_deleted_categories resumes it", purge.category_id)
+        finally:
+            connections.close_all()
+
+    transaction.on_commit(lambda: threading.Thread(
+        target=run, name=f'category-purge-{purge.category_id}', daemon=True
+    ).start())
+
+
+def delete_category(category):
+    """
+    Soft-delete ``category``, then purge it right away if a single batch
+    covers its products, else in the background (unless
+    ``CATEGORY_PURGE_IN_BACKGROUND`` is off; ``purge_deleted_categories``
+    finishes it then). Returns the purge; ``finished_at`` is set if done.
+    """
+    with transaction.atomic():
+        purge = soft_delete_category(category)
+        if purge.products_total <= get_batch_size():
+            purge_category(purge)
+            return purge
+    if getattr(settings, 'CATEGORY_PURGE_IN_BACKGROUND', True):
+        purge_in_background(purge)
+    return purge
+
+
+def purge_pending(batch_size=None):
+    """Finish every unfinished purge, e.g. one cut short by a restart. Returns how many ran."""
+    pending = list(CategoryPurge.objects.filter(finished_at__isnull=True).order_by('id'))
+    for purge in pending:
+        purge_category(purge, batch_size)
+    return len(pending)
@@ -0,0 +1,105 @@
+from django.db import connections
+from django.db.models import F, Lookup
+from django.db.models.expressions import RawSQL
+from rest_framework import filters
+
+
+FTS_TABLE = 'accounts_product_fts'
+MIN_INDEXED_TERM_LENGTH = 3
+
+SQLITE_FTS_TABLE_SQL = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+    f"name, content='accounts_product', content_rowid='id', tokenize='trigram')"
+)
+SQLITE_FTS_TRIGGERS_SQL = (
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON accounts_product BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, name) VALUES (new.id, new.name);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON accounts_product BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name) VALUES ('delete', old.id, old.name);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF name ON accounts_product BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name) VALUES ('delete', old.id, old.name);
+        INSERT INTO {FTS_TABLE}(rowid, name) VALUES (new.id, new.name);
+    END""",
+)
+
+
+def ensure_sqlite_fts(connection):
+    """
+    Create the FTS5 shadow table and its sync triggers if missing, and
+    rebuild the index when the triggers had to be recreated (SQLite drops
+    them whenever a migration rebuilds the product table).
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT COUNT(*) FROM sqlite_master WHERE type = 'trigger' AND name LIKE %s",
+            [f'{FTS_TABLE}_%'],
+        )
+        if cursor.fetchone()[0] == len(SQLITE_FTS_TRIGGERS_SQL):
+            return
+        cursor.execute(SQLITE_FTS_TABLE_SQL)
+        for statement in SQLITE_FTS_TRIGGERS_SQL:
+            cursor.execute(statement)
+        cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+
+
+class ILike(Lookup):
+    """
+    ``lhs ILIKE rhs`` on the bare column: ``icontains`` compiles to
+    ``UPPER(name::text) LIKE UPPER(...)``, which the trigram index on
+    ``name`` cannot serve. PostgreSQL only.
+    """
+    lookup_name = 'ilike'
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f'{lhs} ILIKE {rhs}', (*lhs_params, *rhs_params)
+
+
+def trigram_search(queryset, terms):
+    """``queryset`` narrowed to names containing every term, most similar first."""
+    from django.contrib.postgres.search import TrigramSimilarity
+
+    ops = connections[queryset.db].ops
+    for term in terms:
+        queryset = queryset.filter(ILike(F('name'), f'%{ops.prep_for_like_query(term)}%'))
+    return queryset.annotate(
+        search_rank=TrigramSimilarity('name', ' '.join(terms))
+    ).order_by('-search_rank', *queryset.query.order_by)
+
+
+def _fts_phrase(term):
+    return '"' + term.replace('"', '""') + '"'
+
+
+class ProductSearchFilter(filters.SearchFilter):
+    """
+    Drop-in replacement for ``SearchFilter`` on product names that uses an
+    index instead of a sequential ``ILIKE '%q%'`` scan:
+
+    * PostgreSQL: ``ILIKE`` served by a ``pg_trgm`` GIN index, ranked by
+      trigram similarity (explicit ``?ordering=`` still wins).
+    * SQLite: an FTS5 trigram shadow table kept in sync by triggers.
+
+    Other backends, and terms too short for a trigram, fall back to
+    ``SearchFilter``. Each term must match, as with ``SearchFilter``.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        terms = self.get_search_terms(request)
+        if not terms or any(len(term) < MIN_INDEXED_TERM_LENGTH for term in terms):
+            return super().filter_queryset(request, queryset, view)
+
+        vendor = connections[queryset.db].vendor
+        if vendor == 'postgresql':
+            return trigram_search(queryset, terms)
+
+        if vendor == 'sqlite':
+            match = ' AND '.join(_fts_phrase(term) for term in terms)
+            return queryset.filter(id__in=RawSQL(
+                f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", [match]
+            ))
+
+        return super().filter_queryset(request, queryset, view)
@@ -0,0 +1,93 @@
+import random
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+
+from . import ledger, summary
+from .models import Category, InventoryVersion, Product, User
+
+
+BATCH_SIZE = 5000
+CATEGORY_NAMES = (
+    'Dairy', 'Bakery', 'Beverages', 'Frozen', 'Produce', 'Meat', 'Seafood', 'Snacks',
+    'Household', 'Hygiene', 'Pharmacy', 'Pet Care', 'Baby', 'Canned Goods', 'Spices',
+)
+ADJECTIVES = ('Fresh', 'Organic', 'Classic', 'Premium', 'Light', 'Family', 'Spicy', 'Sweet', 'Whole', 'Mini')
+NOUNS = ('Milk', 'Bread', 'Juice', 'Cheese', 'Yogurt', 'Rice', 'Coffee', 'Soap', 'Tissue', 'Apples',
+         'Chicken', 'Tuna', 'Chips', 'Pasta', 'Tea', 'Butter', 'Eggs', 'Water', 'Shampoo', 'Cereal')
+# (threshold, weight): most products reorder around 5-20 units.
+THRESHOLDS = ((0, 5), (2, 10), (5, 30), (10, 30), (20, 15), (50, 10))
+NO_EXPIRY_SHARE = 0.4
+LOW_STOCK_SHARE = 0.12
+
+
+def _product(rng, owner_id, category_id, today, n):
+    threshold = rng.choices([t for t, _ in THRESHOLDS], weights=[w for _, w in THRESHOLDS])[0]
+    if rng.random() < LOW_STOCK_SHARE:
+        quantity = rng.randint(0, threshold)
+    else:
+        quantity = threshold + 1 + int(rng.expovariate(1 / 60))
+    expiration_date = None
+    if rng.random() >= NO_EXPIRY_SHARE:
+        # Mostly in the coming months, with a tail already past.
+        expiration_date = today + timedelta(days=int(rng.gauss(90, 75)))
+    price = Decimal(min(rng.lognormvariate(2.3, 1.0), 99999)).quantize(Decimal('0.01'))
+    return Product(
+        owner_id=owner_id,
+        category_id=category_id,
+        name=f'{rng.choice(ADJECTIVES)} {rng.choice(NOUNS)} {n}',
+        price=max(price, Decimal('0.10')),
+        quantity=quantity,
+        min_threshold=threshold,
+        expiration_date=expiration_date,
+    )
+
+
+def seed_inventory(users, categories, products, prefix='seed', password=None, seed=None,
+                   batch_size=BATCH_SIZE):
+    """
+    Create ``users`` users, each with ``categories`` categories of ``products``
+    products, using bulk inserts. Creates what the signals would have
+    created for each row (inventory versions, summaries and tokens) and
+    one opening ledger entry per category, but records no alert history. Returns the users.
+    """
+    rng = random.Random(seed)
+    today = timezone.now().date()
+    hashed = make_password(password) if password else make_password(None)
+
+    with transaction.atomic():
+        created = User.objects.bulk_create([
+            User(username=f'{prefix}-{n}', email=f'{prefix}-{n}@example.com', password=hashed)
+            for n in range(users)
+        ], batch_size=batch_size)
+        # Not every backend returns primary keys from bulk_create.
+        created = list(User.objects.filter(username__in=[user.username for user in created]).order_by('id'))
+        InventoryVersion.objects.bulk_create([InventoryVersion(owner=user) for user in created], batch_size=batch_size)
+        Token.objects.bulk_create([Token(user=user, key=Token.generate_key()) for user in created], batch_size=batch_size)
+
+        Category.objects.bulk_create([
+            Category(owner=user, name=f'{CATEGORY_NAMES[n % len(CATEGORY_NAMES)]} {n}')
+            for user in created for n in range(categories)
+        ], batch_size=batch_size)
+        category_ids = list(
+            Category.objects.filter(owner__in=created).order_by('id').values_list('id', 'owner_id')
+        )
+
+        batch = []
+        for category_id, owner_id in category_ids:
+            for n in range(products):
+                batch.append(_product(rng, owner_id, category_id, today, n))
+                if len(batch) >= batch_size:
+                    Product.objects.bulk_create(batch)
+                    batch = []
+        if batch:
+            Product.objects.bulk_create(batch)
+
+        categories = Category.objects.filter(owner__in=created)
+        summary.rebuild(categories, today)
+        ledger.record_opening_balances(categories)
+    return created
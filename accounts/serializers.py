@@ -1,6 +1,7 @@
 # serializers.py
+from django.utils import timezone
 from rest_framework import serializers
-from .models import User, Category, Product
+from .models import MAX_QUANTITY, User, Category, CategoryPurge, Product, AlertEvent
 
 class UserRegisterSerializer(serializers.ModelSerializer):
     password = serializers.CharField(write_only=True)
@@ -17,7 +18,7 @@ class CategorySerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at']
 
 class ProductSerializer(serializers.ModelSerializer):
-    # These will be populated by the View's annotation
+    # is_low_stock is a stored column; has_expiry is annotated by the views
     is_low_stock = serializers.BooleanField(read_only=True)
     has_expiry = serializers.BooleanField(read_only=True)
 
@@ -38,8 +39,121 @@ class ProductSerializer(serializers.ModelSerializer):
             return value
 
         # Critical Security Check: Does the user own the category they are assigning?
-        if value.owner != request.user:
+        if value.owner_id != request.user.pk:
             raise serializers.ValidationError(
                 "Access Denied: You cannot assign products to a category you do not own."
             )
-        return value
\ No newline at end of file
+        return value
+
+class ProductReadSerializer:
+    """
+    Read-only fast path with exactly ``ProductSerializer``'s output, for the
+    list, alert and export endpoints. It reads ``.values()`` rows instead of
+    model instances and skips DRF's per-field objects. It assumes DRF's
+    default ISO-8601 date formats and decimals rendered as strings. The
+    queryset must be annotated with ``has_expiry``, as the product views do.
+    """
+    columns = (
+        'id', 'name', 'price', 'quantity', 'min_threshold', 'expiration_date',
+        'category_id', 'is_low_stock', 'has_expiry', 'created_at',
+    )
+
+    def __init__(self, queryset):
+        self.queryset = queryset
+
+    @classmethod
+    def rows(cls, queryset):
+        """``queryset`` as the ``.values()`` rows ``to_representation`` takes."""
+        return queryset.values(*cls.columns)
+
+    @staticmethod
+    def to_representation(row, tz=None):
+        created_at = row['created_at']
+        if created_at is not None:
+            created_at = created_at.astimezone(tz or timezone.get_current_timezone()).isoformat()
+            if created_at.endswith('+00:00'):
+                created_at = created_at[:-6] + 'Z'
+        expiration_date = row['expiration_date']
+        price = row['price']
+        return {
+            'id': row['id'],
+            'name': row['name'],
+            'price': f'{price:f}' if price is not None else None,
+            'quantity': row['quantity'],
+            'min_threshold': row['min_threshold'],
+            'expiration_date': expiration_date.isoformat() if expiration_date else None,
+            'category': row['category_id'],
+            'is_low_stock': bool(row['is_low_stock']),
+            'has_expiry': bool(row['has_expiry']),
+            'created_at': created_at,
+        }
+
+    def serialize(self, rows):
+        tz = timezone.get_current_timezone()
+        return [self.to_representation(row, tz) for row in rows]
+
+    @property
+    def data(self):
+        """Serialize a ``.values()`` page (e.g. from a paginator) or the whole queryset."""
+        queryset = self.queryset
+        if hasattr(queryset, 'values'):
+            queryset = self.rows(queryset)
+        return self.serialize(queryset)
+
+class ProductImportRowSerializer(serializers.Serializer):
+    # Category is validated against the owner's ids in bulk by the importer,
+    # so it is a plain integer here instead of a per-row related lookup.
+    name = serializers.CharField(max_length=255)
+    price = serializers.DecimalField(max_digits=10, decimal_places=2)
+    quantity = serializers.IntegerField(min_value=0, max_value=MAX_QUANTITY)
+    min_threshold = serializers.IntegerField(min_value=0, max_value=MAX_QUANTITY)
+    expiration_date = serializers.DateField(required=False, allow_null=True)
+    category = serializers.IntegerField()
+
+
+class StockMovementSerializer(serializers.Serializer):
+    product_id = serializers.IntegerField()
+    # Summed per product, then checked against the stored quantity.
+    delta = serializers.IntegerField(min_value=-MAX_QUANTITY, max_value=MAX_QUANTITY)
+
+
+class StockMovementBatchSerializer(serializers.Serializer):
+    movements = StockMovementSerializer(many=True, allow_empty=False, max_length=5000)
+
+
+class BatchOperationSerializer(serializers.Serializer):
+    method = serializers.ChoiceField(choices=['GET', 'POST', 'PUT', 'PATCH', 'DELETE'])
+    path = serializers.CharField(max_length=2048)
+    body = serializers.JSONField(required=False, allow_null=True)
+    # e.g. If-None-Match; the batch request's own headers apply otherwise.
+    headers = serializers.DictField(child=serializers.CharField(), required=False)
+
+    def to_internal_value(self, data):
+        if isinstance(data, dict) and isinstance(data.get('method'), str):
+            data = {**data, 'method': data['method'].upper()}
+        return super().to_internal_value(data)
+
+
+class BatchRequestSerializer(serializers.Serializer):
+    operations = BatchOperationSerializer(many=True, allow_empty=False, max_length=100)
+    atomic = serializers.BooleanField(default=False)
+
+
+class AlertEventSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = AlertEvent
+        fields = [
+            'id', 'kind', 'state', 'product_id', 'product_name',
+            'quantity', 'min_threshold', 'expiration_date', 'created_at'
+        ]
+        read_only_fields = fields
+
+
+class CategoryPurgeSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = CategoryPurge
+        fields = [
+            'category_id', 'category_name', 'products_total', 'products_purged',
+            'created_at', 'finished_at'
+        ]
+        read_only_fields = fields
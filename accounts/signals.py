@@ -0,0 +1,184 @@
+from django.conf import settings
+from django.db import connections
+from django.db.models.signals import post_delete, post_migrate, post_save, pre_delete, pre_save
+from django.dispatch import Signal, receiver
+from django.utils import timezone
+
+from rest_framework.authtoken.models import Token
+
+from . import alerts, ledger, summary
+from .authentication import invalidate_user
+from .cache import bump_inventory_version, bump_inventory_versions
+from .events import publish_dashboard_refresh
+from .models import Category, InventorySummary, InventoryVersion, Product
+from .search import ensure_sqlite_fts
+
+
+# Sent after products are written, including bulk paths that bypass
+# Model.save(). ``changes`` is a list of ``(before, after)`` tracked-state
+# dicts (see ``Product.tracked_state``): ``before`` is None for inserts and
+# ``after`` is None for deletes. Bulk paths may pass a ledger ``reason``
+# (see ``StockMovement.REASON_CHOICES``).
+inventory_changed = Signal()
+
+
+@receiver(inventory_changed)
+def update_inventory_summary(sender, changes, **kwargs):
+    summary.apply_changes(changes)
+
+
+@receiver(inventory_changed)
+def record_alert_transitions(sender, changes, **kwargs):
+    alerts.record_changes(changes)
+
+
+@receiver(inventory_changed)
+def record_stock_movements(sender, changes, reason=None, **kwargs):
+    ledger.record_changes(changes, reason)
+
+
+@receiver(inventory_changed)
+def bump_versions_for_products(sender, changes, **kwargs):
+    owner_ids = {state['owner_id'] for change in changes for state in change if state is not None}
+    bump_inventory_versions(owner_ids)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def create_inventory_version(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        InventoryVersion.objects.create(owner=instance)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def invalidate_cached_user(sender, instance, raw=False, using=None, **kwargs):
+    # Covers deactivation and password changes, which are plain saves.
+    if not raw:
+        invalidate_user(instance.pk, using)
+
+
+@receiver(post_save, sender=Token)
+@receiver(post_delete, sender=Token)
+def invalidate_cached_token(sender, instance, raw=False, using=None, **kwargs):
+    if not raw:
+        invalidate_user(instance.user_id, using)
+
+
+def _category_bookkeeping(instance, origin):
+    """
+    Whether deleting ``instance`` needs the receivers below: not when its
+    owner is being deleted, nor after a soft delete, which did it already
+    (see ``accounts.purge``).
+    """
+    return instance.deleted_at is None and (
+        isinstance(origin, Category) or getattr(origin, 'model', None) is Category or origin is None
+    )
+
+
+@receiver(post_save, sender=Category)
+def bump_version_for_category(sender, instance, raw=False, **kwargs):
+    if not raw:
+        bump_inventory_version(instance.owner_id)
+
+
+@receiver(post_delete, sender=Category)
+def bump_version_for_deleted_category(sender, instance, origin=None, **kwargs):
+    # Also covers the products removed by the cascade. Nothing to do when
+    # the owner itself is being deleted.
+    if _category_bookkeeping(instance, origin):
+        bump_inventory_version(instance.owner_id)
+
+
+@receiver(post_save, sender=Category)
+def refresh_streams_for_category(sender, instance, raw=False, **kwargs):
+    # Category names and counts are not expressed as deltas.
+    if not raw:
+        publish_dashboard_refresh(instance.owner_id)
+
+
+@receiver(post_delete, sender=Category)
+def refresh_streams_for_deleted_category(sender, instance, origin=None, **kwargs):
+    if _category_bookkeeping(instance, origin):
+        publish_dashboard_refresh(instance.owner_id)
+
+
+@receiver(pre_delete, sender=Category)
+def clear_category_alerts(sender, instance, origin=None, **kwargs):
+    # The cascade skips inventory_changed, so clear the products' alerts here.
+    if _category_bookkeeping(instance, origin):
+        alerts.record_cleared_for_category(instance)
+
+
+@receiver(pre_delete, sender=Category)
+def close_category_ledger(sender, instance, origin=None, **kwargs):
+    # Reads the summary, which the cascade is about to delete.
+    if _category_bookkeeping(instance, origin):
+        ledger.record_category_deleted(instance)
+
+
+@receiver(post_save, sender=Category)
+def create_inventory_summary(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        InventorySummary.objects.create(
+            owner_id=instance.owner_id, category=instance, expired_as_of=timezone.now().date()
+        )
+
+
+def _lock_stored_state(instance, using):
+    """
+    Re-read the tracked values of ``instance``'s row under a row lock, held
+    until the enclosing transaction ends. The copy loaded into memory may be
+    stale: another request may have saved the product since, and deltas
+    taken from it would skew the summaries, alerts and ledger.
+    """
+    instance._loaded_values = Product.objects.using(using).select_for_update().filter(
+        pk=instance.pk
+    ).values(*Product.TRACKED_FIELDS).first()
+
+
+@receiver(pre_save, sender=Product)
+def remember_product_state(sender, instance, raw=False, using=None, **kwargs):
+    # Product.save() runs in a transaction; the lock covers the bookkeeping.
+    if not raw and instance.pk is not None:
+        _lock_stored_state(instance, using)
+
+
+@receiver(post_save, sender=Product)
+def product_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    before = None if created else instance.stored_state()
+    after = instance.tracked_state()
+    instance._loaded_values = {name: after[name] for name in Product.TRACKED_FIELDS}
+    inventory_changed.send(sender=Product, changes=[(before, after)])
+
+
+def _deletes_product(origin):
+    # Not a cascade from a category or user delete: the summary rows are
+    # going away with those.
+    return origin is None or isinstance(origin, Product) or getattr(origin, 'model', None) is Product
+
+
+@receiver(pre_delete, sender=Product)
+def remember_deleted_product_state(sender, instance, using=None, origin=None, **kwargs):
+    # Deletes run in a transaction (see Collector.delete).
+    if _deletes_product(origin):
+        _lock_stored_state(instance, using)
+
+
+@receiver(post_delete, sender=Product)
+def product_deleted(sender, instance, origin=None, **kwargs):
+    if not _deletes_product(origin):
+        return
+    before = instance.stored_state()
+    if before is not None:
+        # None: the row was already gone when locked.
+        inventory_changed.send(sender=Product, changes=[(before, None)])
+
+
+@receiver(post_migrate)
+def restore_sqlite_search_index(sender, app_config=None, using='default', **kwargs):
+    # SQLite drops the FTS sync triggers whenever a migration rebuilds the
+    # product table; put them back once migrations are done.
+    if app_config is not None and app_config.label == 'accounts' and connections[using].vendor == 'sqlite':
+        ensure_sqlite_fts(connections[using])
@@ -0,0 +1,106 @@
+from collections import defaultdict
+
+from django.db import IntegrityError, OperationalError, transaction
+from django.db.models import Case, F, IntegerField, Q, Value, When
+
+from .models import MAX_QUANTITY, Product, StockMovement
+from .signals import inventory_changed
+
+
+UPDATE_CHUNK_SIZE = 500
+
+# Deadlock and serialization failure (PostgreSQL SQLSTATEs).
+RETRYABLE_SQLSTATES = {'40P01', '40001'}
+
+
+class StockMovementError(Exception):
+    def __init__(self, errors):
+        super().__init__(errors)
+        self.errors = errors
+
+
+def is_retryable(exc):
+    """Whether ``exc`` lost a race with another transaction rather than failed."""
+    cause = exc.__cause__
+    sqlstate = getattr(cause, 'sqlstate', None) or getattr(cause, 'pgcode', None)
+    return sqlstate in RETRYABLE_SQLSTATES or 'database is locked' in str(exc)
+
+
+def group_deltas(movements):
+    deltas = defaultdict(int)
+    for movement in movements:
+        deltas[movement['product_id']] += movement['delta']
+    return dict(deltas)
+
+
+def apply_stock_movements(owner, movements):
+    """
+    Apply quantity deltas for ``owner`` in a single transaction.
+
+    Deltas are summed per product, the rows are locked and checked, then
+    written with ``F('quantity') + delta`` so concurrent batches never lose
+    updates. Nothing is written if any product is missing or would go below
+    zero. Returns ``{product_id: (quantity, is_low_stock)}``.
+    """
+    deltas = group_deltas(movements)
+    try:
+        with transaction.atomic():
+            current = {
+                row['id']: row
+                # In pk order, so overlapping batches lock in the same order.
+                for row in Product.objects.select_for_update(of=('self',)).for_owner(owner).filter(
+                    pk__in=deltas
+                ).order_by('pk').values('id', *Product.TRACKED_FIELDS)
+            }
+
+            errors = []
+            for pk, delta in deltas.items():
+                if pk not in current:
+                    errors.append({"product_id": pk, "error": "Product not found."})
+                elif current[pk]['quantity'] + delta < 0:
+                    errors.append({
+                        "product_id": pk,
+                        "error": f"Insufficient stock: {current[pk]['quantity']} available, delta {delta}.",
+                    })
+                elif current[pk]['quantity'] + delta > MAX_QUANTITY:
+                    errors.append({
+                        "product_id": pk,
+                        "error": f"Quantity would exceed {MAX_QUANTITY}: {current[pk]['quantity']} held, delta {delta}.",
+                    })
+            if errors:
+                raise StockMovementError(errors)
+
+            changed = [(pk, delta) for pk, delta in deltas.items() if delta]
+            for start in range(0, len(changed), UPDATE_CHUNK_SIZE):
+                chunk = changed[start:start + UPDATE_CHUNK_SIZE]
+                # The quantity guard repeats the check in SQL in case the
+                # backend ignored the row lock (e.g. SQLite).
+                condition = Q()
+                for pk, delta in chunk:
+                    condition |= Q(pk=pk, quantity__gte=-delta) if delta < 0 else Q(pk=pk)
+                updated = Product.objects.filter(condition).update(
+                    quantity=F('quantity') + Case(
+                        *[When(pk=pk, then=Value(delta)) for pk, delta in chunk],
+                        default=Value(0), output_field=IntegerField(),
+                    )
+                )
+                if updated != len(chunk):
+                    raise StockMovementError([{"error": "Stock changed concurrently, retry the batch."}])
+
+            inventory_changed.send(sender=Product, changes=[
+                (current[pk], {**current[pk], 'quantity': current[pk]['quantity'] + delta})
+                for pk, delta in changed
+            ], reason=StockMovement.ADJUSTED)
+    except IntegrityError:
+        raise StockMovementError([{"error": "Stock changed concurrently, retry the batch."}])
+    except OperationalError as exc:
+        # A deadlock or serialization failure: nothing was written.
+        if not is_retryable(exc):
+            raise
+        raise StockMovementError([{"error": "Stock changed concurrently, retry the batch."}])
+
+    results = {}
+    for pk, delta in deltas.items():
+        quantity = current[pk]['quantity'] + delta
+        results[pk] = (quantity, quantity <= current[pk]['min_threshold'])
+    return results
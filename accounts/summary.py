@@ -0,0 +1,247 @@
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import router, transaction
+from django.db.models import Case, Count, DecimalField, F, IntegerField, Sum, When
+from django.utils import timezone
+
+from . import alerts
+from .events import publish_dashboard_deltas, publish_dashboard_refresh
+from .models import Category, InventorySummary, Product
+
+
+CHUNK_SIZE = 1000
+SUMMARY_FIELDS = (
+    'product_count', 'total_stock', 'total_value',
+    'low_stock_count', 'expired_count', 'expired_value',
+)
+ZERO = Decimal('0')
+
+
+def _delta_for(state, as_of, sign):
+    value = state['price'] * state['quantity']
+    expired = state['expiration_date'] is not None and state['expiration_date'] <= as_of
+    return {
+        'product_count': sign,
+        'total_stock': sign * state['quantity'],
+        'total_value': sign * value,
+        'low_stock_count': sign if state['quantity'] <= state['min_threshold'] else 0,
+        'expired_count': sign if expired else 0,
+        'expired_value': sign * value if expired else ZERO,
+    }
+
+
+def apply_changes(changes):
+    """
+    Apply product changes to the summaries.
+
+    ``changes`` is an iterable of ``(before, after)`` tracked-state dicts
+    (see ``Product.tracked_state``); ``before`` is None for inserts and
+    ``after`` is None for deletes. Rows are locked so the expiry rollover
+    cannot interleave, then updated with a single ``UPDATE`` whose ``F()``
+    increments are picked per category by ``CASE``. The per-owner deltas are pushed to the live streams on commit.
+    """
+    by_category = defaultdict(list)
+    owner_by_category = {}
+    for before, after in changes:
+        for state, sign in ((before, -1), (after, 1)):
+            if state is not None:
+                by_category[state['category_id']].append((state, sign))
+                owner_by_category[state['category_id']] = state['owner_id']
+    if not by_category:
+        return
+
+    # Part of the product write's transaction when there is one.
+    with transaction.atomic(savepoint=False):
+        as_of_by_category = dict(
+            # Locked in pk order, as every writer does, so two overlapping
+            # batches cannot deadlock.
+            InventorySummary.objects.select_for_update().filter(
+                category_id__in=by_category
+            ).order_by('pk').values_list('category_id', 'expired_as_of')
+        )
+        missing = set(by_category) - set(as_of_by_category)
+        if missing:
+            # Rows are created with their category, so this only happens for
+            # data that predates the summaries; the rebuild already includes
+            # the change being applied.
+            rebuild(Category.objects.filter(id__in=missing))
+            for owner_id in {owner_by_category[category_id] for category_id in missing}:
+                publish_dashboard_refresh(owner_id)
+
+        deltas = defaultdict(lambda: dict.fromkeys(SUMMARY_FIELDS, 0))
+        whens = defaultdict(list)
+        for category_id, as_of in as_of_by_category.items():
+            totals = dict.fromkeys(SUMMARY_FIELDS, 0)
+            for state, sign in by_category[category_id]:
+                for field, value in _delta_for(state, as_of, sign).items():
+                    totals[field] += value
+            owner_delta = deltas[owner_by_category[category_id]]
+            for field, value in totals.items():
+                owner_delta[field] += value
+                if value:
+                    whens[field].append(When(category_id=category_id, then=F(field) + value))
+        if whens:
+            InventorySummary.objects.filter(category_id__in=as_of_by_category).update(**{
+                field: Case(*field_whens, default=F(field), output_field=InventorySummary._meta.get_field(field))
+                for field, field_whens in whens.items()
+            })
+        publish_dashboard_deltas(deltas)
+
+
+def _aggregate(products, today):
+    money = DecimalField(max_digits=18, decimal_places=2)
+    return products.values('category_id').annotate(
+        product_count=Count('id'),
+        total_stock=Sum('quantity'),
+        total_value=Sum(F('price') * F('quantity'), output_field=money),
+        low_stock_count=Sum(Case(When(quantity__lte=F('min_threshold'), then=1), default=0, output_field=IntegerField())),
+        expired_count=Sum(Case(When(expiration_date__lte=today, then=1), default=0, output_field=IntegerField())),
+        expired_value=Sum(Case(When(expiration_date__lte=today, then=F('price') * F('quantity')), default=0, output_field=money)),
+    ).order_by()
+
+
+def compute(categories, today=None):
+    """Recompute summaries from scratch as unsaved ``InventorySummary`` objects."""
+    today = today or timezone.now().date()
+    summaries = {}
+    for start in range(0, len(categories), CHUNK_SIZE):
+        chunk = categories[start:start + CHUNK_SIZE]
+        for category in chunk:
+            summaries[category.id] = InventorySummary(
+                owner_id=category.owner_id, category_id=category.id, expired_as_of=today
+            )
+        for row in _aggregate(Product.objects.filter(category__in=chunk), today):
+            summary = summaries[row['category_id']]
+            for field in SUMMARY_FIELDS:
+                setattr(summary, field, row[field] or 0)
+    return list(summaries.values())
+
+
+def rebuild(categories, today=None):
+    """Recompute and upsert the summaries of ``categories``. Returns the row count."""
+    summaries = compute(list(categories.only('id', 'owner_id')), today)
+    InventorySummary.objects.bulk_create(
+        summaries,
+        batch_size=CHUNK_SIZE,
+        update_conflicts=True,
+        unique_fields=['category'],
+        update_fields=[*SUMMARY_FIELDS, 'expired_as_of', 'updated_at'],
+    )
+    return len(summaries)
+
+
+def verify(categories, today=None):
+    """
+    Yield ``(stored, expected)`` pairs for summaries that do not match a
+    recompute. Expiry figures are checked as of each row's own
+    ``expired_as_of`` so rows merely awaiting the rollover are not reported.
+    """
+    today = today or timezone.now().date()
+    stored = {
+        summary.category_id: summary
+        for summary in InventorySummary.objects.filter(category__in=categories)
+    }
+    by_as_of = defaultdict(list)
+    for category in categories.only('id', 'owner_id'):
+        current = stored.get(category.id)
+        by_as_of[current.expired_as_of if current else today].append(category)
+
+    for as_of, group in by_as_of.items():
+        for expected in compute(group, as_of):
+            current = stored.get(expected.category_id)
+            if current is None or any(
+                getattr(current, field) != getattr(expected, field) for field in SUMMARY_FIELDS
+            ):
+                yield current, expected
+
+
+def rollover_expiry(summaries=None, today=None):
+    """
+    Move stale ``expired_*`` figures forward to ``today``, adding only the
+    products whose expiration date fell in ``(expired_as_of, today]`` and
+    raising their expiry alerts. Returns the number of summaries rolled over.
+    """
+    today = today or timezone.now().date()
+    if summaries is None:
+        summaries = InventorySummary.objects.all()
+    rolled = 0
+    stale_ids = list(summaries.filter(expired_as_of__lt=today).values_list('id', flat=True))
+    for start in range(0, len(stale_ids), CHUNK_SIZE):
+        with transaction.atomic():
+            # Re-check under the lock: a concurrent rollover may have won.
+            stale = list(InventorySummary.objects.select_for_update().filter(
+                id__in=stale_ids[start:start + CHUNK_SIZE], expired_as_of__lt=today
+            ).order_by('pk').values_list('category_id', 'expired_as_of'))
+            by_as_of = defaultdict(list)
+            for category_id, as_of in stale:
+                by_as_of[as_of].append(category_id)
+
+            for as_of, category_ids in by_as_of.items():
+                crossed = Product.objects.filter(
+                    category_id__in=category_ids,
+                    expiration_date__gt=as_of,
+                    expiration_date__lte=today,
+                )
+                alerts.record_newly_expired(crossed)
+                newly_expired = {
+                    row['category_id']: row
+                    for row in crossed.values('category_id', 'owner_id').annotate(
+                        count=Count('id'),
+                        value=Sum(F('price') * F('quantity'), output_field=DecimalField(max_digits=18, decimal_places=2)),
+                    ).order_by()
+                }
+                InventorySummary.objects.filter(category_id__in=set(category_ids) - set(newly_expired)).update(
+                    expired_as_of=today
+                )
+                deltas = defaultdict(lambda: {'expired_count': 0, 'expired_value': ZERO})
+                for category_id, row in newly_expired.items():
+                    InventorySummary.objects.filter(category_id=category_id).update(
+                        expired_count=F('expired_count') + row['count'],
+                        expired_value=F('expired_value') + (row['value'] or 0),
+                        expired_as_of=today,
+                    )
+                    deltas[row['owner_id']]['expired_count'] += row['count']
+                    deltas[row['owner_id']]['expired_value'] += row['value'] or 0
+                publish_dashboard_deltas(deltas)
+            rolled += len(stale)
+    return rolled
+
+
+def dashboard_payload(user):
+    """Build the ``DashboardView`` response from the user's summary rows."""
+    today = timezone.now().date()
+    summaries = InventorySummary.objects.filter(owner=user)
+    rows = list(summaries.select_related('category'))
+    if any(row.expired_as_of < today for row in rows):
+        rollover_expiry(summaries, today)
+        # From the primary: a lagging replica would still have the rows
+        # from before the rollover.
+        rows = list(summaries.using(router.db_for_write(InventorySummary)).select_related('category'))
+
+    totals = dict.fromkeys(SUMMARY_FIELDS, 0)
+    value_by_category = defaultdict(lambda: ZERO)
+    for row in rows:
+        for field in SUMMARY_FIELDS:
+            totals[field] += getattr(row, field)
+        if row.product_count:
+            value_by_category[row.category.name] += row.total_value
+
+    return {
+        "counts": {
+            "total_products": totals['product_count'],
+            "total_categories": len(rows),
+            "low_stock": totals['low_stock_count'],
+            "expired_products": totals['expired_count']
+        },
+        "stock": {"total_stock": totals['total_stock']},
+        "financial": {
+            "total_inventory_value": float(totals['total_value']),
+            "expired_inventory_value": float(totals['expired_value']),
+            "real_inventory_value": float(totals['total_value'] - totals['expired_value'])
+        },
+        "analytics": [
+            {"category": name, "total_value": float(value)}
+            for name, value in sorted(value_by_category.items(), key=lambda item: item[1], reverse=True)
+        ]
+    }
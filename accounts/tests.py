@@ -1,3 +1,942 @@
-from django.test import TestCase
+import gzip
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+from base64 import urlsafe_b64encode
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from uuid import UUID
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.core.checks import run_checks
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connection, connections
+from django.db.models import BooleanField, Case, Sum, When
+from django.test import AsyncClient, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.utils.http import http_date
+from django.utils.translation import gettext_lazy
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from . import events, metrics, purge, summary
+from .authentication import bump_user_generation, get_user_generation, token_cache
+from .cache import get_cache
+from .renderers import FastJSONRenderer
+from .models import MAX_QUANTITY, AlertEvent, Category, CategoryPurge, InventorySummary, Product, StockMovement, User
+from .search import trigram_search
+from .serializers import ProductReadSerializer, ProductSerializer
+
+
+class OverlappingProductWritesTests(TestCase):
+    """
+    Two requests load the same product (quantity 10, threshold 5) and save
+    it one after the other: the second save's deltas must start from what
+    the first one stored, not from its own stale copy.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user('owner', password='password')
+        cls.category = Category.objects.create(owner=cls.owner, name='Dairy')
+
+    def setUp(self):
+        self.product = Product.objects.create(
+            category=self.category, name='Milk', price='2.00', quantity=10, min_threshold=5
+        )
+        first = Product.objects.get(pk=self.product.pk)
+        second = Product.objects.get(pk=self.product.pk)
+        first.quantity = 5
+        first.save()
+        second.quantity = 8
+        second.save()
+
+    def test_summary_matches_stored_row(self):
+        stored = InventorySummary.objects.get(category=self.category)
+        self.assertEqual(stored.total_stock, 8)
+        self.assertEqual(stored.low_stock_count, 0)
+        self.assertEqual(list(summary.verify(Category.objects.filter(pk=self.category.pk))), [])
+
+    def test_low_stock_alert_raised_then_cleared(self):
+        events = AlertEvent.objects.filter(product_id=self.product.pk, kind=AlertEvent.LOW_STOCK).order_by('id')
+        self.assertEqual(
+            list(events.values_list('state', 'quantity')),
+            [(AlertEvent.RAISED, 5), (AlertEvent.CLEARED, 8)],
+        )
+
+    def test_ledger_adds_up_to_stored_quantity(self):
+        movements = StockMovement.objects.filter(product_id=self.product.pk)
+        self.assertEqual(movements.aggregate(total=Sum('quantity_delta'))['total'], 8)
+        self.assertEqual(movements.aggregate(total=Sum('low_stock_delta'))['total'], 0)
+
+    def test_stale_delete_removes_stored_row(self):
+        stale = Product.objects.get(pk=self.product.pk)
+        current = Product.objects.get(pk=self.product.pk)
+        current.quantity = 3
+        current.save()
+        stale.delete()
+        stored = InventorySummary.objects.get(category=self.category)
+        self.assertEqual((stored.product_count, stored.total_stock, stored.low_stock_count), (0, 0, 0))
+
+
+@override_settings(CATEGORY_PURGE_BATCH_SIZE=2, CATEGORY_PURGE_IN_BACKGROUND=False)
+class CategorySoftDeleteTests(TestCase):
+    """A category larger than one purge batch, deleted through the API."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user('owner', password='password')
+        cls.category = Category.objects.create(owner=cls.owner, name='Frozen')
+        cls.kept = Category.objects.create(owner=cls.owner, name='Dairy')
+        for n in range(5):
+            # All low on stock: five active alerts.
+            Product.objects.create(category=cls.category, name=f'Peas {n}', price='1.00', quantity=1, min_threshold=5)
+        Product.objects.create(category=cls.kept, name='Milk', price='2.00', quantity=10, min_threshold=5)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+
+    def cleared(self):
+        return AlertEvent.objects.filter(state=AlertEvent.CLEARED).count()
+
+    def test_delete_hides_products_without_touching_them(self):
+        response = self.client.delete(f'/api/categories/{self.category.pk}/')
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.data['products_total'], 5)
+        self.assertEqual(Product.objects.filter(category=self.category, owner=self.owner).count(), 5)
+        self.assertEqual(self.cleared(), 0)
+        self.assertEqual([row['name'] for row in self.client.get('/api/products/').data['results']], ['Milk'])
+        self.assertEqual(self.client.get('/api/dashboard/').json()['counts']['total_products'], 1)
+
+    def test_purge_clears_alerts_and_removes_rows(self):
+        self.client.delete(f'/api/categories/{self.category.pk}/')
+        self.assertEqual(purge.purge_pending(), 1)
+        self.assertFalse(Product.objects.filter(category_id=self.category.pk).exists())
+        self.assertFalse(Category.all_objects.filter(pk=self.category.pk).exists())
+        self.assertEqual(self.cleared(), 5)
+        progress = self.client.get(f'/api/categories/{self.category.pk}/purge/').data
+        self.assertEqual(progress['products_purged'], 5)
+        self.assertIsNotNone(progress['finished_at'])
+        self.assertTrue(CategoryPurge.objects.filter(finished_at__isnull=False).exists())
+
+
+class CachedTokenAuthenticationTests(TestCase):
+    """
+    Another worker deactivates the user: the queryset update below stands
+    in for it, as its signals only reach that worker's own LRU.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('owner', password='password')
+        cls.token = Token.objects.create(user=cls.user)
+
+    def setUp(self):
+        token_cache.clear()
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def deactivate_elsewhere(self):
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+
+    def test_per_process_cache_checks_every_request(self):
+        self.assertEqual(self.client.get('/api/products/').status_code, 200)
+        self.deactivate_elsewhere()
+        self.assertEqual(self.client.get('/api/products/').status_code, 401)
+
+    def test_shared_cache_spreads_invalidation(self):
+        location = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, location)
+        shared = {'default': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': location}}
+        with self.settings(CACHES=shared):
+            self.assertEqual(self.client.get('/api/products/').status_code, 200)
+            self.deactivate_elsewhere()
+            self.assertEqual(self.client.get('/api/products/').status_code, 200)
+            # What the other worker's signal does to the shared cache.
+            bump_user_generation(self.user.pk)
+            self.assertEqual(self.client.get('/api/products/').status_code, 401)
+
+    def test_invalidation_waits_for_commit(self):
+        location = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, location)
+        shared = {'default': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': location}}
+        with self.settings(CACHES=shared), self.captureOnCommitCallbacks() as callbacks:
+            self.user.is_active = False
+            self.user.save()
+            self.assertEqual(get_user_generation(self.user.pk), 0)
+        self.assertEqual(len(callbacks), 1)
+        with self.settings(CACHES=shared):
+            callbacks[0]()
+            self.assertEqual(get_user_generation(self.user.pk), 1)
+
+    def test_generation_read_before_the_rows(self):
+        location = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, location)
+        shared = {'default': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': location}}
+        load = TokenAuthentication.authenticate_credentials
+
+        def load_then_commit_elsewhere(authentication, key):
+            # Another request deactivates the user and commits right after
+            # this one loaded the rows.
+            loaded = load(authentication, key)
+            self.deactivate_elsewhere()
+            bump_user_generation(self.user.pk)
+            return loaded
+
+        with self.settings(CACHES=shared):
+            with mock.patch.object(TokenAuthentication, 'authenticate_credentials', load_then_commit_elsewhere):
+                self.assertEqual(self.client.get('/api/products/').status_code, 200)
+            self.assertEqual(self.client.get('/api/products/').status_code, 401)
+
+
+class ReplicaPinCheckTests(TestCase):
+    def errors(self):
+        return [message.id for message in run_checks(include_deployment_checks=True) if message.id == 'accounts.E001']
+
+    def test_per_process_cache_with_replicas(self):
+        with mock.patch('accounts.checks.replica_aliases', return_value=['replica_1']):
+            self.assertEqual(self.errors(), ['accounts.E001'])
+
+    def test_shared_cache_with_replicas(self):
+        location = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, location)
+        shared = {'default': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': location}}
+        with self.settings(CACHES=shared), mock.patch('accounts.checks.replica_aliases', return_value=['replica_1']):
+            self.assertEqual(self.errors(), [])
+
+    def test_no_replicas(self):
+        with mock.patch('accounts.checks.replica_aliases', return_value=[]):
+            self.assertEqual(self.errors(), [])
+
+
+class ReplicaRoutingTests(TransactionTestCase):
+    """
+    ``replica_test`` is a second connection to the primary's test database,
+    as a replica with TEST MIRROR gets, so only the connection a query goes
+    through tells them apart. Committed writes are visible to it, hence a
+    TransactionTestCase.
+    """
+    replica = 'replica_test'
+
+    @classmethod
+    def setUpClass(cls):
+        # Only declared once the test runner has set up the databases, so
+        # it does not look for one of its own.
+        connections.settings[cls.replica] = {**connections[DEFAULT_DB_ALIAS].settings_dict}
+        cls.addClassCleanup(cls.remove_replica)
+        cls.databases = {DEFAULT_DB_ALIAS, cls.replica}
+        super().setUpClass()
+
+    @classmethod
+    def remove_replica(cls):
+        connections[cls.replica].close()
+        del connections[cls.replica]
+        del connections.settings[cls.replica]
+
+    def setUp(self):
+        aliases = mock.patch('accounts.middleware.replica_aliases', return_value=[self.replica])
+        aliases.start()
+        self.addCleanup(aliases.stop)
+        self.owner = User.objects.create_user('owner', password='password')
+        Category.objects.create(owner=self.owner, name='Dairy')
+
+    def client_for(self, user):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Token {Token.objects.create(user=user).key}')
+        return client
+
+    def queries(self, client, method, path, **kwargs):
+        """``(primary, replica)`` SQL of the request."""
+        with CaptureQueriesContext(connections[DEFAULT_DB_ALIAS]) as primary, \
+                CaptureQueriesContext(connections[self.replica]) as replica:
+            response = getattr(client, method)(path, **kwargs)
+        self.assertLess(response.status_code, 400)
+        return [query['sql'] for query in primary], [query['sql'] for query in replica]
+
+    def test_reads_from_replica_until_a_write(self):
+        client = self.client_for(self.owner)
+        other = self.client_for(User.objects.create_user('other', password='password'))
+        self.assertTrue(self.queries(client, 'get', '/api/categories/')[1])
+        self.assertFalse(self.queries(client, 'post', '/api/categories/', data={'name': 'Frozen'})[1])
+        # Pinned to the primary after its write; other clients are not.
+        self.assertFalse(self.queries(client, 'get', '/api/categories/')[1])
+        self.assertTrue(self.queries(other, 'get', '/api/categories/')[1])
+
+    def test_dashboard_rereads_rolled_over_summaries_from_primary(self):
+        Product.objects.create(
+            category=Category.objects.get(), name='Milk', price='2.00', quantity=10, min_threshold=5,
+            expiration_date=timezone.now().date() - timedelta(days=1),
+        )
+        InventorySummary.objects.update(expired_as_of=timezone.now().date() - timedelta(days=2), expired_count=0)
+        primary, replica = self.queries(self.client_for(self.owner), 'get', '/api/dashboard/')
+        joined = 'FROM "accounts_inventorysummary" INNER JOIN "accounts_category"'
+        # The first read finds the stale rows, the one after the rollover is on the primary.
+        self.assertEqual(sum(joined in sql for sql in replica), 1)
+        self.assertEqual(sum(joined in sql for sql in primary), 1)
+        self.assertEqual(InventorySummary.objects.get().expired_count, 1)
+
+
+class ConditionalGetTests(TestCase):
+    """A write in the same second as a response must not make If-Modified-Since match."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user('owner', password='password')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+        self.second = timezone.now().replace(microsecond=0) + timedelta(seconds=1)
+
+    def at(self, seconds):
+        return mock.patch('django.utils.timezone.now', return_value=self.second + timedelta(seconds=seconds))
+
+    def test_no_last_modified_within_the_write_second(self):
+        with self.at(0.2):
+            Category.objects.create(owner=self.owner, name='Dairy')
+        with self.at(0.5):
+            response = self.client.get('/api/categories/')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('ETag', response)
+        self.assertNotIn('Last-Modified', response)
+        with self.at(0.8):
+            Category.objects.create(owner=self.owner, name='Frozen')
+        with self.at(0.9):
+            response = self.client.get('/api/categories/', HTTP_IF_MODIFIED_SINCE=http_date(self.second.timestamp()))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), 2)
+
+    def test_last_modified_rounds_up(self):
+        with self.at(0.2):
+            Category.objects.create(owner=self.owner, name='Dairy')
+        with self.at(1.5):
+            response = self.client.get('/api/categories/')
+        last_modified = response['Last-Modified']
+        self.assertEqual(last_modified, http_date(self.second.timestamp() + 1))
+        with self.at(1.6):
+            self.assertEqual(self.client.get('/api/categories/', HTTP_IF_MODIFIED_SINCE=last_modified).status_code, 304)
+        with self.at(1.7):
+            Category.objects.create(owner=self.owner, name='Frozen')
+        with self.at(2.5):
+            self.assertEqual(self.client.get('/api/categories/', HTTP_IF_MODIFIED_SINCE=last_modified).status_code, 200)
+
+
+class EventBrokerTests(TestCase):
+    """A transaction's events reach the broker in one call after commit."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user('owner', password='password')
+        cls.other = User.objects.create_user('other', password='password')
+
+    def setUp(self):
+        patcher = mock.patch.object(events, '_broker', events.InProcessBroker())
+        self.broker = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def publish_deltas(self):
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            events.publish_dashboard_deltas({
+                self.owner.pk: {'total_products': 2}, self.other.pk: {'total_products': 1},
+            })
+        self.assertEqual(len(callbacks), 1)
+
+    async def test_stream_receives_batch(self):
+        frames = events.stream(self.owner.pk, heartbeat=1)
+        try:
+            self.assertTrue((await anext(frames)).startswith('retry:'))
+            await sync_to_async(self.publish_deltas)()
+            frame = await anext(frames)
+        finally:
+            await frames.aclose()
+        self.assertEqual(frame, 'event: dashboard\ndata: {"delta": {"total_products": 2}}\n\n')
+        self.assertEqual(self.broker.subscriber_count(), 0)
+
+    def test_postgres_broker_sends_one_statement(self):
+        alerts = AlertEvent.objects.bulk_create([
+            AlertEvent(owner=self.owner, product_id=n, product_name=f'Milk {n}', kind=AlertEvent.LOW_STOCK,
+                       state=AlertEvent.RAISED, quantity=0, min_threshold=1)
+            for n in range(3)
+        ])
+        broker = events.PostgresNotifyBroker()
+        with mock.patch.object(events, '_broker', broker), mock.patch.object(connection, 'cursor') as cursor:
+            with self.captureOnCommitCallbacks(execute=True):
+                events.publish_alerts(alerts)
+        execute = cursor.return_value.__enter__.return_value.execute
+        execute.assert_called_once()
+        sql, (channel, payloads) = execute.call_args.args
+        self.assertIn('unnest', sql)
+        self.assertEqual(channel, broker.channel)
+        self.assertEqual([json.loads(payload)['event']['id'] for payload in payloads], [alert.id for alert in alerts])
+
+
+class MetricsCollectTests(TestCase):
+    """A scrape merges the files of running workers and drops those of exited ones."""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        settings = override_settings(METRICS_DIR=self.directory)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def write(self, pid, count):
+        row = [0] * metrics.ROW_SIZE
+        row[metrics.COUNT] = count
+        path = os.path.join(self.directory, f'metrics-{pid}.json')
+        with open(path, 'w') as fh:
+            json.dump({'routes': {'product-list|GET': row}, 'status': {'product-list|GET|200': count}}, fh)
+        return path
+
+    def test_dead_worker_file_is_dropped(self):
+        exited = subprocess.Popen([sys.executable, '-c', 'pass'])
+        exited.wait()
+        stale = self.write(exited.pid, 5)
+        self.write(os.getppid(), 2)
+        merged = metrics.MetricsRegistry().collect()
+        self.assertEqual(merged['status']['product-list|GET|200'], 2)
+        self.assertFalse(os.path.exists(stale))
+        self.assertEqual(
+            sorted(os.listdir(self.directory)), sorted([f'metrics-{os.getpid()}.json', f'metrics-{os.getppid()}.json'])
+        )
+
+
+class InventoryCacheTests(TestCase):
+    """Dashboard and alert payloads are cached per inventory version; every write bumps it."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user('owner', password='password')
+        cls.other = User.objects.create_user('other', password='password')
+        cls.category = Category.objects.create(owner=cls.owner, name='Dairy')
+        cls.milk = Product.objects.create(category=cls.category, name='Milk', price='2.00', quantity=10, min_threshold=5)
+
+    def setUp(self):
+        get_cache().clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+
+    def test_hit_until_a_product_write(self):
+        self.assertEqual(self.client.get('/api/dashboard/')['X-Cache'], 'MISS')
+        # The version, read by the conditional GET and by the cache lookup.
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/dashboard/')
+        self.assertEqual(response['X-Cache'], 'HIT')
+        Product.objects.create(category=self.category, name='Eggs', price='3.00', quantity=1, min_threshold=0)
+        response = self.client.get('/api/dashboard/')
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['counts']['total_products'], 2)
+
+    def test_stock_movement_invalidates_alerts(self):
+        self.assertEqual(self.client.get('/api/products/alerts/').data['low_stock'], [])
+        self.assertEqual(self.client.get('/api/products/alerts/')['X-Cache'], 'HIT')
+        self.client.post('/api/products/stock/', {'movements': [{'product_id': self.milk.pk, 'delta': -8}]}, format='json')
+        response = self.client.get('/api/products/alerts/')
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual([product['name'] for product in response.data['low_stock']], ['Milk'])
+
+    def test_other_owner_writes_keep_the_entry(self):
+        self.client.get('/api/dashboard/')
+        Category.objects.create(owner=self.other, name='Frozen')
+        self.assertEqual(self.client.get('/api/dashboard/')['X-Cache'], 'HIT')
+        self.category.name = 'Chilled'
+        self.category.save()
+        response = self.client.get('/api/dashboard/')
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['analytics'][0]['category'], 'Chilled')
+
+
+class FastJSONRendererTests(TestCase):
+    """orjson output is byte for byte what DRF's JSONRenderer returns."""
+
+    payload = {
+        'price': Decimal('2.50'),
+        'updated_at': datetime(2026, 3, 1, 12, 30, 15, 123456, tzinfo=dt_timezone.utc),
+        'expiration_date': datetime(2026, 3, 1).date(),
+        'uuid': UUID('12345678-1234-5678-1234-567812345678'),
+        'label': gettext_lazy('Low stock'),
+        'name': 'Crème\u2028fraîche',
+        1: [None, True, 1.5],
+    }
+
+    def test_same_bytes_as_drf(self):
+        self.assertEqual(FastJSONRenderer().render(self.payload), JSONRenderer().render(self.payload))
+
+    def test_indent_falls_back(self):
+        rendered = FastJSONRenderer().render({'a': 1}, 'application/json; indent=2')
+        self.assertEqual(rendered, b'{\n  "a": 1\n}')
+
+    def test_api_uses_it(self):
+        owner = User.objects.create_user('owner', password='password')
+        Category.objects.create(owner=owner, name='Dairy')
+        client = APIClient()
+        client.force_authenticate(owner)
+        with mock.patch.object(FastJSONRenderer, 'render', autospec=True, side_effect=FastJSONRenderer.render) as render:
+            response = client.get('/api/categories/')
+        render.assert_called_once()
+        self.assertEqual(response.json()['results'][0]['name'], 'Dairy')
+
+
+@override_settings(API_GZIP_MIN_SIZE=200, PRODUCT_EXPORT_CHUNK_SIZE=2)
+class APIGZipMiddlewareTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user('owner', password='password')
+        category = Category.objects.create(owner=cls.owner, name='Dairy')
+        for n in range(5):
+            Product.objects.create(category=category, name=f'Milk {n}', price='2.00', quantity=n, min_threshold=1)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+
+    def test_large_response_is_compressed(self):
+        plain = self.client.get('/api/products/')
+        response = self.client.get('/api/products/', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertEqual(gzip.decompress(response.content), plain.content)
+
+    def test_small_response_is_not(self):
+        response = self.client.get('/api/categories/', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertLess(len(response.content), 200)
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_export_is_compressed_as_it_streams(self):
+        response = self.client.get('/api/products/export/', {'format': 'ndjson'}, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        lines = gzip.decompress(b''.join(response.streaming_content)).splitlines()
+        self.assertEqual(len(lines), 5)
+
+
+class BatchRequestTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user('owner', password='password')
+        cls.category = Category.objects.create(owner=cls.owner, name='Dairy')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+
+    def batch(self, *operations, atomic=False):
+        return self.client.post('/api/batch/', {'operations': list(operations), 'atomic': atomic}, format='json')
+
+    def test_operations_stand_alone(self):
+        response = self.batch(
+            {'method': 'post', 'path': '/api/categories/', 'body': {'name': 'Frozen'}},
+            {'method': 'GET', 'path': '/api/categories/'},
+            {'method': 'DELETE', 'path': '/api/categories/0/'},
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.data['committed'])
+        results = response.data['results']
+        self.assertEqual([result['status'] for result in results], [201, 200, 404])
+        self.assertEqual(sorted(row['name'] for row in results[1]['body']['results']), ['Dairy', 'Frozen'])
+        self.assertTrue(Category.objects.filter(owner=self.owner, name='Frozen').exists())
+
+    def test_atomic_failure_rolls_back(self):
+        response = self.batch(
+            {'method': 'POST', 'path': '/api/categories/', 'body': {'name': 'Frozen'}},
+            {'method': 'POST', 'path': '/api/products/', 'body': {'name': 'Milk'}},
+            {'method': 'PATCH', 'path': f'/api/categories/{self.category.pk}/', 'body': {'name': 'Chilled'}},
+            atomic=True,
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.data['committed'])
+        self.assertEqual([result['status'] for result in response.data['results']], [201, 400, 424])
+        self.assertEqual(list(Category.objects.values_list('name', flat=True)), ['Dairy'])
+
+    def test_operation_headers(self):
+        etag = self.client.get('/api/categories/')['ETag']
+        response = self.batch({'method': 'GET', 'path': '/api/categories/', 'headers': {'If-None-Match': etag}})
+        result = response.data['results'][0]
+        self.assertEqual(result['status'], 304)
+        self.assertEqual(result['headers']['ETag'], etag)
+
+    def test_excluded_routes(self):
+        response = self.batch(
+            {'method': 'POST', 'path': '/api/batch/', 'body': {'operations': []}},
+            {'method': 'GET', 'path': '/api/products/export/'},
+            {'method': 'GET', 'path': '/api/async/dashboard/'},
+            {'method': 'GET', 'path': '/admin/'},
+            {'method': 'GET', 'path': '/api/nowhere/'},
+        )
+        self.assertEqual([result['status'] for result in response.data['results']], [400, 400, 400, 404, 404])
+
+    def test_invalid_requests(self):
+        for operations in ([], [{'method': 'TRACE', 'path': '/api/categories/'}],
+                           [{'method': 'GET', 'path': '/api/categories/'}] * 101):
+            with self.subTest(operations=len(operations)):
+                self.assertEqual(self.client.post('/api/batch/', {'operations': operations}, format='json').status_code, 400)
+        self.assertEqual(APIClient().post('/api/batch/', {'operations': []}, format='json').status_code, 401)
+
+
+class KeysetPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user('owner', password='password')
+        category = Category.objects.create(owner=cls.owner, name='Dairy')
+        for n in range(3):
+            Product.objects.create(category=category, name=f'Milk {n}', price=f'{n}.50', quantity=n, min_threshold=0)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+
+    def get(self, ordering, cursor):
+        return self.client.get('/api/products/', {'ordering': ordering, 'cursor': cursor, 'page_size': 1})
+
+    def cursor(self, ordering, position):
+        token = {'o': ordering, 'p': position, 'i': 1, 'r': 0}
+        return urlsafe_b64encode(json.dumps(token).encode()).decode()
+
+    def test_walks_pages_in_order(self):
+        names, response = [], self.get('price', '')
+        while True:
+            names += [row['name'] for row in response.data['results']]
+            if not response.data['next']:
+                break
+            response = self.client.get(response.data['next'])
+        self.assertEqual(names, ['Milk 0', 'Milk 1', 'Milk 2'])
+
+    def test_position_of_the_wrong_type(self):
+        for ordering, position in (('price', 'abc'), ('-quantity', '1.5'), ('created_at', 'yesterday'), ('price', None)):
+            with self.subTest(ordering=ordering, position=position):
+                response = self.get(ordering, self.cursor(ordering, position))
+                self.assertEqual(response.status_code, 404)
+                self.assertEqual(response.data['detail'], 'Invalid cursor')
+
+    def test_malformed_cursor(self):
+        for cursor in ('not-base64!', urlsafe_b64encode(b'[1, 2]').decode(), self.cursor('quantity', '1')):
+            with self.subTest(cursor=cursor):
+                self.assertEqual(self.get('price', cursor).status_code, 404)
+
+
+class ProductReadSerializerParityTests(TestCase):
+    """ProductReadSerializer must render byte for byte like ProductSerializer."""
+
+    @classmethod
+    def setUpTestData(cls):
+        owner = User.objects.create_user('owner', password='password')
+        category = Category.objects.create(owner=owner, name='Dairy')
+        today = timezone.now().date()
+        cases = (
+            # (price, quantity, min_threshold, expiration_date): low stock, expired, ...
+            ('0.00', 0, 0, None),
+            ('0.10', 2, 5, today - timedelta(days=3)),
+            ('1.50', 5, 5, today),
+            ('10.00', 6, 5, today + timedelta(days=30)),
+            ('99999999.99', 25, 10, None),
+        )
+        for n, (price, quantity, min_threshold, expiration_date) in enumerate(cases):
+            Product.objects.create(
+                category=category, name=f'Ünïcode "{n}"', price=Decimal(price), quantity=quantity,
+                min_threshold=min_threshold, expiration_date=expiration_date,
+            )
+
+    def queryset(self):
+        # Same annotation as the product views.
+        today = timezone.now().date()
+        return Product.objects.annotate(
+            has_expiry=Case(When(expiration_date__lte=today, then=True), default=False, output_field=BooleanField())
+        ).order_by('id')
+
+    def assertSameOutput(self, expected, actual):
+        renderer = JSONRenderer()
+        self.assertEqual(renderer.render(actual), renderer.render(expected))
+
+    def test_stored_products(self):
+        for name in ('UTC', 'Europe/Paris', 'America/St_Johns'):
+            with self.subTest(timezone=name), timezone.override(name):
+                self.assertSameOutput(
+                    ProductSerializer(self.queryset(), many=True).data, ProductReadSerializer(self.queryset()).data
+                )
+
+    def test_edge_values(self):
+        rows = {row['id']: row for row in ProductReadSerializer(self.queryset()).data}
+        self.assertEqual([row['price'] for row in rows.values()], ['0.00', '0.10', '1.50', '10.00', '99999999.99'])
+        self.assertEqual([row['is_low_stock'] for row in rows.values()], [True, True, True, False, False])
+        self.assertEqual([row['has_expiry'] for row in rows.values()], [False, True, True, False, False])
+        self.assertEqual([row['expiration_date'] is None for row in rows.values()], [True, False, False, False, True])
+
+    def test_null_category_and_expiration_date(self):
+        # The database requires a category; the serializers must still agree without one.
+        product = Product(id=1, name='Loose', price=Decimal('3.00'), quantity=1, min_threshold=2,
+                          is_low_stock=True, created_at=timezone.now())
+        product.has_expiry = False
+        row = {column: getattr(product, column) for column in ProductReadSerializer.columns}
+        self.assertSameOutput(ProductSerializer(product).data, ProductReadSerializer([row]).data[0])
+        self.assertIsNone(ProductReadSerializer([row]).data[0]['category'])
+
+
+class AdminQueryCountTests(TestCase):
+    """
+    Admin pages run a fixed number of queries whatever the table size,
+    counting the session and user lookups; growth with the rows is an N+1.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.superuser = User.objects.create_superuser('admin', password='password')
+        for n in range(3):
+            owner = User.objects.create_user(f'owner-{n}', password='password')
+            category = Category.objects.create(owner=owner, name=f'Category {n}')
+            for m in range(5):
+                Product.objects.create(category=category, name=f'Coffee {n}-{m}', price='1.00', quantity=m, min_threshold=2)
+        cls.category = category
+        cls.product = Product.objects.filter(category=category).first()
+
+    def setUp(self):
+        self.client.force_login(self.superuser)
+
+    def assertQueries(self, count, path):
+        # Warms the per-process caches (content types, templates).
+        self.client.get(path)
+        with self.assertNumQueries(count):
+            response = self.client.get(path)
+        self.assertEqual(response.status_code, 200)
+
+    def test_product_changelist(self):
+        for path in ('/admin/accounts/product/', '/admin/accounts/product/?low_stock=yes',
+                     '/admin/accounts/product/?q=coffee'):
+            with self.subTest(path=path):
+                self.assertQueries(4, path)
+
+    def test_product_change_form(self):
+        self.assertQueries(4, f'/admin/accounts/product/{self.product.pk}/change/')
+
+    def test_product_add_form(self):
+        self.assertQueries(2, '/admin/accounts/product/add/')
+
+    def test_category_changelist(self):
+        self.assertQueries(4, '/admin/accounts/category/')
+
+    def test_category_change_form(self):
+        self.assertQueries(3, f'/admin/accounts/category/{self.category.pk}/change/')
+
+
+class CategoryOwnerTests(TestCase):
+    """Products and summaries copy their category's owner, so it never changes."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.superuser = User.objects.create_superuser('admin', password='password')
+        cls.owner = User.objects.create_user('owner', password='password')
+        cls.other = User.objects.create_user('other', password='password')
+        cls.category = Category.objects.create(owner=cls.owner, name='Dairy')
+        Product.objects.create(category=cls.category, name='Milk', price='2.00', quantity=10, min_threshold=5)
+
+    def test_admin_change_form_keeps_owner(self):
+        self.client.force_login(self.superuser)
+        response = self.client.post(
+            f'/admin/accounts/category/{self.category.pk}/change/',
+            {'name': 'Dairy', 'description': '', 'owner': self.other.pk},
+        )
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(Category.objects.get(pk=self.category.pk).owner, self.owner)
+
+    def test_admin_add_form_sets_owner(self):
+        self.client.force_login(self.superuser)
+        self.client.post('/admin/accounts/category/add/', {'name': 'Frozen', 'description': '', 'owner': self.other.pk})
+        self.assertEqual(Category.objects.get(name='Frozen').owner, self.other)
+
+    def test_api_ignores_owner(self):
+        client = APIClient()
+        client.force_authenticate(self.owner)
+        response = client.patch(f'/api/categories/{self.category.pk}/', {'owner': self.other.pk}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Category.objects.get(pk=self.category.pk).owner, self.owner)
+        self.assertEqual(set(Product.objects.values_list('owner', flat=True)), {self.owner.pk})
+        self.assertEqual(InventorySummary.objects.get(category=self.category).owner, self.owner)
+
+
+class TrigramSearchTests(TestCase):
+    """The PostgreSQL search filters on the bare name, as the trigram index is built."""
+
+    def test_query_shape(self):
+        queryset = trigram_search(Product.objects.all(), ['mi_k', '100%'])
+        sql, params = queryset.query.sql_with_params()
+        self.assertIn('"accounts_product"."name" ILIKE %s', sql)
+        self.assertNotIn('UPPER', sql)
+        self.assertEqual(params[-2:], ('%mi\\_k%', '%100\\%%'))
+
+    @skipUnless(connection.vendor == 'postgresql', "The trigram index is PostgreSQL only.")
+    def test_served_by_trigram_index(self):
+        owner = User.objects.create_user('owner', password='password')
+        category = Category.objects.create(owner=owner, name='Dairy')
+        Product.objects.create(category=category, name='Milk', price='2.00', quantity=10, min_threshold=5)
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+        plan = trigram_search(Product.objects.all(), ['milk']).explain()
+        self.assertIn('accounts_product_name_trgm', plan)
+
+
+@override_settings(PRODUCT_EXPORT_CHUNK_SIZE=2)
+class ProductExportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user('owner', password='password')
+        cls.token = Token.objects.create(user=cls.owner)
+        category = Category.objects.create(owner=cls.owner, name='Dairy')
+        for n in range(5):
+            Product.objects.create(category=category, name=f'Milk {n}', price='2.00', quantity=n, min_threshold=1)
+
+    async def test_asgi_streams_in_chunks(self):
+        response = await AsyncClient().get(
+            '/api/products/export/', {'format': 'ndjson'}, headers={'Authorization': f'Token {self.token.key}'}
+        )
+        self.assertTrue(response.is_async)
+        chunks = [chunk async for chunk in response.streaming_content]
+        self.assertEqual([chunk.count(b'\n') for chunk in chunks], [2, 2, 1])
+        names = [json.loads(line)['name'] for chunk in chunks for line in chunk.splitlines()]
+        self.assertEqual(sorted(names), [f'Milk {n}' for n in range(5)])
+
+    def test_wsgi_streams_rows(self):
+        client = APIClient()
+        client.force_authenticate(self.owner)
+        response = client.get('/api/products/export/', {'format': 'csv'})
+        self.assertFalse(response.is_async)
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 6)
+        self.assertTrue(lines[0].startswith('id,name,price'))
+
+
+class StockMovementTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user('owner', password='password')
+        category = Category.objects.create(owner=cls.owner, name='Dairy')
+        cls.milk = Product.objects.create(category=category, name='Milk', price='2.00', quantity=10, min_threshold=5)
+        cls.eggs = Product.objects.create(category=category, name='Eggs', price='3.00', quantity=1, min_threshold=0)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+
+    def post(self, *movements):
+        return self.client.post('/api/products/stock/', {'movements': [
+            {'product_id': product_id, 'delta': delta} for product_id, delta in movements
+        ]}, format='json')
+
+    def quantities(self):
+        return dict(Product.objects.values_list('name', 'quantity'))
+
+    def test_deltas_are_summed_per_product(self):
+        response = self.post((self.milk.pk, -3), (self.milk.pk, -4), (self.eggs.pk, 2))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            {row['product_id']: (row['quantity'], row['is_low_stock']) for row in response.data['results']},
+            {self.milk.pk: (3, True), self.eggs.pk: (3, False)},
+        )
+        self.assertEqual(self.quantities(), {'Milk': 3, 'Eggs': 3})
+
+    def test_rejected_batch_writes_nothing(self):
+        for movements in (
+            [(self.milk.pk, -1), (self.eggs.pk, -2)],
+            [(self.milk.pk, 1), (self.eggs.pk, MAX_QUANTITY)],
+        ):
+            with self.subTest(movements=movements):
+                response = self.post(*movements)
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual([error['product_id'] for error in response.data['errors']], [self.eggs.pk])
+        self.assertEqual(self.quantities(), {'Milk': 10, 'Eggs': 1})
+
+    def test_delta_out_of_range(self):
+        for delta in (MAX_QUANTITY + 1, -MAX_QUANTITY - 1):
+            with self.subTest(delta=delta):
+                response = self.post((self.milk.pk, delta))
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('delta', response.data['movements'][0])
+
+    def test_rows_locked_in_pk_order(self):
+        with CaptureQueriesContext(connection) as captured:
+            self.post((self.eggs.pk, 1), (self.milk.pk, 1))
+        locks = [query['sql'] for query in captured if query['sql'].startswith('SELECT') and 'IN (' in query['sql']]
+        self.assertTrue(locks)
+        for sql in locks:
+            self.assertRegex(sql, r'ORDER BY "accounts_(product|inventorysummary)"."id" ASC')
+
+    def test_deadlock_is_reported(self):
+        deadlock = OperationalError('deadlock detected')
+        # What the PostgreSQL driver's exception carries.
+        deadlock.__cause__ = type('DeadlockDetected', (Exception,), {'sqlstate': '40P01'})()
+        with mock.patch('accounts.stock.inventory_changed.send', side_effect=deadlock):
+            response = self.post((self.milk.pk, -1))
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['errors'], [{'error': 'Stock changed concurrently, retry the batch.'}])
+        self.assertEqual(self.quantities()['Milk'], 10)
+
+
+@override_settings(PRODUCT_IMPORT_BATCH_SIZE=2)
+class ProductImportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user('owner', password='password')
+        cls.category = Category.objects.create(owner=cls.owner, name='Dairy')
+        other = User.objects.create_user('other', password='password')
+        cls.foreign = Category.objects.create(owner=other, name='Theirs')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+
+    def post_csv(self, *rows):
+        lines = ['name,price,quantity,min_threshold,expiration_date,category', *rows]
+        return self.client.generic('POST', '/api/products/import/', '\n'.join(lines), content_type='text/csv')
+
+    def test_reports_invalid_rows_and_keeps_the_rest(self):
+        response = self.post_csv(
+            f'Milk,2.00,10,5,,{self.category.pk}',
+            f'Eggs,abc,10,5,,{self.category.pk}',
+            f'Cheese,4.00,-1,5,,{self.category.pk}',
+            f'Butter,3.00,1,1,,{self.foreign.pk}',
+            f'Cream,1.50,0,0,2026-12-31,{self.category.pk}',
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual((response.data['created'], response.data['failed']), (2, 3))
+        self.assertEqual(
+            {error['row']: set(error['errors']) for error in response.data['errors']},
+            {3: {'price'}, 4: {'quantity'}, 5: {'category'}},
+        )
+        self.assertEqual(sorted(Product.objects.values_list('name', flat=True)), ['Cream', 'Milk'])
+        self.assertEqual(InventorySummary.objects.get(category=self.category).product_count, 2)
+
+    def test_quantities_beyond_integer_range(self):
+        response = self.post_csv(
+            f'Milk,2.00,{MAX_QUANTITY},{MAX_QUANTITY},,{self.category.pk}',
+            f'Eggs,2.00,{MAX_QUANTITY + 1},5,,{self.category.pk}',
+            f'Cheese,2.00,1,{MAX_QUANTITY + 1},,{self.category.pk}',
+        )
+        self.assertEqual((response.data['created'], response.data['failed']), (1, 2))
+        self.assertEqual(
+            [(error['row'], list(error['errors'])) for error in response.data['errors']],
+            [(3, ['quantity']), (4, ['min_threshold'])],
+        )
+
+    def test_batch_rejected_by_the_database(self):
+        rows = [f'Item {n},1.00,1,0,,{self.category.pk}' for n in range(4)]
+        create = Product.objects.bulk_create
+        calls = []
+
+        def fail_second_batch(products, **kwargs):
+            calls.append(len(products))
+            if len(calls) == 2:
+                raise OperationalError('numeric value out of range')
+            return create(products, **kwargs)
+
+        with mock.patch.object(Product.objects, 'bulk_create', side_effect=fail_second_batch):
+            with self.assertLogs('accounts.importers', 'ERROR'):
+                response = self.post_csv(*rows)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual((response.data['created'], response.data['failed']), (2, 2))
+        self.assertEqual([error['row'] for error in response.data['errors']], [4, 5])
+        self.assertEqual(InventorySummary.objects.get(category=self.category).product_count, 2)
@@ -1,13 +1,24 @@
 from django.urls import path
 from .views import (
+    AsyncDashboardView,
+    AsyncProductAlertView,
+    BatchView,
+    DashboardHistoryView,
     DashboardView,
+    EventStreamView,
+    MetricsView,
     ProductAlertView,
     ProductDetailView,
+    ProductExportView,
+    ProductForecastView,
+    ProductImportView,
+    StockMovementView,
     ProductListCreateView,
     RegisterView,
     LoginView,
     CategoryListCreateView,
     CategoryDetailView,
+    CategoryPurgeView,
 )
 
 urlpatterns = [
@@ -16,11 +27,27 @@ urlpatterns = [
 
     path('categories/', CategoryListCreateView.as_view(), name='category-list'),
     path('categories/<int:pk>/', CategoryDetailView.as_view(), name='category-detail'),
+    path('categories/<int:pk>/purge/', CategoryPurgeView.as_view(), name='category-purge'),
 
     path('products/', ProductListCreateView.as_view(), name='product-list'),
+    path('products/export/', ProductExportView.as_view(), name='product-export'),
+    path('products/import/', ProductImportView.as_view(), name='product-import'),
+    path('products/stock/', StockMovementView.as_view(), name='product-stock'),
+    path('products/forecast/', ProductForecastView.as_view(), name='product-forecast'),
     path('products/<int:pk>/', ProductDetailView.as_view(), name='product-detail'),
 
     path('products/alerts/', ProductAlertView.as_view(), name='product-alerts'),
 
     path('dashboard/', DashboardView.as_view(), name='dashboard'),
+    path('dashboard/history/', DashboardHistoryView.as_view(), name='dashboard-history'),
+
+    path('events/', EventStreamView.as_view(), name='event-stream'),
+
+    path('metrics/', MetricsView.as_view(), name='metrics'),
+
+    path('batch/', BatchView.as_view(), name='batch'),
+
+    # Async variants, for the ASGI app.
+    path('async/products/alerts/', AsyncProductAlertView.as_view(), name='async-product-alerts'),
+    path('async/dashboard/', AsyncDashboardView.as_view(), name='async-dashboard'),
 ]
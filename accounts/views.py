@@ -1,25 +1,57 @@
+import asyncio
+import hashlib
+import math
+from functools import wraps
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+
 from django.utils import timezone
-from django.db import models
-from django.db.models import Sum, F, Case, When, BooleanField, DecimalField
+from django.utils.dateparse import parse_date
+from django.db.models import Case, When, BooleanField
 from django.contrib.auth import authenticate
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.conf import settings
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+from django.core.handlers.asgi import ASGIRequest
+from django.views import View
+
+from asgiref.sync import sync_to_async
 
 from rest_framework import generics, status, filters
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.authtoken.models import Token
-from rest_framework.permissions import AllowAny, IsAuthenticated
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.permissions import AllowAny, IsAdminUser, IsAuthenticated
+from rest_framework.exceptions import AuthenticationFailed, ParseError
 
 from django_filters.rest_framework import DjangoFilterBackend
 
-from .serializers import UserRegisterSerializer, ProductSerializer, CategorySerializer
-from .models import User, Category, Product
-
-# --- PAGINATION CONFIG ---
-class StandardResultsSetPagination(PageNumberPagination):
-    page_size = 20
-    page_size_query_param = 'page_size'
-    max_page_size = 100
+from .serializers import (
+    UserRegisterSerializer, ProductSerializer, ProductReadSerializer, CategorySerializer,
+    StockMovementBatchSerializer, AlertEventSerializer, CategoryPurgeSerializer,
+    BatchRequestSerializer,
+)
+from .models import User, Category, CategoryPurge, Product, AlertEvent
+from .alerts import latest_cursor
+from .authentication import CachedTokenAuthentication
+from .events import DEFAULT_HEARTBEAT, stream
+from .pagination import KeysetPagination, StandardResultsSetPagination
+from .cache import acached_inventory_payload, cached_inventory_payload, get_inventory_state
+from .concurrency import gather_queries, run_query
+from . import forecasting
+from .batch import run_batch
+from .ledger import history_payload
+from .purge import delete_category
+from .exporters import aiter_chunks, export_rows, stream_csv, stream_ndjson
+from .renderers import CSVRenderer, NDJSONRenderer
+from .search import ProductSearchFilter
+from .summary import dashboard_payload
+from .stock import StockMovementError, apply_stock_movements
+from .metrics import registry, render_prometheus
+from .importers import (
+    ProductImporter, detect_format, get_batch_size, iter_csv_rows, iter_lines,
+    iter_ndjson_rows, iter_request_chunks,
+)
 
 # --- USER AUTH ---
 class RegisterView(generics.CreateAPIView):
@@ -38,10 +70,57 @@ class LoginView(APIView):
         token, _ = Token.objects.get_or_create(user=user)
         return Response({"token": token.key})
 
+# --- CONDITIONAL GET ---
+def inventory_validators(request):
+    """
+    ``(etag, last_modified)`` for a read that depends only on the user's
+    inventory, today's date and the request (path, query string, Accept).
+    """
+    version, updated_at = get_inventory_state(request.user.pk)
+    today = timezone.now().date()
+    key = f"{request.user.pk}:{version}:{today.isoformat()}:{request.get_full_path()}:{request.headers.get('Accept', '')}"
+    etag = '"%s"' % hashlib.sha1(key.encode()).hexdigest()
+    # Date-dependent flags (has_expiry, expired figures) change at midnight.
+    last_modified = datetime.combine(today, time.min, tzinfo=dt_timezone.utc)
+    if updated_at is not None:
+        last_modified = max(last_modified, updated_at)
+    # HTTP dates are whole seconds: rounded up, so a write later in the
+    # same second is not older than what the client was sent.
+    return etag, math.ceil(last_modified.timestamp())
+
+
+def conditional_on_inventory(get):
+    """
+    ETag / Last-Modified for a view's ``get``. A matching If-None-Match (or
+    If-Modified-Since) gets a 304 after a single ``InventoryVersion`` read,
+    before ``get`` runs its own queries or serializer. Last-Modified is left
+    out while the last write's second is still running.
+    """
+    @wraps(get)
+    def wrapper(self, request, *args, **kwargs):
+        etag, last_modified = inventory_validators(request)
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = get(self, request, *args, **kwargs)
+        if response.status_code in (200, 304):
+            response['ETag'] = etag
+            if last_modified <= timezone.now().timestamp():
+                # Until that second is over another write could share it,
+                # so only the ETag is given.
+                response['Last-Modified'] = http_date(last_modified)
+            patch_cache_control(response, private=True, no_cache=True)
+            patch_vary_headers(response, ('Accept', 'Authorization'))
+        return response
+    return wrapper
+
+
 # --- CATEGORY VIEWS ---
 class CategoryListCreateView(generics.ListCreateAPIView):
     serializer_class = CategorySerializer
     permission_classes = [IsAuthenticated]
+    @conditional_on_inventory
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
     def get_queryset(self):
         return Category.objects.filter(owner=self.request.user)
     def perform_create(self, serializer):
@@ -52,34 +131,69 @@ class CategoryDetailView(generics.RetrieveUpdateDestroyAPIView):
     permission_classes = [IsAuthenticated]
     def get_queryset(self):
         return Category.objects.filter(owner=self.request.user)
-    
-# --- PRODUCT VIEWS (With Search, Filter & Pagination) ---
-class ProductListCreateView(generics.ListCreateAPIView):
-    serializer_class = ProductSerializer
+    def destroy(self, request, *args, **kwargs):
+        # Soft delete: large categories are purged in the background (accounts.purge).
+        purge = delete_category(self.get_object())
+        if purge.finished_at is not None:
+            return Response(status=status.HTTP_204_NO_CONTENT)
+        return Response(CategoryPurgeSerializer(purge).data, status=status.HTTP_202_ACCEPTED)
+
+class CategoryPurgeView(generics.RetrieveAPIView):
+    """Progress of a deleted category's purge, by category id."""
+    serializer_class = CategoryPurgeSerializer
     permission_classes = [IsAuthenticated]
-    pagination_class = StandardResultsSetPagination
+    lookup_field = 'category_id'
+    lookup_url_kwarg = 'pk'
+    def get_queryset(self):
+        return CategoryPurge.objects.filter(owner=self.request.user)
     
-    # Enable Filtering, Search, and Ordering
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+# --- PRODUCT VIEWS (With Search, Filter & Pagination) ---
+class ProductFilterMixin:
+    """Tenant queryset plus the search/filter/ordering shared by the list and export views."""
+    # ProductSearchFilter is index-backed; filters.SearchFilter is a drop-in fallback.
+    filter_backends = [DjangoFilterBackend, ProductSearchFilter, filters.OrderingFilter]
     filterset_fields = ['category']
     search_fields = ['name']
     ordering_fields = ['price', 'quantity', 'created_at']
 
     def get_queryset(self):
         today = timezone.now().date()
-        return Product.objects.select_related('category').filter(
-            category__owner=self.request.user
+        return Product.objects.for_owner(
+            self.request.user
         ).annotate(
-            is_low_stock=Case(
-                When(quantity__lte=F('min_threshold'), then=True),
-                default=False, output_field=BooleanField(),
-            ),
             has_expiry=Case(
                 When(expiration_date__lte=today, then=True),
                 default=False, output_field=BooleanField(),
             )
         ).order_by('-created_at')
 
+class ProductListCreateView(ProductFilterMixin, generics.ListCreateAPIView):
+    serializer_class = ProductSerializer
+    permission_classes = [IsAuthenticated]
+    pagination_class = StandardResultsSetPagination
+
+    @property
+    def paginator(self):
+        # Passing ?cursor= (empty for the first page) opts into keyset pagination.
+        if not hasattr(self, '_paginator'):
+            if KeysetPagination.cursor_query_param in self.request.query_params:
+                self._paginator = KeysetPagination()
+            else:
+                self._paginator = self.pagination_class()
+        return self._paginator
+
+    @conditional_on_inventory
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
+    def list(self, request, *args, **kwargs):
+        # Reads skip model instances; writes still go through ProductSerializer.
+        rows = ProductReadSerializer.rows(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(ProductReadSerializer(page).data)
+        return Response(ProductReadSerializer(rows).data)
+
     def perform_create(self, serializer):
         serializer.save()
 
@@ -89,79 +203,359 @@ class ProductListCreateView(generics.ListCreateAPIView):
 class ProductDetailView(generics.RetrieveUpdateDestroyAPIView):
     serializer_class = ProductSerializer
     permission_classes = [IsAuthenticated]
+    @conditional_on_inventory
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
     def get_queryset(self):
         today = timezone.now().date()
-        return Product.objects.select_related('category').filter(
-            category__owner=self.request.user
+        return Product.objects.for_owner(
+            self.request.user
         ).annotate(
-            is_low_stock=Case(
-                When(quantity__lte=F('min_threshold'), then=True),
-                default=False, output_field=BooleanField(),
-            ),
             has_expiry=Case(
                 When(expiration_date__lte=today, then=True),
                 default=False, output_field=BooleanField(),
             )
         ).order_by('-created_at')
 
+# --- EXPORT VIEW ---
+class ProductExportView(ProductFilterMixin, generics.GenericAPIView):
+    """
+    Streams the whole (filtered) catalog as CSV or NDJSON
+    (?format=csv|ndjson) without paging or loading it into memory; under
+    ASGI through an async iterator, in chunks.
+    """
+    permission_classes = [IsAuthenticated]
+    renderer_classes = [CSVRenderer, NDJSONRenderer]
+
+    def get(self, request):
+        rows = export_rows(self.filter_queryset(self.get_queryset()))
+        renderer = request.accepted_renderer
+        stream = stream_csv(rows) if renderer.format == 'csv' else stream_ndjson(rows)
+        if isinstance(request._request, ASGIRequest):
+            stream = aiter_chunks(stream)
+        response = StreamingHttpResponse(stream, content_type=f'{renderer.media_type}; charset=utf-8')
+        response['Content-Disposition'] = f'attachment; filename="products.{renderer.format}"'
+        return response
+
+# --- BULK IMPORT VIEW ---
+class ProductImportView(APIView):
+    """
+    Streams a CSV or NDJSON body (or a multipart 'file' upload) and creates
+    products in batches. Returns a per-row error report.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        if request.content_type.startswith('multipart/form-data'):
+            upload = request.FILES.get('file')
+            if upload is None:
+                raise ParseError("Missing 'file' upload.")
+            input_format = detect_format(upload.content_type, upload.name.lower())
+            chunks = upload.chunks()
+        else:
+            input_format = detect_format(request.content_type)
+            chunks = iter_request_chunks(request._request)
+
+        if input_format is None:
+            return Response(
+                {"error": "Unsupported format: send text/csv or application/x-ndjson."},
+                status=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            )
+
+        lines = iter_lines(chunks)
+        rows = iter_csv_rows(lines) if input_format == 'csv' else iter_ndjson_rows(lines)
+        importer = ProductImporter(request.user, batch_size=get_batch_size(request.query_params.get('batch_size')))
+        try:
+            report = importer.run(rows)
+        except UnicodeDecodeError:
+            importer.flush()
+            report = importer.report()
+            report["error"] = "Upload is not valid UTF-8."
+            return Response(report, status=status.HTTP_400_BAD_REQUEST)
+
+        response_status = status.HTTP_201_CREATED if report["created"] else status.HTTP_400_BAD_REQUEST
+        return Response(report, status=response_status)
+
+# --- STOCK MOVEMENTS VIEW ---
+class StockMovementView(APIView):
+    """
+    Applies a batch of {product_id, delta} quantity changes atomically.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        serializer = StockMovementBatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            results = apply_stock_movements(request.user, serializer.validated_data['movements'])
+        except StockMovementError as exc:
+            return Response({"errors": exc.errors}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({
+            "results": [
+                {"product_id": pk, "quantity": quantity, "is_low_stock": is_low_stock}
+                for pk, (quantity, is_low_stock) in results.items()
+            ]
+        })
+
+# --- BATCH VIEW ---
+class BatchView(APIView):
+    """
+    Runs up to 100 API operations in one request: authenticated once and
+    dispatched in-process to their views (accounts.batch). With
+    "atomic": true they share one transaction, rolled back if any fails.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        serializer = BatchRequestSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        results, committed = run_batch(request, **serializer.validated_data)
+        return Response({"committed": committed, "results": results})
+
+# --- FORECAST VIEW ---
+class ProductForecastView(generics.GenericAPIView):
+    """
+    Consumption rate, projected stockout date and suggested reorder quantity
+    of the products being consumed or due for reordering, soonest stockout
+    first. ?reorder=true keeps only those with a suggestion.
+    """
+    permission_classes = [IsAuthenticated]
+    pagination_class = StandardResultsSetPagination
+
+    def get(self, request):
+        forecast, hit = forecasting.product_forecast(request.user)
+        positions = forecasting.select(forecast, request.query_params.get('reorder') in ('true', '1'))
+        page = self.paginate_queryset(positions)
+        response = self.get_paginated_response(forecasting.rows(request.user, forecast, page))
+        response['X-Cache'] = 'HIT' if hit else 'MISS'
+        return response
+
+
 # --- ALERTS VIEW ---
+def alert_querysets(user, today):
+    """The (low stock, expired) product querysets behind the alerts snapshot."""
+    base_qs = Product.objects.for_owner(
+        user
+    ).annotate(
+        has_expiry=Case(When(expiration_date__lte=today, then=True), default=False, output_field=BooleanField())
+    )
+    # Served by the partial low-stock index and the (owner, expiration_date) index.
+    return base_qs.filter(is_low_stock=True), base_qs.filter(expiration_date__lte=today)
+
+
+def parse_feed_params(params, default_page_size=100, max_page_size=1000):
+    try:
+        since = int(params['since'] or 0)
+        page_size = int(params.get('page_size', default_page_size))
+    except ValueError:
+        raise ParseError("'since' and 'page_size' must be integers.")
+    return since, max(1, min(page_size, max_page_size))
+
+
+def alert_feed(user, since, page_size):
+    events = list(
+        AlertEvent.objects.filter(owner=user, id__gt=since).order_by('id')[:page_size + 1]
+    )
+    has_more = len(events) > page_size
+    events = events[:page_size]
+    return {
+        "cursor": events[-1].id if events else since,
+        "has_more": has_more,
+        "results": AlertEventSerializer(events, many=True).data,
+    }
+
+
 class ProductAlertView(APIView):
+    """
+    Without parameters: the current low-stock and expired lists.
+    With ?since=<cursor>: the alert events raised/cleared after that cursor
+    (0 for the whole log), paginated with ?page_size=.
+    """
     permission_classes = [IsAuthenticated]
+    feed_page_size = 100
+    feed_max_page_size = 1000
+
     def get(self, request):
-        today = timezone.now().date()
-        base_qs = Product.objects.select_related('category').filter(
-            category__owner=request.user
-        ).annotate(
-            is_low_stock=Case(When(quantity__lte=F('min_threshold'), then=True), default=False, output_field=BooleanField()),
-            has_expiry=Case(When(expiration_date__lte=today, then=True), default=False, output_field=BooleanField())
-        )
-        return Response({
-            "low_stock": ProductSerializer(base_qs.filter(is_low_stock=True), many=True, context={'request': request}).data,
-            "expired": ProductSerializer(base_qs.filter(has_expiry=True), many=True, context={'request': request}).data,
+        if 'since' in request.query_params:
+            return self.get_feed(request)
+
+        low_stock, expired = alert_querysets(request.user, timezone.now().date())
+        payload, hit = cached_inventory_payload(request.user, 'alerts', lambda: {
+            "low_stock": ProductReadSerializer(low_stock).data,
+            "expired": ProductReadSerializer(expired).data,
+        })
+        return Response(payload, headers={
+            'X-Cache': 'HIT' if hit else 'MISS',
+            # Where to start following ?since= from this snapshot.
+            'X-Alerts-Cursor': str(latest_cursor(request.user)),
         })
 
+    def get_feed(self, request):
+        since, page_size = parse_feed_params(request.query_params, self.feed_page_size, self.feed_max_page_size)
+        return Response(alert_feed(request.user, since, page_size))
+
 # --- DASHBOARD VIEW ---
 class DashboardView(APIView):
     permission_classes = [IsAuthenticated]
+    @conditional_on_inventory
     def get(self, request):
-        user = request.user
-        today = timezone.now().date()
-        products = Product.objects.filter(category__owner=user)
-        categories = Category.objects.filter(owner=user)
-
-        stats = products.aggregate(
-            total_products=models.Count('id'),
-            total_stock=Sum('quantity'),
-            low_stock_count=Sum(Case(When(quantity__lte=F('min_threshold'), then=1), default=0, output_field=models.IntegerField())),
-            expired_count=Sum(Case(When(expiration_date__lte=today, then=1), default=0, output_field=models.IntegerField())),
-            total_value=Sum(F('price') * F('quantity'), output_field=DecimalField(max_digits=15, decimal_places=2))
+        # Read from the per-category summaries maintained by accounts.signals.
+        payload, hit = cached_inventory_payload(request.user, 'dashboard', lambda: dashboard_payload(request.user))
+        return Response(payload, headers={'X-Cache': 'HIT' if hit else 'MISS'})
+
+
+def parse_history_params(params, default_days=30, max_days=366):
+    dates = {}
+    for name in ('from', 'to'):
+        try:
+            dates[name] = parse_date(params[name]) if params.get(name) else None
+        except ValueError:
+            dates[name] = None
+        if params.get(name) and dates[name] is None:
+            raise ParseError(f"'{name}' must be a date (YYYY-MM-DD).")
+    end = dates['to'] or timezone.now().date()
+    start = dates['from'] or end - timedelta(days=default_days - 1)
+    if start > end:
+        raise ParseError("'from' must not be after 'to'.")
+    if (end - start).days >= max_days:
+        raise ParseError(f"The range may cover at most {max_days} days.")
+    return start, end
+
+
+class DashboardHistoryView(APIView):
+    """
+    Daily stock, value and low-stock totals between ?from= and ?to=
+    (default: the last 30 days), read from the daily rollups.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        start, end = parse_history_params(request.query_params)
+        return Response(history_payload(request.user, start, end))
+
+
+# --- ASYNC VIEWS (ASGI) ---
+class AsyncTokenAuthMixin:
+    """
+    Token authentication for plain async Django views, which DRF's
+    ``APIView`` cannot serve. Shares ``CachedTokenAuthentication``'s cache.
+    """
+    # EventSource cannot send headers.
+    allow_query_token = False
+
+    async def get_user(self, request):
+        return await sync_to_async(self.authenticate)(request)
+
+    def authenticate(self, request):
+        scheme, _, key = request.headers.get('Authorization', '').partition(' ')
+        if scheme.lower() != 'token' or not key.strip():
+            key = request.GET.get('token') if self.allow_query_token else None
+        if not key:
+            return None
+        try:
+            user, _ = CachedTokenAuthentication().authenticate_credentials(key.strip())
+        except AuthenticationFailed:
+            return None
+        return user
+
+    def unauthorized(self):
+        return JsonResponse({"detail": "Invalid or missing token."}, status=401)
+
+
+class AsyncDashboardView(AsyncTokenAuthMixin, View):
+    """``DashboardView`` for the ASGI app; the payload is a single summary read."""
+
+    async def get(self, request):
+        user = await self.get_user(request)
+        if user is None:
+            return self.unauthorized()
+        payload, hit = await acached_inventory_payload(
+            user, 'dashboard', lambda: run_query(lambda: dashboard_payload(user))
         )
+        return JsonResponse(payload, headers={'X-Cache': 'HIT' if hit else 'MISS'})
+
 
-        expired_value = products.filter(expiration_date__lte=today).aggregate(
-            val=Sum(F('price') * F('quantity'), output_field=DecimalField(max_digits=15, decimal_places=2))
-        )['val'] or 0
+class AsyncProductAlertView(AsyncTokenAuthMixin, View):
+    """
+    ``ProductAlertView`` for the ASGI app. The low-stock list, the expired
+    list and the feed cursor are independent queries and run concurrently,
+    each on its own connection (see ``accounts.concurrency``).
+    """
+    feed_page_size = ProductAlertView.feed_page_size
+    feed_max_page_size = ProductAlertView.feed_max_page_size
 
-        value_by_category = (
-            products.values('category__name')
-            .annotate(total_value=Sum(F('price') * F('quantity')))
-            .order_by('-total_value')
+    async def get(self, request):
+        user = await self.get_user(request)
+        if user is None:
+            return self.unauthorized()
+        if 'since' in request.GET:
+            try:
+                since, page_size = parse_feed_params(request.GET, self.feed_page_size, self.feed_max_page_size)
+            except ParseError as exc:
+                return JsonResponse({"detail": str(exc.detail)}, status=400)
+            return JsonResponse(await run_query(lambda: alert_feed(user, since, page_size)))
+
+        low_stock, expired = alert_querysets(user, timezone.now().date())
+
+        async def build():
+            low_stock_data, expired_data = await gather_queries(
+                lambda: ProductReadSerializer(low_stock).data,
+                lambda: ProductReadSerializer(expired).data,
+            )
+            return {"low_stock": low_stock_data, "expired": expired_data}
+
+        (payload, hit), cursor = await asyncio.gather(
+            acached_inventory_payload(user, 'alerts', build),
+            run_query(lambda: latest_cursor(user)),
         )
+        return JsonResponse(payload, headers={
+            'X-Cache': 'HIT' if hit else 'MISS',
+            'X-Alerts-Cursor': str(cursor),
+        })
 
-        return Response({
-            "counts": {
-                "total_products": stats['total_products'] or 0,
-                "total_categories": categories.count(),
-                "low_stock": stats['low_stock_count'] or 0,
-                "expired_products": stats['expired_count'] or 0
-            },
-            "stock": {"total_stock": stats['total_stock'] or 0},
-            "financial": {
-                "total_inventory_value": float(stats['total_value'] or 0),
-                "expired_inventory_value": float(expired_value),
-                "real_inventory_value": float((stats['total_value'] or 0) - expired_value)
-            },
-            "analytics": [
-                {"category": item['category__name'], "total_value": float(item['total_value'] or 0)}
-                for item in value_by_category
-            ]
-        })
\ No newline at end of file
+
+# --- LIVE EVENTS VIEW ---
+class EventStreamView(AsyncTokenAuthMixin, View):
+    """
+    Server-Sent Events: alert events (``event: alert``, with ``id`` set to
+    the alert cursor) and dashboard deltas (``event: dashboard``). Serve it
+    from the ASGI app; idle connections hold no thread or DB connection.
+
+    ``EventSource`` cannot send headers, so the token may also be passed as
+    ``?token=``. ``Last-Event-ID`` (or ``?since=`` on the first connect)
+    replays the alert events missed in between.
+    """
+    allow_query_token = True
+
+    async def get(self, request):
+        if not isinstance(request, ASGIRequest):
+            # A WSGI worker would hold the connection without ever sending
+            # a byte of the async stream.
+            return JsonResponse({"detail": "Live events are only served by the ASGI app."}, status=501)
+        user = await self.get_user(request)
+        if user is None:
+            return self.unauthorized()
+        since = request.headers.get('Last-Event-ID') or request.GET.get('since')
+        try:
+            since = int(since) if since is not None else None
+        except ValueError:
+            return JsonResponse({"detail": "'since' must be an integer."}, status=400)
+
+        heartbeat = getattr(settings, 'STOCK_EVENTS_HEARTBEAT', DEFAULT_HEARTBEAT)
+        return StreamingHttpResponse(stream(user.pk, since, heartbeat), content_type='text/event-stream', headers={
+            'Cache-Control': 'no-cache',
+            # Stop nginx from buffering the stream.
+            'X-Accel-Buffering': 'no',
+        })
+
+
+# --- METRICS VIEW ---
+class MetricsView(APIView):
+    """Request metrics of every worker in the Prometheus text format (staff only)."""
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return HttpResponse(
+            render_prometheus(registry.collect()),
+            content_type='text/plain; version=0.0.4; charset=utf-8',
+        )
@@ -0,0 +1,45 @@
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+REPLICA_PREFIX = 'replica_'
+
+# Alias the current request reads from, set by
+# accounts.middleware.ReplicaMiddleware; None reads from the primary.
+read_alias = ContextVar('read_alias', default=None)
+
+# Authentication must see new users, tokens and passwords at once.
+PRIMARY_APPS = {'admin', 'auth', 'authtoken', 'contenttypes', 'sessions'}
+
+
+def replica_aliases():
+    return [alias for alias in settings.DATABASES if alias.startswith(REPLICA_PREFIX)]
+
+
+class ReplicaRouter:
+    """
+    Reads go to ``read_alias`` when set, writes and everything else to the
+    primary. Replicas mirror the primary, so they are never migrated.
+    """
+
+    def db_for_read(self, model, **hints):
+        alias = read_alias.get()
+        if alias is None:
+            return DEFAULT_DB_ALIAS
+        if model._meta.app_label in PRIMARY_APPS or model._meta.label == settings.AUTH_USER_MODEL:
+            return DEFAULT_DB_ALIAS
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            # Reads inside a transaction must see its writes.
+            return DEFAULT_DB_ALIAS
+        return alias
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
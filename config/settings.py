@@ -31,7 +31,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'accounts.middleware.MetricsMiddleware',
     'corsheaders.middleware.CorsMiddleware',
+    'accounts.middleware.APIGZipMiddleware',
+    'accounts.middleware.ReplicaMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -71,16 +74,93 @@ DATABASES = {
     )
 }
 
+# Under ASGI every request runs in a thread of its own, so persistent
+# connections are never reused: set DATABASE_CONN_MAX_AGE=0 there.
+conn_max_age = int(os.getenv('DATABASE_CONN_MAX_AGE', '600'))
 DATABASES = {
     'default': dj_database_url.config(
         default=db_url,
-        conn_max_age=600,
+        conn_max_age=conn_max_age,
         ssl_require=False
     )
 }
 
+# Read replicas (config.routers): DATABASE_REPLICA_URLS is a comma-separated
+# list of URLs, aliased replica_1, replica_2, ... Safe /api/ requests read
+# from one of them; a client that writes reads from the primary for the next
+# REPLICA_STICKY_SECONDS. Pins live in the default cache, so set REDIS_URL
+# when running several workers (check --deploy fails without it). Replicas
+# are never migrated.
+for index, replica_url in enumerate(filter(None, os.getenv('DATABASE_REPLICA_URLS', '').split(',')), start=1):
+    DATABASES[f'replica_{index}'] = {
+        **dj_database_url.parse(replica_url.strip(), conn_max_age=conn_max_age),
+        'TEST': {'MIRROR': 'default'},
+    }
+DATABASE_ROUTERS = ['config.routers.ReplicaRouter']
+REPLICA_STICKY_SECONDS = int(os.getenv('REPLICA_STICKY_SECONDS', '15'))
+
+# Cache: bounded in-process LRU by default; set REDIS_URL to share it between workers.
+if os.getenv('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.getenv('REDIS_URL'),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'stock-default',
+            'OPTIONS': {'MAX_ENTRIES': int(os.getenv('CACHE_MAX_ENTRIES', '5000'))},
+        }
+    }
+INVENTORY_CACHE_ALIAS = 'default'
+INVENTORY_CACHE_TIMEOUT = int(os.getenv('INVENTORY_CACHE_TIMEOUT', '3600'))
+
 # 5. AUTH & TYPES
 AUTH_USER_MODEL = 'accounts.User'
+
+# Token -> user snapshots cached per worker (accounts.authentication); only
+# used when the default cache is shared (REDIS_URL) to spread invalidations.
+TOKEN_AUTH_CACHE_SIZE = int(os.getenv('TOKEN_AUTH_CACHE_SIZE', '10000'))
+TOKEN_AUTH_CACHE_TTL = int(os.getenv('TOKEN_AUTH_CACHE_TTL', '300'))
+
+# Live event streams (accounts.events). The in-process broker only reaches
+# streams served by the same worker; with several ASGI workers on
+# PostgreSQL use 'accounts.events.PostgresNotifyBroker'.
+STOCK_EVENTS_BACKEND = os.getenv('STOCK_EVENTS_BACKEND', 'accounts.events.InProcessBroker')
+STOCK_EVENTS_HEARTBEAT = int(os.getenv('STOCK_EVENTS_HEARTBEAT', '15'))
+
+# Concurrent queries per worker for the async views (accounts.concurrency);
+# each uses its own connection, so keep it within the database's budget.
+ASYNC_QUERY_CONCURRENCY = int(os.getenv('ASYNC_QUERY_CONCURRENCY', '4'))
+
+# Gzip /api/ responses from this size up (accounts.middleware.APIGZipMiddleware).
+API_GZIP_MIN_SIZE = int(os.getenv('API_GZIP_MIN_SIZE', '1024'))
+
+# Request metrics (accounts.metrics), served at /api/metrics/. Set METRICS_DIR
+# to a directory shared by the workers of one host to aggregate them; each
+# worker writes its counters there every METRICS_FLUSH_INTERVAL seconds.
+METRICS_DIR = os.getenv('METRICS_DIR') or None
+METRICS_FLUSH_INTERVAL = int(os.getenv('METRICS_FLUSH_INTERVAL', '5'))
+# Log requests slower than this (ms) with their slowest queries; unset to disable.
+METRICS_SLOW_REQUEST_MS = int(os.getenv('METRICS_SLOW_REQUEST_MS')) if os.getenv('METRICS_SLOW_REQUEST_MS') else None
+METRICS_SLOW_QUERY_COUNT = int(os.getenv('METRICS_SLOW_QUERY_COUNT', '5'))
+
+# Stockout forecasts (accounts.forecasting): consumption is averaged over
+# the last FORECAST_WINDOW_DAYS; reorders cover the lead time plus
+# FORECAST_COVER_DAYS of consumption above the threshold.
+FORECAST_WINDOW_DAYS = int(os.getenv('FORECAST_WINDOW_DAYS', '28'))
+FORECAST_LEAD_TIME_DAYS = int(os.getenv('FORECAST_LEAD_TIME_DAYS', '7'))
+FORECAST_COVER_DAYS = int(os.getenv('FORECAST_COVER_DAYS', '14'))
+
+# Category deletes (accounts.purge) are soft: products are removed in
+# batches of CATEGORY_PURGE_BATCH_SIZE, in the request when one batch covers
+# them, else in a background thread. With CATEGORY_PURGE_IN_BACKGROUND off,
+# schedule purge_deleted_categories instead (it also resumes interrupted purges).
+CATEGORY_PURGE_BATCH_SIZE = int(os.getenv('CATEGORY_PURGE_BATCH_SIZE', '1000'))
+CATEGORY_PURGE_IN_BACKGROUND = os.getenv('CATEGORY_PURGE_IN_BACKGROUND', 'True') == 'True'
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 AUTH_PASSWORD_VALIDATORS = [
@@ -102,11 +182,16 @@ STATIC_URL = 'static/'
 # 8. DJANGO REST FRAMEWORK
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework.authentication.TokenAuthentication',
+        'accounts.authentication.CachedTokenAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
     ),
+    # orjson-backed when installed, otherwise DRF's JSONRenderer.
+    'DEFAULT_RENDERER_CLASSES': (
+        'accounts.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
     # IMPORTANT: Added for filtering & global pagination settings
     'DEFAULT_FILTER_BACKENDS': (
         'django_filters.rest_framework.DjangoFilterBackend',